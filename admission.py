@@ -0,0 +1,128 @@
+import hashlib
+import threading
+import time
+from array import array
+
+from django.core.cache import cache
+from django_redis import get_redis_connection
+
+from .async_redis import get_async_redis_connection
+from .utils import get_setting
+
+ADMISSION_SKETCH_REDIS = 'redis'
+ADMISSION_SKETCH_LOCAL = 'local'
+
+SKETCH_DEPTH = 4
+_SKETCH_PREFIX = "admission__"
+
+_local_sketch = None
+_local_sketch_lock = threading.Lock()
+
+
+class _LocalCountMinSketch:
+    """
+    Count-min sketch of the current window kept in memory of the process.
+    """
+
+    def __init__(self, width, window):
+        self.width = width
+        self.window = window
+        self.counters = array('I', bytes(4 * SKETCH_DEPTH * width))
+        self.lock = threading.Lock()
+
+    def increment(self, indexes, window):
+        with self.lock:
+            if window != self.window:
+                self.counters = array('I', bytes(4 * SKETCH_DEPTH * self.width))
+                self.window = window
+
+            estimate = None
+            for row, index in enumerate(indexes):
+                position = row * self.width + index
+                self.counters[position] += 1
+                estimate = self.counters[position] if estimate is None else min(estimate, self.counters[position])
+            return estimate
+
+
+def admit_cache_key(cache_key, admission_requests):
+    """
+    Doorkeeper of the cache - records a request of the cache key and checks, whether the key
+    has been requested at least admission_requests times within the current window
+    (DRF_REDIS_CACHE_ADMISSION_WINDOW_SECONDS setting, default 3600).
+    Requests are counted in a count-min sketch (fixed size, may overestimate, never underestimates)
+    of DRF_REDIS_CACHE_ADMISSION_SKETCH_WIDTH counters per row (default 16384), kept in redis
+    (ADMISSION_SKETCH_REDIS, default, shared by all the processes) or in memory of the process (ADMISSION_SKETCH_LOCAL),
+    according to DRF_REDIS_CACHE_ADMISSION_SKETCH setting.
+    :param cache_key: cache key of the response
+    :param admission_requests: number of requests, after which the response is cached
+    :return: True if the response should be cached
+    """
+    window, width = _get_window(), get_setting('ADMISSION_SKETCH_WIDTH', 16384)
+    indexes = _get_sketch_indexes(cache_key, width)
+
+    if get_setting('ADMISSION_SKETCH', ADMISSION_SKETCH_REDIS) == ADMISSION_SKETCH_LOCAL:
+        return _get_local_sketch(width, window).increment(indexes, window) >= admission_requests
+
+    pipeline = get_redis_connection().pipeline(transaction=False)
+    _add_sketch_increment(pipeline, indexes, window)
+    return min(pipeline.execute()[:SKETCH_DEPTH]) >= admission_requests
+
+
+async def aadmit_cache_key(cache_key, admission_requests):
+    """
+    Async version of admit_cache_key. Parameters have the same meaning as in admit_cache_key.
+    :return: True if the response should be cached
+    """
+    window, width = _get_window(), get_setting('ADMISSION_SKETCH_WIDTH', 16384)
+    indexes = _get_sketch_indexes(cache_key, width)
+
+    if get_setting('ADMISSION_SKETCH', ADMISSION_SKETCH_REDIS) == ADMISSION_SKETCH_LOCAL:
+        return _get_local_sketch(width, window).increment(indexes, window) >= admission_requests
+
+    pipeline = get_async_redis_connection().pipeline(transaction=False)
+    _add_sketch_increment(pipeline, indexes, window)
+    return min((await pipeline.execute())[:SKETCH_DEPTH]) >= admission_requests
+
+
+def _add_sketch_increment(pipeline, indexes, window):
+    """
+    Private function adding increments of the counters of the redis sketch to the pipeline.
+    Counters of a window are kept in a single hash, which expires after the next window.
+    :param pipeline: redis pipeline (sync or async)
+    :param indexes: indexes of counters in rows of the sketch
+    :param window: number of the current window
+    """
+    sketch_key = cache.make_key(f'{_SKETCH_PREFIX}{window}')
+    for row, index in enumerate(indexes):
+        pipeline.hincrby(sketch_key, f'{row}:{index}', 1)
+    pipeline.expire(sketch_key, 2 * get_setting('ADMISSION_WINDOW_SECONDS', 3600))
+
+
+def _get_sketch_indexes(cache_key, width):
+    """
+    :param cache_key: cache key of the response
+    :param width: number of counters in a row of the sketch
+    :return: list of indexes of the key's counters, one for each row
+    """
+    digest = hashlib.blake2b(cache_key.encode(), digest_size=4 * SKETCH_DEPTH).digest()
+    return [int.from_bytes(digest[row * 4:row * 4 + 4], 'big') % width for row in range(SKETCH_DEPTH)]
+
+
+def _get_window():
+    """
+    :return: number of the current window - counts are reset, when it changes
+    """
+    return int(time.time() // get_setting('ADMISSION_WINDOW_SECONDS', 3600))
+
+
+def _get_local_sketch(width, window):
+    """
+    :return: _LocalCountMinSketch of the process
+    """
+    global _local_sketch
+
+    if _local_sketch is None or _local_sketch.width != width:
+        with _local_sketch_lock:
+            if _local_sketch is None or _local_sketch.width != width:
+                _local_sketch = _LocalCountMinSketch(width, window)
+    return _local_sketch
@@ -5,4 +5,7 @@ class DRFRedisCacheDecorator(AppConfig):
     name = 'drf_redis_cache_decorator'
 
     def ready(self):
-        from .signals import invalidate_model_cache_signal
\ No newline at end of file
+        from .registry import load_model_dependencies, subscribe_to_observed_models
+        from .signals import connect_model_cache_signals
+        subscribe_to_observed_models(connect_model_cache_signals)
+        load_model_dependencies()
@@ -0,0 +1,47 @@
+import asyncio
+import weakref
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+from .utils import get_setting
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:
+    aioredis = None
+
+_connections = weakref.WeakKeyDictionary()
+
+
+def get_async_redis_connection():
+    """
+    Returns an async redis client of the running event loop (clients can't be shared between loops).
+    Client connects to DRF_REDIS_CACHE_ASYNC_REDIS_URL setting or to the location of the default cache.
+    DRF_REDIS_CACHE_ASYNC_CONNECTION_POOL_KWARGS setting is passed to its connection pool.
+    :return: redis.asyncio.Redis
+    """
+    if aioredis is None:
+        raise ImproperlyConfigured('async views require redis package with asyncio support (redis>=4.2)')
+
+    loop = asyncio.get_running_loop()
+    connection = _connections.get(loop)
+    if connection is None:
+        connection = aioredis.Redis.from_url(_get_redis_url(), **get_setting('ASYNC_CONNECTION_POOL_KWARGS', {}))
+        _connections[loop] = connection
+    return connection
+
+
+def _get_redis_url():
+    """
+    :return: url of redis used by async clients
+    """
+    redis_url = get_setting('ASYNC_REDIS_URL', None)
+    if redis_url is not None:
+        return redis_url
+
+    location = settings.CACHES['default']['LOCATION']
+    # django-redis accepts a list of servers, the first one is the master
+    if isinstance(location, (list, tuple)):
+        return location[0]
+    return location.split(',')[0]
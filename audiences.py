@@ -0,0 +1,48 @@
+import hashlib
+
+ANONYMOUS_AUDIENCE = 'anonymous'
+SUPERUSER_AUDIENCE = 'superuser'
+
+_DIGEST_SIZE = 8
+
+
+def group_audience(request):
+    """
+    Cache audience sharing cache between users, which belong to the same groups.
+    Superusers and anonymous users have their own audiences.
+    :param request: request sent by client
+    :return: audience of the request's user
+    """
+    user = request.user
+    if user.is_anonymous:
+        return ANONYMOUS_AUDIENCE
+    if user.is_superuser:
+        return SUPERUSER_AUDIENCE
+
+    group_ids = sorted(user.groups.values_list('id', flat=True))
+    return f'groups:{_get_digest(str(group_id) for group_id in group_ids)}'
+
+
+def permissions_audience(request):
+    """
+    Cache audience sharing cache between users, which have the same permissions
+    (granted directly or by their groups).
+    Superusers and anonymous users have their own audiences.
+    :param request: request sent by client
+    :return: audience of the request's user
+    """
+    user = request.user
+    if user.is_anonymous:
+        return ANONYMOUS_AUDIENCE
+    if user.is_superuser:
+        return SUPERUSER_AUDIENCE
+
+    return f'permissions:{_get_digest(sorted(user.get_all_permissions()))}'
+
+
+def _get_digest(values):
+    """
+    :param values: iterable of strings
+    :return: fixed-length digest of the values
+    """
+    return hashlib.blake2b(','.join(values).encode(), digest_size=_DIGEST_SIZE).hexdigest()
@@ -0,0 +1,350 @@
+import platform
+import statistics
+import time
+import uuid
+
+import django
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django_redis import get_redis_connection
+from redis.exceptions import ResponseError
+from rest_framework.response import Response
+from rest_framework.test import APIRequestFactory
+from rest_framework.views import APIView
+
+from .decorators import cache_it, _get_cache_payload, _get_response_dict, _load_cache_entry
+from .invalidation import execute_invalidations, _get_model_invalidation_keys
+from .key_construction import (get_base_cache_key_for_function,
+                               get_cache_key_for_decorated_function,
+                               get_model_cache_key,
+                               get_model_tag,
+                               )
+from .tags import _get_tag_set_key
+from .utils import (get_setting,
+                    get_invalidation_mode,
+                    get_key_format,
+                    CACHE_SCOPE_COLLECTION,
+                    INVALIDATION_MODE_TAGS,
+                    )
+
+BENCHMARKS_FORMAT_VERSION = 1
+
+DEFAULT_ITERATIONS = 1000
+DEFAULT_PAYLOAD_SIZES = (1024, 10240, 102400, 1048576)
+DEFAULT_KEYSPACE_SIZES = (1000, 10000, 100000)
+DEFAULT_DEPENDENT_RATIO = 0.01
+DEFAULT_INVALIDATION_REPEATS = 20
+
+POPULATE_BATCH_SIZE = 10000
+BENCHMARK_KEY_TIMEOUT = 3600
+_BENCHMARK_PREFIX = "benchmark"
+# params of results, which are measured values rather than parameters of the benchmark
+_RESULT_VALUES = ('overhead_us', 'serialized_bytes', 'stored_bytes')
+
+
+def run_benchmarks(iterations=DEFAULT_ITERATIONS,
+                   payload_sizes=DEFAULT_PAYLOAD_SIZES,
+                   keyspace_sizes=DEFAULT_KEYSPACE_SIZES,
+                   dependent_ratio=DEFAULT_DEPENDENT_RATIO,
+                   invalidation_repeats=DEFAULT_INVALIDATION_REPEATS):
+    """
+    Runs all the benchmarks against the default cache (local redis or fakeredis configured in settings).
+    Benchmarks write keys to redis and invalidate caches of the user model, so they shouldn't be run
+    against a production redis.
+    :param iterations: number of measured calls of each benchmark
+    :param payload_sizes: sizes of serialized responses in bytes
+    :param keyspace_sizes: numbers of keys in redis, for which invalidation latency is measured
+    :param dependent_ratio: part of the keyspace depending on the invalidated model
+    :param invalidation_repeats: number of measured invalidations for each keyspace size
+    :return: dict with description of the environment and list of results
+    """
+    results = [
+        *benchmark_cache_it(iterations),
+        benchmark_key_construction(iterations),
+        *benchmark_serialization(iterations, payload_sizes),
+        *benchmark_invalidation(keyspace_sizes, dependent_ratio, invalidation_repeats),
+    ]
+    return {
+        "version": BENCHMARKS_FORMAT_VERSION,
+        "environment": get_benchmark_environment(),
+        "results": results,
+    }
+
+
+def get_benchmark_environment():
+    """
+    :return: dict describing versions and settings, which affect results of benchmarks
+    """
+    try:
+        redis_version = get_redis_connection().info('server').get('redis_version')
+    except ResponseError:
+        # fakeredis doesn't implement INFO
+        redis_version = None
+
+    return {
+        "python": platform.python_version(),
+        "django": django.get_version(),
+        "redis": redis_version,
+        "serializer": get_setting('SERIALIZER', 'pickle'),
+        "compression_threshold": get_setting('COMPRESSION_THRESHOLD', None),
+        "invalidation_mode": get_invalidation_mode(),
+        # benchmark_invalidation bypasses the queue, but it changes latency of invalidations in views
+        "invalidation_queue": get_setting('INVALIDATION_QUEUE', None),
+        "key_format": get_key_format(),
+    }
+
+
+def benchmark_cache_it(iterations=DEFAULT_ITERATIONS):
+    """
+    Measures time of a request to a view decorated with cache_it on hit and on miss
+    and overhead of the decorator over the same view without cache.
+    :param iterations: number of measured requests
+    :return: list of results
+    """
+    view = _bind_view(_benchmark_view)
+    cached_view = cache_it(cache_queryparams=True)(view)
+    hit_request = _make_request()
+    miss_requests = [_make_request({'miss': index}) for index in range(iterations)]
+
+    try:
+        cached_view(hit_request)
+        baseline_durations = _measure(lambda: view(hit_request), iterations)
+        hit_durations = _measure(lambda: cached_view(hit_request), iterations)
+        miss_requests_iterator = iter(miss_requests)
+        miss_durations = _measure(lambda: cached_view(next(miss_requests_iterator)), iterations)
+    finally:
+        cache.delete_pattern(f'*{get_base_cache_key_for_function(_benchmark_view)}*')
+
+    baseline = statistics.median(baseline_durations)
+    return [
+        _get_result('view_without_cache', baseline_durations),
+        _get_result('cache_it_hit', hit_durations, overhead_us=_to_us(statistics.median(hit_durations) - baseline)),
+        _get_result('cache_it_miss', miss_durations, overhead_us=_to_us(statistics.median(miss_durations) - baseline)),
+    ]
+
+
+def benchmark_key_construction(iterations=DEFAULT_ITERATIONS):
+    """
+    Measures throughput of get_cache_key_for_decorated_function with typical options.
+    :param iterations: number of constructed keys
+    :return: result
+    """
+    view = _bind_view(_benchmark_view)
+    request = _make_request({'page': 2, 'ordering': 'name'})
+    durations = _measure(lambda: get_cache_key_for_decorated_function(view,
+                                                                      request,
+                                                                      cache_language=True,
+                                                                      cache_user=False,
+                                                                      cache_queryparams=True,
+                                                                      model_dependencies=(get_user_model(), ),
+                                                                      identifier=None,
+                                                                      cache_scope=CACHE_SCOPE_COLLECTION,
+                                                                      cache_renderer=False),
+                         iterations)
+    return _get_result('key_construction', durations)
+
+
+def benchmark_serialization(iterations=DEFAULT_ITERATIONS, payload_sizes=DEFAULT_PAYLOAD_SIZES):
+    """
+    Measures time of serialization (with compression) and deserialization of cache entries of different sizes.
+    :param iterations: number of measured calls for each size
+    :param payload_sizes: approximate sizes of the serialized responses in bytes
+    :return: list of results
+    """
+    results = []
+    for payload_size in payload_sizes:
+        response_dict = _get_response_dict(Response(_make_payload(payload_size)))
+        cache_entry, serialized_size, payload = _get_cache_payload(response_dict, 0, BENCHMARK_KEY_TIMEOUT, None, None)
+        # measurement of the largest payloads is limited, so the suite finishes in reasonable time
+        size_iterations = max(1, min(iterations, iterations * 10240 // payload_size))
+
+        dumps_durations = _measure(lambda: _get_cache_payload(response_dict, 0, BENCHMARK_KEY_TIMEOUT, None, None),
+                                   size_iterations)
+        loads_durations = _measure(lambda: _load_cache_entry(payload), size_iterations)
+        results.append(_get_result('serialization_dumps', dumps_durations, payload_size=payload_size,
+                                   serialized_bytes=serialized_size, stored_bytes=len(payload)))
+        results.append(_get_result('serialization_loads', loads_durations, payload_size=payload_size,
+                                   serialized_bytes=serialized_size, stored_bytes=len(payload)))
+    return results
+
+
+def benchmark_invalidation(keyspace_sizes=DEFAULT_KEYSPACE_SIZES,
+                           dependent_ratio=DEFAULT_DEPENDENT_RATIO,
+                           repeats=DEFAULT_INVALIDATION_REPEATS):
+    """
+    Measures latency of invalidation of all model related caches, while redis keyspace grows.
+    Part of the keyspace (dependent_ratio) depends on the invalidated model, the rest are unrelated keys.
+    Invalidations are executed directly (bypassing deferred batches and the invalidation queue),
+    dependent keys are repopulated before each of the repeats.
+    :param keyspace_sizes: numbers of keys in redis
+    :param dependent_ratio: part of the keyspace depending on the invalidated model
+    :param repeats: number of measured invalidations for each keyspace size
+    :return: list of results
+    """
+    model = get_user_model()
+    invalidation_mode = get_invalidation_mode()
+    keys_by_mode = {invalidation_mode: _get_model_invalidation_keys(invalidation_mode, model)}
+    key_prefix = f'{_BENCHMARK_PREFIX}:{uuid.uuid4().hex}:'
+    redis_connection = get_redis_connection()
+    results = []
+    unrelated_keys = 0
+
+    try:
+        for keyspace_size in sorted(keyspace_sizes):
+            dependent_keys = int(keyspace_size * dependent_ratio)
+            _populate_unrelated_keys(redis_connection, key_prefix, unrelated_keys, keyspace_size - dependent_keys)
+            unrelated_keys = keyspace_size - dependent_keys
+
+            durations = []
+            for _ in range(repeats):
+                _populate_dependent_keys(redis_connection, key_prefix, model, dependent_keys)
+                start = time.perf_counter()
+                execute_invalidations(keys_by_mode)
+                durations.append(time.perf_counter() - start)
+
+            results.append(_get_result('invalidate_model_cache', durations,
+                                       keyspace_size=keyspace_size, dependent_keys=dependent_keys))
+    finally:
+        cache.delete_pattern(f'{key_prefix}*')
+
+    return results
+
+
+def compare_benchmark_results(baseline, current, threshold=0.2):
+    """
+    Compares median durations of benchmarks with the baseline run.
+    :param baseline: output of run_benchmarks of the baseline run
+    :param current: output of run_benchmarks of the current run
+    :param threshold: allowed relative slowdown (0.2 - 20%)
+    :return: list of dicts describing regressions (benchmark, params, baseline_us, current_us, change)
+    """
+    baseline_results = {_get_result_id(result): result for result in baseline["results"]}
+    regressions = []
+
+    for result in current["results"]:
+        baseline_result = baseline_results.get(_get_result_id(result))
+        if baseline_result is None or not baseline_result["median_us"]:
+            continue
+
+        change = result["median_us"] / baseline_result["median_us"] - 1
+        if change > threshold:
+            regressions.append({
+                "benchmark": result["benchmark"],
+                "params": result["params"],
+                "baseline_us": baseline_result["median_us"],
+                "current_us": result["median_us"],
+                "change": round(change, 4),
+            })
+
+    return regressions
+
+
+def _populate_unrelated_keys(redis_connection, key_prefix, start, stop):
+    """
+    Private function saving keys, which don't depend on any benchmarked model.
+    """
+    pipeline = redis_connection.pipeline(transaction=False)
+    for index in range(start, stop):
+        pipeline.set(cache.make_key(f'{key_prefix}unrelated:{index}'), b'', ex=BENCHMARK_KEY_TIMEOUT)
+        if (index - start + 1) % POPULATE_BATCH_SIZE == 0:
+            pipeline.execute()
+    pipeline.execute()
+
+
+def _populate_dependent_keys(redis_connection, key_prefix, model, count):
+    """
+    Private function saving keys depending on the model in a way matching the invalidation mode.
+    """
+    invalidation_mode = get_invalidation_mode()
+    model_key = get_model_cache_key(model)
+    tag_key = _get_tag_set_key(get_model_tag(model))
+
+    pipeline = redis_connection.pipeline(transaction=False)
+    for index in range(count):
+        made_key = cache.make_key(f"{key_prefix}dependent:['{model_key}']:{index}")
+        pipeline.set(made_key, b'', ex=BENCHMARK_KEY_TIMEOUT)
+        if invalidation_mode == INVALIDATION_MODE_TAGS:
+            pipeline.sadd(tag_key, made_key)
+        if (index + 1) % POPULATE_BATCH_SIZE == 0:
+            pipeline.execute()
+    pipeline.execute()
+
+
+def _benchmark_view(request, *args, **kwargs):
+    return Response({'id': 1, 'name': 'benchmark', 'items': list(range(20))})
+
+
+def _bind_view(func):
+    """
+    Private function imitating the way @method_decorator passes a view to the decorator.
+    """
+
+    def bound_func(*args, **kwargs):
+        return func(*args, **kwargs)
+
+    return bound_func
+
+
+def _make_request(query_params=None):
+    """
+    :param query_params: dict of query parameters
+    :return: DRF request
+    """
+    return APIView().initialize_request(APIRequestFactory().get('/benchmark/', query_params))
+
+
+def _make_payload(payload_size):
+    """
+    :param payload_size: approximate size of the payload serialized as JSON
+    :return: list of dicts resembling serialized model instances
+    """
+    item = {'id': 0, 'name': 'benchmark item', 'description': 'x' * 40, 'active': True}
+    # an item takes about 100 bytes
+    return [dict(item, id=index) for index in range(max(1, payload_size // 100))]
+
+
+def _measure(func, iterations):
+    """
+    :param func: function to measure
+    :param iterations: number of calls
+    :return: list of durations of calls in seconds
+    """
+    durations = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func()
+        durations.append(time.perf_counter() - start)
+    return durations
+
+
+def _get_result(benchmark, durations, **params):
+    """
+    :param benchmark: name of the benchmark
+    :param durations: durations of calls in seconds
+    :param params: parameters of the benchmark and additional values
+    :return: dict with statistics of durations in microseconds
+    """
+    durations = sorted(durations)
+    median = statistics.median(durations)
+    return {
+        "benchmark": benchmark,
+        "params": params,
+        "iterations": len(durations),
+        "median_us": _to_us(median),
+        "mean_us": _to_us(statistics.mean(durations)),
+        "p95_us": _to_us(durations[min(len(durations) - 1, int(len(durations) * 0.95))]),
+        "ops_per_second": round(1 / median, 1) if median else None,
+    }
+
+
+def _get_result_id(result):
+    """
+    :return: identifier of a result, which matches results of the same benchmark in different runs
+    """
+    params = {name: value for name, value in result["params"].items() if name not in _RESULT_VALUES}
+    return result["benchmark"], tuple(sorted(params.items()))
+
+
+def _to_us(duration):
+    return round(duration * 1000000, 3)
+
@@ -0,0 +1,151 @@
+import gzip
+import zlib
+from functools import lru_cache
+
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.text import compress_string
+
+from .utils import get_setting
+
+try:
+    import lz4.frame
+except ImportError:
+    lz4 = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import brotli
+except ImportError:
+    try:
+        import brotlicffi as brotli
+    except ImportError:
+        brotli = None
+
+COMPRESSOR_ZLIB = 'zlib'
+COMPRESSOR_LZ4 = 'lz4'
+COMPRESSOR_ZSTD = 'zstd'
+
+_CODEC_ZLIB = b'z'
+_CODEC_LZ4 = b'4'
+_CODEC_ZSTD = b's'
+
+CONTENT_ENCODING_GZIP = 'gzip'
+CONTENT_ENCODING_BROTLI = 'br'
+
+# key of rendered response dict with encoding of the rendered content
+ENCODED_CONTENT_ENCODING = "content_encoding"
+# shorter content isn't worth encoding (the same limit as GZipMiddleware)
+MIN_ENCODED_CONTENT_LENGTH = 200
+
+
+def compress_payload(payload):
+    """
+    Compresses payloads bigger than DRF_REDIS_CACHE_COMPRESSION_THRESHOLD setting (in bytes, None - disabled)
+    with the compressor defined by DRF_REDIS_CACHE_COMPRESSOR setting
+    (COMPRESSOR_ZLIB, COMPRESSOR_LZ4 or COMPRESSOR_ZSTD). Default = COMPRESSOR_ZLIB.
+    The first byte of a compressed payload marks its codec, smaller payloads are left as they are.
+    :param payload: serialized entry (bytes)
+    :return: payload, compressed if it exceeds the threshold
+    """
+    threshold = get_setting('COMPRESSION_THRESHOLD', None)
+    if threshold is None or len(payload) <= threshold:
+        return payload
+
+    compressor = get_setting('COMPRESSOR', COMPRESSOR_ZLIB)
+    if compressor == COMPRESSOR_ZLIB:
+        return _CODEC_ZLIB + zlib.compress(payload)
+    if compressor == COMPRESSOR_LZ4:
+        if lz4 is None:
+            raise ImproperlyConfigured('lz4 compressor requires lz4 package')
+        return _CODEC_LZ4 + lz4.frame.compress(payload)
+    if compressor == COMPRESSOR_ZSTD:
+        if zstandard is None:
+            raise ImproperlyConfigured('zstd compressor requires zstandard package')
+        return _CODEC_ZSTD + zstandard.ZstdCompressor().compress(payload)
+
+    raise ImproperlyConfigured(f'Unknown compressor: {compressor}')
+
+
+def decompress_payload(payload):
+    """
+    Decompresses payload according to its codec byte. Uncompressed payloads are returned as they are.
+    :param payload: payload returned by compress_payload
+    :return: serialized entry (bytes)
+    """
+    codec, body = payload[:1], payload[1:]
+
+    if codec == _CODEC_ZLIB:
+        return zlib.decompress(body)
+    if codec == _CODEC_LZ4 and lz4 is not None:
+        return lz4.frame.decompress(body)
+    if codec == _CODEC_ZSTD and zstandard is not None:
+        return zstandard.ZstdDecompressor().decompress(body)
+
+    return payload
+
+
+def encode_content(content, content_encoding):
+    """
+    Compresses rendered content with HTTP content encoding, so it can be sent to clients as it is.
+    :param content: rendered content (bytes)
+    :param content_encoding: CONTENT_ENCODING_GZIP or CONTENT_ENCODING_BROTLI (requires brotli package)
+    :return: encoded content (bytes)
+    """
+    if content_encoding == CONTENT_ENCODING_GZIP:
+        return compress_string(content)
+    if content_encoding == CONTENT_ENCODING_BROTLI:
+        if brotli is None:
+            raise ImproperlyConfigured('br content encoding requires brotli package')
+        return brotli.compress(content)
+
+    raise ImproperlyConfigured(f'Unknown content encoding: {content_encoding}')
+
+
+def decode_content(content, content_encoding):
+    """
+    Decompresses content encoded by encode_content for clients, which don't accept the encoding.
+    :param content: encoded content (bytes)
+    :param content_encoding: encoding of the content
+    :return: rendered content (bytes)
+    """
+    if content_encoding == CONTENT_ENCODING_GZIP:
+        return gzip.decompress(content)
+    if content_encoding == CONTENT_ENCODING_BROTLI and brotli is not None:
+        return brotli.decompress(content)
+
+    raise ImproperlyConfigured(f'Unknown content encoding: {content_encoding}')
+
+
+def accepts_content_encoding(request, content_encoding):
+    """
+    :param request: request sent by client
+    :param content_encoding: encoding of the content
+    :return: True if Accept-Encoding header of the request allows the encoding
+    """
+    return _accepts_content_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''), content_encoding)
+
+
+@lru_cache(maxsize=256)
+def _accepts_content_encoding(accept_encoding, content_encoding):
+    """
+    :param accept_encoding: value of Accept-Encoding header
+    :param content_encoding: encoding of the content
+    :return: True if the encoding (or *) is listed with non-zero quality
+    """
+    qualities = {}
+    for item in accept_encoding.split(','):
+        name, _, parameters = item.partition(';')
+        quality = 1.0
+        parameter_name, _, value = parameters.strip().partition('=')
+        if parameter_name.strip() == 'q':
+            try:
+                quality = float(value)
+            except ValueError:
+                quality = 0.0
+        qualities[name.strip().lower()] = quality
+
+    return qualities.get(content_encoding, qualities.get('*', 0.0)) > 0
@@ -0,0 +1,181 @@
+import hashlib
+import pickle
+
+from django.core.cache import cache
+from django.http import HttpResponseNotModified
+from django.utils.cache import patch_vary_headers
+from django.utils.http import http_date, parse_etags, parse_http_date_safe
+from django_redis import get_redis_connection
+from rest_framework.status import is_success
+
+from .async_redis import get_async_redis_connection
+from .compression import accepts_content_encoding, ENCODED_CONTENT_ENCODING
+from .entries import (ENTRY_COMPUTE_TIME,
+                      ENTRY_CREATED,
+                      ENTRY_ETAG,
+                      ENTRY_HARD_EXPIRES,
+                      ENTRY_RESPONSE,
+                      ENTRY_SOFT_EXPIRES,
+                      )
+from .serializers import pack_response_dict, RENDERED_CONTENT
+
+_METADATA_PREFIX = "meta__"
+
+
+def get_etag(response_dict):
+    """
+    Creates a strong ETag from a hash of the response content, so recomputed responses
+    with the same content keep their ETag.
+    :param response_dict: dict returned by _get_response_dict or _get_rendered_response_dict
+    :return: quoted ETag
+    """
+    if RENDERED_CONTENT in response_dict:
+        content = response_dict[RENDERED_CONTENT]
+    else:
+        content = pickle.dumps(pack_response_dict(response_dict), pickle.HIGHEST_PROTOCOL)
+    return f'"{hashlib.blake2b(content, digest_size=16).hexdigest()}"'
+
+
+def get_representation_etag(etag, content_encoding, request):
+    """
+    Content encoded response and its decoded content are different representations, so each of them
+    gets its own strong ETag - the encoding is appended to ETag of the encoded one (like mod_deflate does).
+    :param etag: ETag of the cached response
+    :param content_encoding: content encoding of the cached content or None
+    :param request: request sent by client
+    :return: ETag of the representation returned to the client
+    """
+    if content_encoding is None or not accepts_content_encoding(request, content_encoding):
+        return etag
+    return f'{etag[:-1]}-{content_encoding}"'
+
+
+def get_metadata_key(cache_key):
+    """
+    :param cache_key: cache key of the response
+    :return: cache key of the response metadata (it contains the cache key, so it matches the same key patterns)
+    """
+    return f'{_METADATA_PREFIX}{cache_key}'
+
+
+def dumps_metadata(cache_entry):
+    """
+    Metadata contains the ETag, creation time, expirations, compute time and content encoding of the entry,
+    so requests answered from metadata may refresh stale entries (see _should_refresh of decorators).
+    Metadata of entries without ETag (non-2xx responses) is saved as well, so it replaces metadata
+    of the previous entry.
+    :param cache_entry: cache entry
+    :return: metadata saved next to the response (bytes)
+    """
+    soft_expires = cache_entry[ENTRY_SOFT_EXPIRES]
+    return ' '.join((cache_entry[ENTRY_ETAG] or '-',
+                     str(int(cache_entry[ENTRY_CREATED])),
+                     repr(soft_expires) if soft_expires is not None else '-',
+                     repr(cache_entry[ENTRY_HARD_EXPIRES]),
+                     repr(cache_entry[ENTRY_COMPUTE_TIME]),
+                     cache_entry[ENTRY_RESPONSE].get(ENCODED_CONTENT_ENCODING) or '-')).encode()
+
+
+def get_cached_metadata(cache_key):
+    """
+    Reads metadata of the cached response without loading the response itself.
+    :param cache_key: cache key of the response
+    :return: cache entry without the response or None
+    """
+    return _loads_metadata(get_redis_connection().get(cache.make_key(get_metadata_key(cache_key))))
+
+
+async def aget_cached_metadata(cache_key):
+    """
+    Async version of get_cached_metadata.
+    :return: cache entry without the response or None
+    """
+    return _loads_metadata(await get_async_redis_connection().get(cache.make_key(get_metadata_key(cache_key))))
+
+
+def get_validator_etag(response_dict):
+    """
+    Conditional requests are evaluated only for 2xx responses (RFC 9110 section 13.2.1),
+    so other responses don't get validators.
+    :param response_dict: dict returned by _get_response_dict or _get_rendered_response_dict
+    :return: ETag of the response or None
+    """
+    return get_etag(response_dict) if is_success(response_dict["status"]) else None
+
+
+def is_conditional_request(request):
+    """
+    :param request: request sent by client
+    :return: True if the request has If-None-Match or If-Modified-Since header
+    """
+    return 'HTTP_IF_NONE_MATCH' in request.META or 'HTTP_IF_MODIFIED_SINCE' in request.META
+
+
+def is_not_modified(request, etag, last_modified):
+    """
+    Checks conditional headers of the request. If-None-Match (weak comparison) takes precedence
+    over If-Modified-Since.
+    :param request: request sent by client
+    :param etag: ETag of the cached response
+    :param last_modified: timestamp of the cached response
+    :return: True if client's copy of the response is up to date
+    """
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if if_none_match is not None:
+        etags = parse_etags(if_none_match)
+        return '*' in etags or any(_strip_weak_prefix(client_etag) == etag for client_etag in etags)
+
+    if_modified_since = parse_http_date_safe(request.META.get('HTTP_IF_MODIFIED_SINCE'))
+    return if_modified_since is not None and int(last_modified) <= if_modified_since
+
+
+def add_conditional_headers(response, etag, last_modified, cache_control, vary_headers):
+    """
+    Adds validators and caching headers to the response.
+    :param response: response returned to the client
+    :param etag: ETag of the response
+    :param last_modified: timestamp of the response
+    :param cache_control: value of Cache-Control header or None
+    :param vary_headers: names of request headers, which the response depends on
+    :return: the response
+    """
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(int(last_modified))
+    if cache_control:
+        response['Cache-Control'] = cache_control
+    if vary_headers:
+        patch_vary_headers(response, vary_headers)
+    return response
+
+
+def get_not_modified_response(etag, last_modified, cache_control, vary_headers):
+    """
+    :return: HttpResponseNotModified with the same headers as the full response would have
+    """
+    return add_conditional_headers(HttpResponseNotModified(), etag, last_modified, cache_control, vary_headers)
+
+
+def _loads_metadata(payload):
+    """
+    :param payload: metadata saved by dumps_metadata or None
+    :return: cache entry without the response or None (metadata in an older format is treated as missing)
+    """
+    if payload is None:
+        return None
+    fields = payload.decode().split(' ')
+    if len(fields) != 6:
+        return None
+
+    etag, created, soft_expires, hard_expires, compute_time, content_encoding = fields
+    return {
+        ENTRY_ETAG: etag if etag != '-' else None,
+        ENTRY_CREATED: int(created),
+        ENTRY_SOFT_EXPIRES: float(soft_expires) if soft_expires != '-' else None,
+        ENTRY_HARD_EXPIRES: float(hard_expires),
+        ENTRY_COMPUTE_TIME: float(compute_time),
+        ENCODED_CONTENT_ENCODING: content_encoding if content_encoding != '-' else None,
+    }
+
+
+def _strip_weak_prefix(etag):
+    return etag[2:] if etag.startswith('W/') else etag
@@ -1,11 +1,87 @@
+import hashlib
 import logging
-from functools import wraps
-from inspect import signature
+import time
+from functools import partial, wraps
+from inspect import iscoroutinefunction, signature
 
+from asgiref.sync import sync_to_async
 from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.http import HttpResponse, Http404
+from django.utils.cache import patch_vary_headers
+from django_redis import get_redis_connection
+from redis.exceptions import RedisError
+from rest_framework.exceptions import APIException
+from rest_framework.renderers import BrowsableAPIRenderer
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
 
-from .key_construction import get_cache_key_for_decorated_function
+from .admission import admit_cache_key, aadmit_cache_key
+from .async_redis import get_async_redis_connection
+from .compression import (accepts_content_encoding,
+                          compress_payload,
+                          decode_content,
+                          decompress_payload,
+                          encode_content,
+                          ENCODED_CONTENT_ENCODING,
+                          MIN_ENCODED_CONTENT_LENGTH,
+                          )
+from .conditional import (add_conditional_headers,
+                          aget_cached_metadata,
+                          dumps_metadata,
+                          get_cached_metadata,
+                          get_validator_etag,
+                          get_metadata_key,
+                          get_not_modified_response,
+                          get_representation_etag,
+                          is_conditional_request,
+                          is_not_modified,
+                          )
+from .entries import (make_cache_entry,
+                      ENTRY_CREATED,
+                      ENTRY_ETAG,
+                      ENTRY_HARD_EXPIRES,
+                      is_cache_entry,
+                      is_cache_entry_stale,
+                      should_recompute_early,
+                      ENTRY_RESPONSE,
+                      )
+from .local_cache import get_local_cache
+from .locks import (get_or_compute_single_flight,
+                    refresh_in_background,
+                    aget_or_compute_single_flight,
+                    arefresh_in_background,
+                    )
+from .key_construction import (get_cache_key_for_decorated_function,
+                               get_cache_tags_for_decorated_function,
+                               get_generation_keys_for_decorated_function,
+                               aget_generations,
+                               get_view_name,
+                               register_cache_timeout,
+                               )
+from .metrics import (get_metrics_backend,
+                      increment,
+                      observe,
+                      METRIC_HITS,
+                      METRIC_MISSES,
+                      METRIC_STALE_HITS,
+                      METRIC_BYPASSES,
+                      METRIC_STORED_BYTES,
+                      METRIC_REDIS_LATENCY,
+                      METRIC_COMPUTE_TIME,
+                      )
+from .registry import register_instance_parameter, register_model_dependencies
+from .serializers import dumps_entry, loads_entry, RENDERED_CONTENT
+from .tags import set_cache_with_tags, aset_cache_with_tags
+from .utils import (CACHE_SCOPE_COLLECTION,
+                    CACHE_SCOPE_INSTANCE,
+                    INVALIDATION_MODE_GENERATION,
+                    INVALIDATION_MODE_TAGS,
+                    get_invalidation_mode,
+                    get_redis_timeout,
+                    get_setting,
+                    ignores_redis_exceptions,
+                    )
 
 logger = logging.getLogger(__name__)
 
@@ -13,11 +89,22 @@ RESPONSE_KEY_TRANSLATION = {
     "data": "data",
     "status": "status_code",
     "template_name": "template_name",
-    "headers": "_headers",
+    "headers": "headers",
     "exception": "exception",
     "content_type": "content_type",
 }
 
+CACHE_HIT = "HIT"
+CACHE_MISS = "MISS"
+CACHE_STALE = "STALE"
+CACHE_BYPASS = "BYPASS"
+
+TIMING_CACHE = "cache"
+TIMING_VIEW = "view"
+TIMING_RENDER = "render"
+
+_RESPONSE_FIELDS = tuple((name, RESPONSE_KEY_TRANSLATION.get(name, name)) for name in signature(Response).parameters)
+
 
 def cache_it(cache_expiration_minutes=60,
              instance_unique_parameter='pk',
@@ -26,10 +113,31 @@ def cache_it(cache_expiration_minutes=60,
              cache_queryparams=True,
              model_dependencies=[],
              valid_response_codes=[200, ],
-             valid_request_methods=['GET', ]):
+             valid_request_methods=['GET', ],
+             cache_scope=CACHE_SCOPE_COLLECTION,
+             stampede_protection=False,
+             stampede_lock_seconds=10,
+             stampede_wait_seconds=2,
+             cache_soft_expiration_minutes=None,
+             early_recomputation_beta=None,
+             cache_rendered=False,
+             local_cache_seconds=None,
+             max_payload_bytes=None,
+             allowed_queryparams=None,
+             ignored_queryparams=[],
+             queryparams_normalizers={},
+             cache_audience=None,
+             admission_min_compute_seconds=None,
+             admission_requests=None,
+             negative_response_codes=[404, ],
+             negative_cache_seconds=None,
+             conditional_requests=False,
+             cache_control=None,
+             content_encoding=None):
     """
     This decorator checks if there is a cached version of a view in memory - if so it returns it,
-    if not - executes the view and saves the response in cache
+    if not - executes the view and saves the response in cache.
+    Coroutine views are cached with an async redis client (see async_redis module)
     :param cache_expiration_minutes: defines time in minutes, for which cache exists
     :param instance_unique_parameter: string, representing an unique parameter,
     which should be used to idenfity an instance (such as pk, slug, etc...)
@@ -44,46 +152,982 @@ def cache_it(cache_expiration_minutes=60,
     the view should be cached. Default = [200, ]
     :param valid_request_methods: iterable, which defines request types for which
     the view should be cached. Default = ['GET', ]
+    :param cache_scope: CACHE_SCOPE_COLLECTION or CACHE_SCOPE_INSTANCE.
+    Collection-scoped cache is invalidated by any change of model dependencies.
+    Instance-scoped cache is invalidated only by changes of the instance of the first model
+    in model_dependencies identified by instance_unique_parameter (which has to be its attribute)
+    and by any change of the rest of model dependencies. Default = CACHE_SCOPE_COLLECTION
+    :param stampede_protection: defines, whether only one worker should recompute a missing cache.
+    Concurrent requests wait for its result (up to stampede_wait_seconds) instead of executing the view.
+    :param stampede_lock_seconds: time in seconds, after which the recomputation lock expires
+    :param stampede_wait_seconds: time in seconds, for which concurrent requests wait
+    for the recomputed cache, before executing the view themselves
+    :param cache_soft_expiration_minutes: defines time in minutes, after which cache is stale.
+    Stale cache is returned immediately and refreshed in a background thread,
+    until cache_expiration_minutes pass. None - cache is never stale
+    :param early_recomputation_beta: enables probabilistic early recomputation (XFetch) of cache
+    in a background thread. The longer the view computes, the earlier cache is recomputed.
+    1.0 is a reasonable value, bigger values recompute earlier. None - disabled
+    :param cache_rendered: defines, whether rendered content of the response should be cached
+    (separately for every negotiated renderer) instead of its data, so cached responses are returned
+    without rendering. Browsable API responses are never cached rendered.
+    :param local_cache_seconds: defines time in seconds, for which cache is additionally kept in memory
+    of the process (requires DRF_REDIS_CACHE_LOCAL_CACHE_MAX_BYTES setting). None - disabled
+    :param max_payload_bytes: defines maximal size of a cached (serialized and compressed) response in bytes.
+    Bigger responses are not cached. None - no limit
+    :param allowed_queryparams: iterable with names of query params, which should be considered
+    when caching (fnmatch patterns, such as 'page*', are allowed). None - all the query params
+    :param ignored_queryparams: iterable with names (or fnmatch patterns, such as 'utm_*') of query params,
+    which should never be considered when caching
+    :param queryparams_normalizers: dict mapping query param names to functions normalizing their values
+    (see queryparams module). Values normalized to None are skipped, so requests with and without them share cache
+    :param cache_audience: function mapping request to a partition key shared by several users
+    (see audiences module, e.g. group_audience). When passed, view is cached per audience instead of per user
+    and cache_user is ignored. None - disabled
+    :param admission_min_compute_seconds: defines minimal time in seconds, which the view has to take
+    to compute a response, so it's worth caching. Cheap responses are not cached. None - disabled
+    :param admission_requests: defines number of requests of a response (within
+    DRF_REDIS_CACHE_ADMISSION_WINDOW_SECONDS), after which it is cached, so one-off requests don't evict
+    frequently requested responses (see admission module). None - disabled
+    :param negative_response_codes: iterable, which defines response codes (such as 404 of a missing instance)
+    cached for negative_cache_seconds. Exceptions with these codes (e.g. Http404, NotFound) are handled
+    by DRF exception handler, so their responses are cached as well. Default = [404, ]
+    :param negative_cache_seconds: enables negative caching - defines time in seconds, for which
+    responses with negative_response_codes and empty responses with valid_response_codes are cached.
+    None - disabled, such responses are never cached
+    :param conditional_requests: defines, whether cached responses should have ETag (hash of the content)
+    and Last-Modified headers along with Cache-Control and Vary headers. Requests with matching
+    If-None-Match or If-Modified-Since headers are answered with 304 Not Modified from small metadata
+    of the cached response, without loading it.
+    :param cache_control: value of Cache-Control header of cached responses (with conditional_requests).
+    None - 'no-cache' (clients revalidate the response every time), 'private, no-cache' for views
+    cached per user or audience
+    :param content_encoding: 'gzip' or 'br' (requires brotli package) - defines, whether rendered content
+    (requires cache_rendered) should be cached already compressed with the encoding. It's sent as it is to clients
+    accepting the encoding and decompressed for the rest. None - disabled
     :return: View for requested decorator
     """
+    if content_encoding is not None and not cache_rendered:
+        raise ImproperlyConfigured('content_encoding requires cache_rendered')
+
+    model_dependencies = tuple(model_dependencies)
+    # audience replaces user in the key, so user changes don't invalidate shared cache
+    cache_user = cache_user and cache_audience is None
+    if allowed_queryparams is not None:
+        allowed_queryparams = tuple(allowed_queryparams)
+    ignored_queryparams = tuple(ignored_queryparams)
+    negative_response_codes = tuple(negative_response_codes) if negative_cache_seconds is not None else ()
+    register_model_dependencies(model_dependencies, cache_user=cache_user)
+    if cache_scope == CACHE_SCOPE_INSTANCE and model_dependencies:
+        register_instance_parameter(model_dependencies[0], instance_unique_parameter)
+
+    key_options = dict(cache_language=cache_language,
+                       cache_user=cache_user,
+                       cache_queryparams=cache_queryparams,
+                       model_dependencies=model_dependencies,
+                       cache_scope=cache_scope,
+                       cache_renderer=cache_rendered,
+                       allowed_queryparams=allowed_queryparams,
+                       ignored_queryparams=ignored_queryparams,
+                       queryparams_normalizers=queryparams_normalizers,
+                       cache_audience=cache_audience)
+    cache_expiration_time = cache_expiration_minutes * 60
+    cache_soft_expiration_time = (cache_soft_expiration_minutes * 60
+                                  if cache_soft_expiration_minutes is not None else None)
+    register_cache_timeout(max(cache_expiration_time, negative_cache_seconds or 0))
+    vary_headers = _get_vary_headers(cache_language,
+                                     cache_user or cache_audience is not None,
+                                     cache_rendered,
+                                     content_encoding is not None)
+    if cache_control is None:
+        cache_control = 'private, no-cache' if cache_user or cache_audience is not None else 'no-cache'
 
     def _method_wrapper(view_func):
-        cache_expiration_time = cache_expiration_minutes * 60
+        if iscoroutinefunction(view_func):
+            return _async_method_wrapper(view_func)
 
         @wraps(view_func)
         def wrapped(request, *args, **kwargs):
+            view_name = get_view_name(view_func) if get_metrics_backend() is not None else None
+            debug_headers = get_setting('DEBUG_HEADERS', False)
+
+            if request.method not in valid_request_methods:
+                increment(METRIC_BYPASSES, view=view_name, reason='method')
+                return _add_bypass_header(view_func(request, *args, **kwargs), debug_headers)
+
+            lookup = None
+            try:
+                lookup = get_cache_lookup(view_func, request, kwargs, view_name, debug_headers)
+                return get_cached_response(lookup, request, args, kwargs)
+            except RedisError:
+                if not should_ignore_redis_error(lookup, view_name):
+                    raise
+                return _add_bypass_header(view_func(request, *args, **kwargs), debug_headers)
+
+        def get_cached_response(lookup, request, args, kwargs):
+            """
+            Returns the response found in cache or computes and caches it.
+            :param lookup: _CacheLookup of the request
+            :return: response returned to the client
+            """
+
+            def compute_response_dict(lookup):
+                compute_start = time.perf_counter()
+                lookup.view_called = True
+                try:
+                    response = view_func(request, *args, **kwargs)
+                except (Http404, APIException) as exc:
+                    response = _get_negative_response(exc, request, negative_response_codes)
+                    if response is None:
+                        raise
+                compute_time = time.perf_counter() - compute_start
+
+                response_dict, timeout, soft_timeout = get_response_dict_to_cache(lookup, request, response,
+                                                                                  compute_time, args, kwargs)
+                if timeout is None:
+                    return response_dict
+
+                try:
+                    store_response_dict(lookup, request, response_dict, compute_time, timeout, soft_timeout)
+                except RedisError:
+                    if not should_ignore_store_error(lookup):
+                        raise
+                return response_dict
 
-            instance_identifier = kwargs.get(instance_unique_parameter, None)
+            def compute_single_flight_value(lookup):
+                response_dict = compute_response_dict(lookup)
+                return response_dict, lookup.computed_entry
 
-            cache_name = get_cache_key_for_decorated_function(view_func,
-                                                              request,
-                                                              cache_language=cache_language,
-                                                              cache_user=cache_user,
-                                                              cache_queryparams=cache_queryparams,
-                                                              model_dependencies=model_dependencies,
-                                                              identifier=instance_identifier)
-            current_cache = cache.get(cache_name)
+            if is_metadata_lookup_needed(lookup, request):
+                lookup_start = time.perf_counter()
+                metadata = get_cached_metadata(lookup.cache_name)
+                if is_not_modified_metadata(lookup, request, metadata, time.perf_counter() - lookup_start):
+                    if should_refresh(lookup):
+                        refresh_in_background(lookup.cache_name,
+                                              compute=partial(compute_response_dict, lookup.get_refresh_lookup()),
+                                              lock_timeout=stampede_lock_seconds)
+                    return get_metadata_response(lookup, request)
 
-            if current_cache:
-                response_dict = current_cache
+            if lookup.current_cache is None:
+                lookup_start = time.perf_counter()
+                cache_entry, payload_size = _get_cache_entry_with_size(lookup.cache_name)
+                set_redis_entry(lookup, cache_entry, payload_size, time.perf_counter() - lookup_start)
+
+            if lookup.current_cache is not None:
+                response_dict = get_hit_response_dict(lookup)
+                if should_refresh(lookup):
+                    refresh_in_background(lookup.cache_name,
+                                          compute=partial(compute_response_dict, lookup.get_refresh_lookup()),
+                                          lock_timeout=stampede_lock_seconds)
+
+            elif stampede_protection:
+                increment(METRIC_MISSES, view=lookup.view_name)
+                response_dict, cache_entry = get_or_compute_single_flight(
+                    lookup.cache_name,
+                    get_cached=partial(_get_single_flight_value, lookup.cache_name),
+                    compute=partial(compute_single_flight_value, lookup),
+                    lock_timeout=stampede_lock_seconds,
+                    wait_timeout=stampede_wait_seconds)
+                set_single_flight_status(lookup, cache_entry)
 
             else:
+                increment(METRIC_MISSES, view=lookup.view_name)
+                response_dict = compute_response_dict(lookup)
+
+            return get_response(lookup, request, response_dict)
 
-                response = view_func(request, *args, **kwargs)
-                response_dict = _get_response_dict(response)
+        def store_response_dict(lookup, request, response_dict, compute_time, timeout, soft_timeout):
+            """
+            Saves the computed response in cache, if it's admitted and not too big.
+            """
+            if lookup.cached_entry is None and not _is_admitted(lookup.cache_name, compute_time,
+                                                                admission_min_compute_seconds,
+                                                                admission_requests):
+                lookup.bypass('admission')
+                return
 
-                if (response.status_code in valid_response_codes
-                        and request.method in valid_request_methods
-                        and response.data):
-                    cache.set(cache_name, response_dict, cache_expiration_time)
+            cache_payload = get_cache_payload(lookup, response_dict, compute_time, timeout, soft_timeout)
+            if cache_payload is None:
+                return
+            cache_entry, serialized_size, payload, related_payloads = cache_payload
 
-            return Response(**response_dict)
+            store_start = time.perf_counter()
+            cache_tags = get_cache_tags(view_func, request, lookup)
+            if cache_tags is not None:
+                set_cache_with_tags(lookup.cache_name, payload, timeout, cache_tags, related_payloads)
+            else:
+                _set_cache_payload(lookup.cache_name, payload, timeout, related_payloads)
+            set_stored_entry(lookup, cache_entry, serialized_size, payload, timeout,
+                             time.perf_counter() - store_start)
 
         return wrapped
 
+    def _async_method_wrapper(view_func):
+
+        @wraps(view_func)
+        async def wrapped(request, *args, **kwargs):
+            view_name = get_view_name(view_func) if get_metrics_backend() is not None else None
+            debug_headers = get_setting('DEBUG_HEADERS', False)
+
+            if request.method not in valid_request_methods:
+                increment(METRIC_BYPASSES, view=view_name, reason='method')
+                return _add_bypass_header(await view_func(request, *args, **kwargs), debug_headers)
+
+            lookup = None
+            try:
+                lookup = await aget_cache_lookup(request, kwargs, view_name, debug_headers)
+                return await get_cached_response(lookup, request, args, kwargs)
+            except RedisError:
+                if not should_ignore_redis_error(lookup, view_name):
+                    raise
+                return _add_bypass_header(await view_func(request, *args, **kwargs), debug_headers)
+
+        async def aget_cache_lookup(request, kwargs, view_name, debug_headers):
+            """
+            Async version of get_cache_lookup. Generations and audience are fetched before the key is constructed.
+            :return: _CacheLookup
+            """
+            generations = None
+            if get_invalidation_mode() == INVALIDATION_MODE_GENERATION:
+                generation_keys = get_generation_keys_for_decorated_function(
+                    request,
+                    cache_user=cache_user,
+                    model_dependencies=model_dependencies,
+                    identifier=kwargs.get(instance_unique_parameter, None),
+                    cache_scope=cache_scope)
+                generations = await aget_generations(generation_keys)
+
+            # audiences (e.g. group_audience) may query the database, which isn't allowed in the event loop
+            audience = await sync_to_async(cache_audience)(request) if cache_audience is not None else None
+
+            return get_cache_lookup(view_func, request, kwargs, view_name, debug_headers,
+                                    generations=generations,
+                                    audience=audience)
+
+        async def get_cached_response(lookup, request, args, kwargs):
+            """
+            Async version of get_cached_response of the sync wrapper.
+            :return: response returned to the client
+            """
+
+            async def compute_response_dict(lookup):
+                compute_start = time.perf_counter()
+                lookup.view_called = True
+                try:
+                    response = await view_func(request, *args, **kwargs)
+                except (Http404, APIException) as exc:
+                    response = _get_negative_response(exc, request, negative_response_codes)
+                    if response is None:
+                        raise
+                compute_time = time.perf_counter() - compute_start
+
+                response_dict, timeout, soft_timeout = get_response_dict_to_cache(lookup, request, response,
+                                                                                  compute_time, args, kwargs)
+                if timeout is None:
+                    return response_dict
+
+                try:
+                    await store_response_dict(lookup, request, response_dict, compute_time, timeout, soft_timeout)
+                except RedisError:
+                    if not should_ignore_store_error(lookup):
+                        raise
+                return response_dict
+
+            async def compute_single_flight_value(lookup):
+                response_dict = await compute_response_dict(lookup)
+                return response_dict, lookup.computed_entry
+
+            async def get_single_flight_value():
+                cache_entry, unused = await _aget_cache_entry_with_size(lookup.cache_name)
+                return (cache_entry[ENTRY_RESPONSE], cache_entry) if cache_entry is not None else None
+
+            if is_metadata_lookup_needed(lookup, request):
+                lookup_start = time.perf_counter()
+                metadata = await aget_cached_metadata(lookup.cache_name)
+                if is_not_modified_metadata(lookup, request, metadata, time.perf_counter() - lookup_start):
+                    if should_refresh(lookup):
+                        await arefresh_in_background(lookup.cache_name,
+                                                     compute=partial(compute_response_dict,
+                                                                     lookup.get_refresh_lookup()),
+                                                     lock_timeout=stampede_lock_seconds)
+                    return get_metadata_response(lookup, request)
+
+            if lookup.current_cache is None:
+                lookup_start = time.perf_counter()
+                cache_entry, payload_size = await _aget_cache_entry_with_size(lookup.cache_name)
+                set_redis_entry(lookup, cache_entry, payload_size, time.perf_counter() - lookup_start)
+
+            if lookup.current_cache is not None:
+                response_dict = get_hit_response_dict(lookup)
+                if should_refresh(lookup):
+                    await arefresh_in_background(lookup.cache_name,
+                                                 compute=partial(compute_response_dict, lookup.get_refresh_lookup()),
+                                                 lock_timeout=stampede_lock_seconds)
+
+            elif stampede_protection:
+                increment(METRIC_MISSES, view=lookup.view_name)
+                response_dict, cache_entry = await aget_or_compute_single_flight(
+                    lookup.cache_name,
+                    get_cached=get_single_flight_value,
+                    compute=partial(compute_single_flight_value, lookup),
+                    lock_timeout=stampede_lock_seconds,
+                    wait_timeout=stampede_wait_seconds)
+                set_single_flight_status(lookup, cache_entry)
+
+            else:
+                increment(METRIC_MISSES, view=lookup.view_name)
+                response_dict = await compute_response_dict(lookup)
+
+            return get_response(lookup, request, response_dict)
+
+        async def store_response_dict(lookup, request, response_dict, compute_time, timeout, soft_timeout):
+            """
+            Async version of store_response_dict of the sync wrapper.
+            """
+            if lookup.cached_entry is None and not await _ais_admitted(lookup.cache_name, compute_time,
+                                                                       admission_min_compute_seconds,
+                                                                       admission_requests):
+                lookup.bypass('admission')
+                return
+
+            cache_payload = get_cache_payload(lookup, response_dict, compute_time, timeout, soft_timeout)
+            if cache_payload is None:
+                return
+            cache_entry, serialized_size, payload, related_payloads = cache_payload
+
+            store_start = time.perf_counter()
+            cache_tags = get_cache_tags(view_func, request, lookup)
+            if cache_tags is not None:
+                await aset_cache_with_tags(lookup.cache_name, payload, timeout, cache_tags, related_payloads)
+            else:
+                await _aset_cache_payload(lookup.cache_name, payload, timeout, related_payloads)
+            set_stored_entry(lookup, cache_entry, serialized_size, payload, timeout,
+                             time.perf_counter() - store_start)
+
+        return wrapped
+
+    # The functions below are shared by the sync and the async wrapper, which differ only in I/O calls.
+
+    def get_cache_lookup(view_func, request, kwargs, view_name, debug_headers, generations=None, audience=None):
+        """
+        Creates the state of a cached request and looks the entry up in the local cache.
+        Stale local entries are skipped, so they are refreshed only if the entry in redis is stale as well.
+        :param generations: generations fetched by the async wrapper. None - fetched by key construction
+        :param audience: audience resolved by the async wrapper. None - resolved by key construction
+        :return: _CacheLookup
+        """
+        identifier = kwargs.get(instance_unique_parameter, None)
+        cache_name = get_cache_key_for_decorated_function(view_func,
+                                                          request,
+                                                          identifier=identifier,
+                                                          generations=generations,
+                                                          audience=audience,
+                                                          **key_options)
+        lookup = _CacheLookup(view_name, cache_name, identifier, debug_headers)
+        if local_cache_seconds is not None:
+            lookup.local_cache = get_local_cache()
+        if lookup.local_cache is not None:
+            local_entry = lookup.local_cache.get(cache_name)
+            # stale local copy may have been refreshed by another process already, so it's looked up in redis
+            if local_entry is not None and not _should_refresh(local_entry, early_recomputation_beta):
+                lookup.current_cache = local_entry
+        return lookup
+
+    def should_ignore_redis_error(lookup, view_name):
+        """
+        Decides, whether the view should be executed without cache, because redis failed
+        (with IGNORE_EXCEPTIONS option of django-redis, like cache.get and cache.set would ignore the error).
+        Errors raised, after the view has been executed (e.g. by the view itself), are never ignored,
+        so the view isn't executed twice.
+        :param lookup: _CacheLookup of the request or None, if redis failed before it was created
+        :param view_name: label of metrics of the view
+        :return: True if the error should be ignored
+        """
+        if not ignores_redis_exceptions() or (lookup is not None and lookup.view_called):
+            return False
+        logger.warning('Cache is bypassed, because redis failed', exc_info=True)
+        increment(METRIC_BYPASSES, view=view_name, reason='error')
+        return True
+
+    def should_ignore_store_error(lookup):
+        """
+        Decides, whether the computed response should be returned, although it couldn't be cached,
+        because redis failed (with IGNORE_EXCEPTIONS option of django-redis).
+        :return: True if the error should be ignored
+        """
+        if not ignores_redis_exceptions():
+            return False
+        logger.warning('Response is not cached, because redis failed', exc_info=True)
+        lookup.bypass('error')
+        return True
+
+    def is_metadata_lookup_needed(lookup, request):
+        """
+        :return: True if a conditional request may be answered from metadata of the entry (without loading it)
+        """
+        return lookup.current_cache is None and conditional_requests and is_conditional_request(request)
+
+    def is_not_modified_metadata(lookup, request, metadata, lookup_time):
+        """
+        Records metadata read from cache and checks, whether the client's copy of the response is up to date.
+        :param metadata: cache entry without the response (see get_cached_metadata) or None
+        :param lookup_time: duration of the metadata lookup in seconds
+        :return: True if the request may be answered with 304 from metadata
+        """
+        lookup.timings[TIMING_CACHE] = lookup_time
+        if metadata is None or metadata[ENTRY_ETAG] is None:
+            return False
+        etag = get_representation_etag(metadata[ENTRY_ETAG], metadata[ENCODED_CONTENT_ENCODING], request)
+        if not is_not_modified(request, etag, metadata[ENTRY_CREATED]):
+            return False
+
+        lookup.metadata = metadata
+        lookup.cache_status = CACHE_HIT
+        increment(METRIC_HITS, view=lookup.view_name, tier='metadata')
+        return True
+
+    def get_metadata_response(lookup, request):
+        """
+        :return: 304 response built from metadata of the entry
+        """
+        metadata = lookup.metadata
+        etag = get_representation_etag(metadata[ENTRY_ETAG], metadata[ENCODED_CONTENT_ENCODING], request)
+        response = get_not_modified_response(etag, metadata[ENTRY_CREATED], cache_control, vary_headers)
+        if lookup.debug_headers:
+            _add_debug_headers(response, lookup.cache_status, lookup.cache_name, lookup.metadata, lookup.timings)
+        return response
+
+    def set_redis_entry(lookup, cache_entry, payload_size, lookup_time):
+        """
+        Records the entry read from redis (or None) and promotes it to the local cache.
+        :param lookup_time: duration of the redis lookup in seconds
+        """
+        lookup.cache_tier = 'redis'
+        lookup.current_cache = cache_entry
+        lookup.timings[TIMING_CACHE] = lookup.timings.get(TIMING_CACHE, 0) + lookup_time
+        observe(METRIC_REDIS_LATENCY, lookup.timings[TIMING_CACHE], view=lookup.view_name, operation='get')
+        if cache_entry is not None and lookup.local_cache is not None:
+            _add_to_local_cache(lookup.local_cache, lookup.cache_name, cache_entry, local_cache_seconds, payload_size)
+
+    def get_response_dict_to_cache(lookup, request, response, compute_time, args, kwargs):
+        """
+        Renders (and encodes) the response computed by the view and decides, for how long it's cached.
+        :param response: response returned by the view (or by the exception handler)
+        :param compute_time: time in seconds, which the view took to compute the response
+        :return: tuple (response dict, timeout, soft timeout). Timeout is None, if the response isn't cached
+        """
+        lookup.timings[TIMING_VIEW] = compute_time
+        observe(METRIC_COMPUTE_TIME, compute_time, view=lookup.view_name)
+
+        render_start = time.perf_counter()
+        response_dict = _get_response_dict_to_cache(response, request, cache_rendered, *args, **kwargs)
+        if RENDERED_CONTENT in response_dict:
+            if content_encoding is not None:
+                response_dict = _get_encoded_response_dict(response_dict, content_encoding)
+            lookup.timings[TIMING_RENDER] = time.perf_counter() - render_start
+
+        if response.status_code in valid_response_codes and response.data:
+            return response_dict, cache_expiration_time, cache_soft_expiration_time
+        if (response.status_code in negative_response_codes
+                or (response.status_code in valid_response_codes and negative_cache_seconds is not None)):
+            return response_dict, negative_cache_seconds, None
+
+        lookup.bypass('status')
+        return response_dict, None, None
+
+    def get_cache_payload(lookup, response_dict, compute_time, timeout, soft_timeout):
+        """
+        Creates the cache entry, its payload and payloads saved along with it (metadata of conditional requests).
+        :return: tuple (cache entry, size of the serialized entry, payload, related payloads or None)
+        or None, if the payload is too big
+        """
+        cache_payload = _get_cache_payload(response_dict,
+                                           compute_time=compute_time,
+                                           timeout=timeout,
+                                           soft_timeout=soft_timeout,
+                                           max_payload_bytes=max_payload_bytes,
+                                           etag=get_validator_etag(response_dict) if conditional_requests else None)
+        if cache_payload is None:
+            lookup.bypass('size')
+            return None
+
+        cache_entry, serialized_size, payload = cache_payload
+        related_payloads = None
+        if conditional_requests:
+            related_payloads = {get_metadata_key(lookup.cache_name): dumps_metadata(cache_entry)}
+        return cache_entry, serialized_size, payload, related_payloads
+
+    def get_cache_tags(view_func, request, lookup):
+        """
+        :return: tags of the entry (INVALIDATION_MODE_TAGS) or None
+        """
+        if get_invalidation_mode() != INVALIDATION_MODE_TAGS:
+            return None
+        return get_cache_tags_for_decorated_function(view_func,
+                                                     request,
+                                                     cache_user=cache_user,
+                                                     model_dependencies=model_dependencies,
+                                                     identifier=lookup.identifier,
+                                                     cache_scope=cache_scope)
+
+    def set_stored_entry(lookup, cache_entry, serialized_size, payload, timeout, store_time):
+        """
+        Records the entry saved in redis and saves it in the local cache.
+        :param store_time: duration of the redis write in seconds
+        """
+        observe(METRIC_REDIS_LATENCY, store_time, view=lookup.view_name, operation='set')
+        observe(METRIC_STORED_BYTES, len(payload), view=lookup.view_name)
+        if lookup.local_cache is not None:
+            lookup.local_cache.set(lookup.cache_name, cache_entry, min(local_cache_seconds, timeout),
+                                   size=serialized_size)
+        lookup.computed_entry = cache_entry
+
+    def get_hit_response_dict(lookup):
+        """
+        :return: response dict of the entry found in cache
+        """
+        lookup.cache_status = CACHE_HIT
+        increment(METRIC_HITS, view=lookup.view_name, tier=lookup.cache_tier)
+        return lookup.current_cache[ENTRY_RESPONSE]
+
+    def should_refresh(lookup):
+        """
+        :return: True if the entry (or its metadata) found in cache should be refreshed in background
+        """
+        if not _should_refresh(lookup.cached_entry, early_recomputation_beta):
+            return False
+        lookup.cache_status = CACHE_STALE
+        increment(METRIC_STALE_HITS, view=lookup.view_name)
+        return True
+
+    def set_single_flight_status(lookup, cache_entry):
+        """
+        Records the entry computed by another worker as found in cache, so the response gets its validators.
+        :param cache_entry: entry computed by single-flight recomputation or None, if it isn't cached
+        """
+        if TIMING_VIEW not in lookup.timings:
+            # response computed by another worker
+            lookup.cache_status = CACHE_HIT
+            lookup.current_cache = cache_entry
+
+    def get_response(lookup, request, response_dict):
+        """
+        Builds the response (or 304) with conditional and debug headers.
+        :return: response returned to the client
+        """
+        served_entry = lookup.current_cache if lookup.current_cache is not None else lookup.computed_entry
+        if conditional_requests and served_entry is not None and served_entry.get(ENTRY_ETAG) is not None:
+            etag = get_representation_etag(served_entry[ENTRY_ETAG],
+                                           served_entry[ENTRY_RESPONSE].get(ENCODED_CONTENT_ENCODING),
+                                           request)
+            last_modified = served_entry[ENTRY_CREATED]
+            if is_not_modified(request, etag, last_modified):
+                response = get_not_modified_response(etag, last_modified, cache_control, vary_headers)
+            else:
+                response = add_conditional_headers(_build_response(response_dict, request),
+                                                   etag, last_modified, cache_control, vary_headers)
+        else:
+            response = _build_response(response_dict, request)
+
+        if lookup.debug_headers:
+            _add_debug_headers(response, lookup.cache_status, lookup.cache_name, lookup.current_cache, lookup.timings)
+        return response
+
     return _method_wrapper
 
 
+class _CacheLookup:
+    """
+    State of a request to a cached view shared by the functions of the sync and the async wrapper.
+    """
+
+    def __init__(self, view_name, cache_name, identifier, debug_headers):
+        self.view_name = view_name
+        self.cache_name = cache_name
+        self.identifier = identifier
+        self.debug_headers = debug_headers
+        self.local_cache = None
+        self.current_cache = None
+        self.metadata = None
+        self.cache_tier = 'local'
+        self.cache_status = CACHE_MISS
+        self.computed_entry = None
+        self.view_called = False
+        self.timings = {}
+
+    @property
+    def cached_entry(self):
+        """
+        :return: entry found in cache, metadata of the entry (conditional requests) or None
+        """
+        return self.current_cache if self.current_cache is not None else self.metadata
+
+    def get_refresh_lookup(self):
+        """
+        :return: _CacheLookup of a background refresh of the entry, so the refresh doesn't change
+        the cache status and timings of the response served meanwhile
+        """
+        refresh_lookup = _CacheLookup(self.view_name, self.cache_name, self.identifier, debug_headers=False)
+        refresh_lookup.local_cache = self.local_cache
+        refresh_lookup.current_cache = self.current_cache
+        refresh_lookup.metadata = self.metadata
+        return refresh_lookup
+
+    def bypass(self, reason):
+        """
+        Records, that the computed response isn't cached.
+        :param reason: reason label of the bypass metric
+        """
+        self.cache_status = CACHE_BYPASS
+        increment(METRIC_BYPASSES, view=self.view_name, reason=reason)
+
+
+def _add_bypass_header(response, debug_headers):
+    """
+    Private function marking response of a request, which bypasses cache (with DRF_REDIS_CACHE_DEBUG_HEADERS).
+    :return: the response
+    """
+    if debug_headers:
+        response["X-Cache"] = CACHE_BYPASS
+    return response
+
+
+def _get_vary_headers(cache_language, cache_per_user, cache_rendered, content_encoded=False):
+    """
+    Private function listing request headers, which cached responses depend on.
+    :param cache_language: defines, whether the view is cached per language
+    :param cache_per_user: defines, whether the view is cached per user or audience
+    :param cache_rendered: defines, whether the view is cached per negotiated renderer
+    :param content_encoded: defines, whether rendered content is cached encoded (see content_encoding of cache_it)
+    :return: tuple of header names
+    """
+    vary_headers = []
+    if cache_rendered:
+        vary_headers.append('Accept')
+    if content_encoded:
+        vary_headers.append('Accept-Encoding')
+    if cache_language:
+        vary_headers.append('Accept-Language')
+    if cache_per_user:
+        vary_headers.extend(('Authorization', 'Cookie'))
+    return tuple(vary_headers)
+
+
+def _add_debug_headers(response, cache_status, cache_name, cache_entry, timings):
+    """
+    Private function adding headers with cache status, key digest, age of the entry and timings
+    (enabled by DRF_REDIS_CACHE_DEBUG_HEADERS setting).
+    :param response: response returned to the client
+    :param cache_status: CACHE_HIT, CACHE_MISS, CACHE_STALE or CACHE_BYPASS
+    :param cache_name: cache key
+    :param cache_entry: cache entry, which has been found in cache or None
+    :param timings: dict mapping TIMING_CACHE, TIMING_VIEW and TIMING_RENDER to durations in seconds
+    """
+    response["X-Cache"] = cache_status
+    response["X-Cache-Key"] = hashlib.blake2b(cache_name.encode(), digest_size=8).hexdigest()
+    if cache_entry and cache_status != CACHE_MISS:
+        response["X-Cache-Age"] = str(int(time.time() - cache_entry[ENTRY_CREATED]))
+    if timings:
+        response["Server-Timing"] = ', '.join(f'{name};dur={duration * 1000:.3f}' for name, duration in timings.items())
+
+
+def _is_admitted(cache_name, compute_time, admission_min_compute_seconds, admission_requests):
+    """
+    Private function checking admission policies of a new cache entry.
+    :param cache_name: cache key
+    :param compute_time: time in seconds, which the view took to compute the response
+    :param admission_min_compute_seconds: minimal compute time of cached responses or None
+    :param admission_requests: number of requests, after which responses are cached, or None
+    :return: True if the response should be cached
+    """
+    if admission_min_compute_seconds is not None and compute_time < admission_min_compute_seconds:
+        return False
+    return admission_requests is None or admit_cache_key(cache_name, admission_requests)
+
+
+async def _ais_admitted(cache_name, compute_time, admission_min_compute_seconds, admission_requests):
+    """
+    Async version of _is_admitted.
+    :return: True if the response should be cached
+    """
+    if admission_min_compute_seconds is not None and compute_time < admission_min_compute_seconds:
+        return False
+    return admission_requests is None or await aadmit_cache_key(cache_name, admission_requests)
+
+
+def _add_to_local_cache(local_cache, cache_name, cache_entry, local_cache_seconds, size):
+    """
+    Private function promoting entry read from redis to the local cache.
+    The entry is kept locally no longer than its remaining hard timeout.
+    :param local_cache: LocalCache of the process
+    :param cache_name: cache key
+    :param cache_entry: cache entry
+    :param local_cache_seconds: time in seconds, for which cache is kept in memory
+    :param size: size of the entry's payload in bytes
+    """
+    timeout = min(local_cache_seconds, cache_entry[ENTRY_HARD_EXPIRES] - time.time())
+    if timeout > 0:
+        local_cache.set(cache_name, cache_entry, timeout, size=size)
+
+
+def _should_refresh(cache_entry, early_recomputation_beta):
+    """
+    Private function checking, whether cached entry should be refreshed in background.
+    :param cache_entry: cache entry
+    :param early_recomputation_beta: beta of XFetch or None
+    :return: True if the entry is stale or should be recomputed early
+    """
+    return (is_cache_entry_stale(cache_entry)
+            or (early_recomputation_beta is not None
+                and should_recompute_early(cache_entry, early_recomputation_beta)))
+
+
+def _get_response_dict_to_cache(response, request, cache_rendered, *args, **kwargs):
+    """
+    Private function creating response dict, which is cached and used to build the response.
+    :param response: response returned by the view
+    :param request: request sent by client
+    :param cache_rendered: defines, whether rendered content should be cached
+    :return: response dict
+    """
+    if cache_rendered and _can_be_rendered(request):
+        return _get_rendered_response_dict(response, request, *args, **kwargs)
+    return _get_response_dict(response)
+
+
+def _get_cache_payload(response_dict, compute_time, timeout, soft_timeout, max_payload_bytes, etag=None):
+    """
+    Private function creating cache entry and its serialized (and compressed) payload.
+    :param response_dict: response dict to cache
+    :param compute_time: time in seconds, which the view took to compute the response
+    :param timeout: hard timeout of the entry in seconds
+    :param soft_timeout: soft timeout of the entry in seconds or None
+    :param max_payload_bytes: maximal size of the payload or None
+    :param etag: ETag of the response or None
+    :return: tuple (cache entry, size of the serialized entry, payload) or None, if payload is too big
+    """
+    cache_entry = make_cache_entry(response_dict,
+                                   compute_time=compute_time,
+                                   timeout=timeout,
+                                   soft_timeout=soft_timeout,
+                                   etag=etag)
+    serialized_entry = dumps_entry(cache_entry)
+    payload = compress_payload(serialized_entry)
+
+    if max_payload_bytes is not None and len(payload) > max_payload_bytes:
+        return None
+    return cache_entry, len(serialized_entry), payload
+
+
+def _set_cache_payload(cache_name, payload, timeout, related_payloads=None):
+    """
+    Private function saving payload of the cache entry (along with related payloads in a single pipeline).
+    :param cache_name: cache key
+    :param payload: serialized cache entry
+    :param timeout: timeout in seconds
+    :param related_payloads: dict mapping cache keys to payloads saved with the same timeout or None.
+    Timeouts shorter than a second aren't accepted by redis, so the keys are deleted instead (like cache.set does).
+    """
+    timeout = get_redis_timeout(timeout)
+    if timeout <= 0:
+        get_redis_connection().unlink(cache.make_key(cache_name), *map(cache.make_key, related_payloads or ()))
+        return
+    if not related_payloads:
+        get_redis_connection().set(cache.make_key(cache_name), payload, ex=timeout)
+        return
+
+    pipeline = get_redis_connection().pipeline(transaction=False)
+    pipeline.set(cache.make_key(cache_name), payload, ex=timeout)
+    for related_key, related_payload in related_payloads.items():
+        pipeline.set(cache.make_key(related_key), related_payload, ex=timeout)
+    pipeline.execute()
+
+
+async def _aset_cache_payload(cache_name, payload, timeout, related_payloads=None):
+    """
+    Async version of _set_cache_payload.
+    """
+    timeout = get_redis_timeout(timeout)
+    if timeout <= 0:
+        await get_async_redis_connection().unlink(cache.make_key(cache_name),
+                                                  *map(cache.make_key, related_payloads or ()))
+        return
+    if not related_payloads:
+        await get_async_redis_connection().set(cache.make_key(cache_name), payload, ex=timeout)
+        return
+
+    pipeline = get_async_redis_connection().pipeline(transaction=False)
+    pipeline.set(cache.make_key(cache_name), payload, ex=timeout)
+    for related_key, related_payload in related_payloads.items():
+        pipeline.set(cache.make_key(related_key), related_payload, ex=timeout)
+    await pipeline.execute()
+
+
+def _get_cache_entry(cache_name):
+    """
+    Private function returning cache entry saved under the cache key.
+    Values saved in other formats (for example by older versions) are treated as missing.
+    :param cache_name: cache key
+    :return: cache entry or None
+    """
+    return _get_cache_entry_with_size(cache_name)[0]
+
+
+def _get_cache_entry_with_size(cache_name):
+    """
+    Private function returning cache entry saved under the cache key and the size of its payload.
+    :param cache_name: cache key
+    :return: tuple (cache entry or None, size of the decompressed payload in bytes)
+    """
+    payload = get_redis_connection().get(cache.make_key(cache_name))
+    return _load_cache_entry(payload)
+
+
+async def _aget_cache_entry_with_size(cache_name):
+    """
+    Async version of _get_cache_entry_with_size.
+    :param cache_name: cache key
+    :return: tuple (cache entry or None, size of the decompressed payload in bytes)
+    """
+    payload = await get_async_redis_connection().get(cache.make_key(cache_name))
+    return _load_cache_entry(payload)
+
+
+def _load_cache_entry(payload):
+    """
+    Private function deserializing payload read from redis.
+    :param payload: payload or None
+    :return: tuple (cache entry or None, size of the decompressed payload in bytes)
+    """
+    if payload is None:
+        return None, 0
+
+    serialized_entry = decompress_payload(payload)
+    current_cache = loads_entry(serialized_entry)
+    return (current_cache if is_cache_entry(current_cache) else None), len(serialized_entry)
+
+
+def _get_single_flight_value(cache_name):
+    """
+    Private function returning cached value of single-flight recomputation.
+    :param cache_name: cache key
+    :return: tuple (response dict, cache entry) or None
+    """
+    cache_entry = _get_cache_entry(cache_name)
+    return (cache_entry[ENTRY_RESPONSE], cache_entry) if cache_entry is not None else None
+
+
+def _get_negative_response(exc, request, negative_response_codes):
+    """
+    Private function handling an exception raised by the view with DRF exception handler,
+    if its status code is negatively cached.
+    :param exc: Http404 or APIException raised by the view
+    :param request: request sent by client
+    :param negative_response_codes: negatively cached response codes
+    :return: response or None, if the exception shouldn't be handled
+    :raises: exc, if the exception handler doesn't handle it
+    """
+    status_code = 404 if isinstance(exc, Http404) else exc.status_code
+    if status_code not in negative_response_codes:
+        return None
+
+    view = request.parser_context.get("view")
+    context = {
+        "view": view,
+        "args": getattr(view, "args", ()),
+        "kwargs": getattr(view, "kwargs", {}),
+        "request": request,
+    }
+    response = api_settings.EXCEPTION_HANDLER(exc, context)
+    if response is None:
+        raise exc
+    return response
+
+
+def _build_response(response_dict, request=None):
+    """
+    Private function creating a response from response dict.
+    Rendered content is returned as HttpResponse, so it isn't rendered again.
+    Encoded content is decompressed, unless the request accepts its encoding.
+    :param response_dict: dict returned by _get_response_dict or _get_rendered_response_dict
+    :param request: request sent by client
+    :return: response
+    """
+    if RENDERED_CONTENT not in response_dict:
+        return Response(**response_dict)
+
+    content = response_dict[RENDERED_CONTENT]
+    content_encoding = response_dict.get(ENCODED_CONTENT_ENCODING)
+    if content_encoding is not None and (request is None or not accepts_content_encoding(request, content_encoding)):
+        content = decode_content(content, content_encoding)
+
+    response = HttpResponse(content,
+                            status=response_dict["status"],
+                            content_type=response_dict["content_type"])
+    for name, value in response_dict["headers"]:
+        response[name] = value
+
+    if content_encoding is not None:
+        if content is response_dict[RENDERED_CONTENT]:
+            response["Content-Encoding"] = content_encoding
+        patch_vary_headers(response, ('Accept-Encoding', ))
+    return response
+
+
+def _get_encoded_response_dict(response_dict, content_encoding):
+    """
+    Private function compressing rendered content with HTTP content encoding.
+    Short content, content encoded by the view and content, which doesn't get smaller, is left as it is.
+    :param response_dict: dict returned by _get_rendered_response_dict
+    :param content_encoding: CONTENT_ENCODING_GZIP or CONTENT_ENCODING_BROTLI
+    :return: response dict with encoded content
+    """
+    content = response_dict[RENDERED_CONTENT]
+    if (len(content) < MIN_ENCODED_CONTENT_LENGTH
+            or any(name.lower() == 'content-encoding' for name, value in response_dict["headers"])):
+        return response_dict
+
+    encoded_content = encode_content(content, content_encoding)
+    if len(encoded_content) >= len(content):
+        return response_dict
+    return {**response_dict, RENDERED_CONTENT: encoded_content, ENCODED_CONTENT_ENCODING: content_encoding}
+
+
+def _can_be_rendered(request):
+    """
+    Private function checking, whether the response to the request may be cached rendered.
+    :param request: request sent by client
+    :return: True if the negotiated renderer isn't browsable API
+    """
+    accepted_renderer = getattr(request, "accepted_renderer", None)
+    return accepted_renderer is not None and not isinstance(accepted_renderer, BrowsableAPIRenderer)
+
+
+def _get_rendered_response_dict(response, request, *args, **kwargs):
+    """
+    Private function rendering the response with the renderer negotiated by the view.
+    :param response: response returned by the view
+    :param request: request sent by client
+    :return: dict with rendered content, status, content type and headers
+    """
+    response.accepted_renderer = request.accepted_renderer
+    response.accepted_media_type = request.accepted_media_type
+    response.renderer_context = {
+        "view": request.parser_context.get("view"),
+        "args": args,
+        "kwargs": kwargs,
+        "request": request,
+    }
+    response.render()
+
+    return {
+        RENDERED_CONTENT: response.content,
+        "status": response.status_code,
+        "content_type": response["Content-Type"],
+        "headers": [(name, value) for name, value in response.items() if name != "Content-Type"],
+    }
+
+
 def _get_response_dict(response):
     """
     Private function responsible for translation of response argument keys,
@@ -91,11 +1135,4 @@ def _get_response_dict(response):
     :param response:
     :return:
     """
-    response_dict = dict()
-    response_signature = signature(Response)
-
-    for name in response_signature.parameters.keys():
-        translated_key = RESPONSE_KEY_TRANSLATION.get(name, name)
-        response_dict[name] = getattr(response, translated_key)
-
-    return response_dict
+    return {name: getattr(response, translated_key) for name, translated_key in _RESPONSE_FIELDS}
@@ -0,0 +1,62 @@
+import math
+import random
+import time
+
+ENTRY_RESPONSE = "response"
+ENTRY_CREATED = "created"
+ENTRY_SOFT_EXPIRES = "soft_expires"
+ENTRY_HARD_EXPIRES = "hard_expires"
+ENTRY_COMPUTE_TIME = "compute_time"
+ENTRY_ETAG = "etag"
+
+
+def make_cache_entry(response_dict, compute_time, timeout, soft_timeout=None, etag=None):
+    """
+    Wraps response dict with the metadata needed to decide, when the entry should be refreshed.
+    :param response_dict: response dict returned by _get_response_dict
+    :param compute_time: time in seconds, which the view took to compute the response
+    :param timeout: hard timeout in seconds, after which the entry disappears from cache
+    :param soft_timeout: timeout in seconds, after which the entry is stale. None - entry is never stale
+    :param etag: ETag of the response or None
+    :return: cache entry
+    """
+    created = time.time()
+    return {
+        ENTRY_RESPONSE: response_dict,
+        ENTRY_CREATED: created,
+        ENTRY_SOFT_EXPIRES: created + soft_timeout if soft_timeout is not None else None,
+        ENTRY_HARD_EXPIRES: created + timeout,
+        ENTRY_COMPUTE_TIME: compute_time,
+        ENTRY_ETAG: etag,
+    }
+
+
+def is_cache_entry(value):
+    """
+    :param value: value read from cache
+    :return: True if value is a cache entry (entries saved by older versions are plain response dicts)
+    """
+    return isinstance(value, dict) and ENTRY_RESPONSE in value and ENTRY_CREATED in value
+
+
+def is_cache_entry_stale(entry):
+    """
+    :param entry: cache entry
+    :return: True if the entry's soft timeout has passed
+    """
+    soft_expires = entry[ENTRY_SOFT_EXPIRES]
+    return soft_expires is not None and time.time() >= soft_expires
+
+
+def should_recompute_early(entry, beta):
+    """
+    Probabilistic early expiration (XFetch). The closer the entry is to its expiration
+    and the longer the view takes to compute, the more probable the recomputation is.
+    :param entry: cache entry
+    :param beta: defines eagerness of the recomputation (1.0 is optimal, bigger values recompute earlier)
+    :return: True if the entry should be recomputed now
+    """
+    expires = entry[ENTRY_SOFT_EXPIRES] or entry[ENTRY_HARD_EXPIRES]
+    # 1.0 - random() is in (0, 1], so the logarithm is always defined
+    delta = entry[ENTRY_COMPUTE_TIME] * beta * -math.log(1.0 - random.random())
+    return time.time() + delta >= expires
@@ -1,6 +1,96 @@
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+
 from django.core.cache import cache
+from django.db import transaction
+from django_redis import get_redis_connection
+
+from .key_construction import (get_user_cache_key,
+                               get_model_cache_key,
+                               get_instance_cache_key,
+                               get_collection_cache_pattern,
+                               get_model_generation_key,
+                               get_collection_generation_key,
+                               get_instance_generation_key,
+                               get_user_generation_key,
+                               get_view_tag,
+                               get_model_tag,
+                               get_collection_tag,
+                               get_instance_tag,
+                               get_user_tag,
+                               get_invalidation_target,
+                               add_generation_seeds,
+                               get_generation_timeout,
+                               )
+from .invalidation_queue import enqueue_invalidations
+from .local_cache import publish_invalidation
+from .metrics import get_metrics_backend, increment, METRIC_INVALIDATIONS
+from .registry import get_instance_parameters
+from .tags import invalidate_tags
+from .utils import get_setting, get_invalidation_mode, INVALIDATION_MODE_GENERATION, INVALIDATION_MODE_TAGS
+
+_state = threading.local()
+
+
+class _InvalidationBatch:
+    """
+    Collects invalidations (de-duplicated per invalidation mode), so they are executed at once.
+    """
+
+    def __init__(self):
+        self.keys = defaultdict(set)
+        self.commit_hooks = None
+        self.flushed = False
+
+    def add(self, invalidation_mode, keys):
+        self.keys[invalidation_mode].update(keys)
+
+    def flush(self):
+        self.flushed = True
+        keys, self.keys = self.keys, defaultdict(set)
+        if keys:
+            _dispatch_invalidations(keys)
+
+
+@contextmanager
+def defer_invalidation():
+    """
+    Suspends invalidation within the block. All the invalidations requested in the block are de-duplicated
+    and executed once, when the block exits (useful for batch jobs).
+    """
+    batch = _InvalidationBatch()
+    batches = _get_deferred_batches()
+    batches.append(batch)
+    try:
+        yield
+    finally:
+        batches.remove(batch)
+        for invalidation_mode, keys in batch.keys.items():
+            _invalidate(invalidation_mode, keys)
+
+
+@contextmanager
+def invalidate_on_commit(using=None):
+    """
+    Defers invalidations requested in the block until the current transaction is committed.
+    All the invalidations of a transaction are de-duplicated and executed once by transaction.on_commit
+    and discarded if the transaction is rolled back. Outside of atomic blocks (or with
+    DRF_REDIS_CACHE_INVALIDATE_ON_COMMIT setting set to False) invalidations are executed as usual.
+    :param using: alias of the database of the transaction
+    """
+    connection = transaction.get_connection(using)
+    if not connection.in_atomic_block or not get_setting('INVALIDATE_ON_COMMIT', True):
+        yield
+        return
 
-from .key_construction import get_user_cache_key, get_model_cache_key
+    batch = _get_transaction_batch(connection, using)
+    batches = _get_deferred_batches()
+    batches.append(batch)
+    try:
+        yield
+    finally:
+        batches.remove(batch)
 
 
 def invalidate_model_cache(model):
@@ -8,8 +98,51 @@ def invalidate_model_cache(model):
     Invalidates all model related caches.
     :param model: Model class
     """
-    model_name = get_model_cache_key(model)
-    invalidate_cache_key_pattern(model_name)
+    invalidation_mode = get_invalidation_mode()
+    _invalidate(invalidation_mode, _get_model_invalidation_keys(invalidation_mode, model))
+
+
+def invalidate_model_collection_cache(model):
+    """
+    Invalidates caches of collection-scoped views, which depend on the model.
+    Caches of instance-scoped views stay valid.
+    :param model: Model class
+    """
+    invalidation_mode = get_invalidation_mode()
+    if invalidation_mode == INVALIDATION_MODE_GENERATION:
+        keys = [get_collection_generation_key(model)]
+    elif invalidation_mode == INVALIDATION_MODE_TAGS:
+        keys = [get_collection_tag(model)]
+    else:
+        keys = [get_collection_cache_pattern(model)]
+    _invalidate(invalidation_mode, keys)
+
+
+def invalidate_instance_cache(instance):
+    """
+    Invalidates caches of instance-scoped views of the specific instance
+    and caches of collection-scoped views, which depend on the instance's model.
+    If the instance lacks any registered identifying parameter, all model related caches are invalidated.
+    :param instance: Model instance
+    """
+    model = type(instance)
+    try:
+        identifiers = {getattr(instance, parameter) for parameter in get_instance_parameters(model)}
+    except AttributeError:
+        invalidate_model_cache(model)
+        return
+
+    invalidation_mode = get_invalidation_mode()
+    if invalidation_mode == INVALIDATION_MODE_GENERATION:
+        keys = [get_instance_generation_key(model, identifier) for identifier in identifiers]
+        keys.append(get_collection_generation_key(model))
+    elif invalidation_mode == INVALIDATION_MODE_TAGS:
+        keys = [get_instance_tag(model, identifier) for identifier in identifiers]
+        keys.append(get_collection_tag(model))
+    else:
+        keys = [get_instance_cache_key(model, identifier) for identifier in identifiers]
+        keys.append(get_collection_cache_pattern(model))
+    _invalidate(invalidation_mode, keys)
 
 
 def invalidate_cache_key_pattern(cache_key):
@@ -21,10 +154,146 @@ def invalidate_cache_key_pattern(cache_key):
     cache.delete_pattern(f'*{cache_key}*')
 
 
+def increment_generation(generation_key):
+    """
+    Increments a generation counter with INCR (a missing counter is seeded first, see add_generation_seeds).
+    All the keys built with the previous generation become unreachable
+    and expire according to their timeout.
+    :param generation_key: cache key of the generation counter
+    :return: new generation
+    """
+    return increment_generations([generation_key])[0]
+
+
+def increment_generations(generation_keys):
+    """
+    Increments several generation counters in a single round trip. Expiration of the counters is refreshed.
+    :param generation_keys: cache keys of the generation counters
+    :return: list of new generations
+    """
+    timeout = get_generation_timeout()
+    pipeline = get_redis_connection().pipeline(transaction=False)
+    add_generation_seeds(pipeline, generation_keys)
+    for generation_key in generation_keys:
+        made_key = cache.make_key(generation_key)
+        pipeline.incr(made_key)
+        pipeline.expire(made_key, timeout)
+    return pipeline.execute()[len(generation_keys)::2]
+
+
 def invalidate_user_related_cache(user):
     """
     Invalidates all user related cache
     :param user: Specific user instance
     """
-    user_cache_key = get_user_cache_key(user)
-    invalidate_cache_key_pattern(user_cache_key)
+    invalidation_mode = get_invalidation_mode()
+    if invalidation_mode == INVALIDATION_MODE_GENERATION:
+        keys = [get_user_generation_key(user)]
+    elif invalidation_mode == INVALIDATION_MODE_TAGS:
+        keys = [get_user_tag(user)]
+    else:
+        keys = [get_user_cache_key(user)]
+    _invalidate(invalidation_mode, keys)
+
+
+def invalidate_view_cache(view_func):
+    """
+    Invalidates all the cache of a view. Requires INVALIDATION_MODE_TAGS.
+    :param view_func: view function (the one decorated with @method_decorator)
+    """
+    _invalidate(INVALIDATION_MODE_TAGS, [get_view_tag(view_func)])
+
+
+def _invalidate(invalidation_mode, keys):
+    """
+    Executes the invalidation or adds it to the innermost deferred batch, if there is any.
+    :param invalidation_mode: invalidation mode, which the keys belong to
+    :param keys: generation keys, tags or key patterns (depending on invalidation mode)
+    """
+    batches = _get_deferred_batches()
+    if batches:
+        batches[-1].add(invalidation_mode, keys)
+        return
+
+    _dispatch_invalidations({invalidation_mode: keys})
+
+
+def execute_invalidations(keys_by_mode):
+    """
+    Executes invalidations immediately (bypassing deferred batches and the invalidation queue)
+    and notifies processes about them.
+    :param keys_by_mode: dict mapping invalidation modes to iterables of keys
+    """
+    metrics_enabled = get_metrics_backend() is not None
+    for invalidation_mode, keys in keys_by_mode.items():
+        _execute_invalidation(invalidation_mode, keys)
+        if metrics_enabled:
+            for key in keys:
+                increment(METRIC_INVALIDATIONS, mode=invalidation_mode, target=get_invalidation_target(key))
+    publish_invalidation()
+
+
+def _get_model_invalidation_keys(invalidation_mode, model):
+    """
+    :param invalidation_mode: invalidation mode
+    :param model: Model class
+    :return: generation keys, tags or key patterns invalidating all model related caches
+    """
+    if invalidation_mode == INVALIDATION_MODE_GENERATION:
+        return [get_model_generation_key(model), get_collection_generation_key(model)]
+    if invalidation_mode == INVALIDATION_MODE_TAGS:
+        return [get_model_tag(model)]
+    return [get_model_cache_key(model)]
+
+
+def _dispatch_invalidations(keys_by_mode):
+    """
+    Pushes invalidations to the invalidation queue (if it's enabled and not full) or executes them.
+    :param keys_by_mode: dict mapping invalidation modes to iterables of keys
+    """
+    if not enqueue_invalidations(keys_by_mode):
+        execute_invalidations(keys_by_mode)
+
+
+def _execute_invalidation(invalidation_mode, keys):
+    """
+    :param invalidation_mode: invalidation mode, which the keys belong to
+    :param keys: generation keys, tags or key patterns (depending on invalidation mode)
+    """
+    if invalidation_mode == INVALIDATION_MODE_GENERATION:
+        increment_generations(keys)
+    elif invalidation_mode == INVALIDATION_MODE_TAGS:
+        invalidate_tags(keys)
+    else:
+        for cache_key in keys:
+            invalidate_cache_key_pattern(cache_key)
+
+
+def _get_deferred_batches():
+    """
+    :return: stack of batches collecting invalidations of the current thread
+    """
+    if not hasattr(_state, 'batches'):
+        _state.batches = []
+    return _state.batches
+
+
+def _get_transaction_batch(connection, using):
+    """
+    Returns the batch of the current transaction. The batch is flushed, when the transaction is committed.
+    :param connection: database connection
+    :param using: alias of the database
+    :return: _InvalidationBatch
+    """
+    if not hasattr(_state, 'transaction_batches'):
+        _state.transaction_batches = {}
+
+    batch = _state.transaction_batches.get(using)
+    # rollback replaces the list of commit hooks, so a batch registered in a previous list is discarded.
+    # Hooks may be executed without replacing the list (captureOnCommitCallbacks), so flushed batches are replaced too
+    if batch is None or batch.flushed or batch.commit_hooks is not connection.run_on_commit:
+        batch = _InvalidationBatch()
+        transaction.on_commit(batch.flush, using=using)
+        batch.commit_hooks = connection.run_on_commit
+        _state.transaction_batches[using] = batch
+    return batch
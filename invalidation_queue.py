@@ -0,0 +1,247 @@
+import atexit
+import json
+import logging
+import queue
+import threading
+import time
+
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django_redis import get_redis_connection
+
+from .metrics import observe, set_gauge, METRIC_INVALIDATION_QUEUE_DEPTH, METRIC_INVALIDATION_QUEUE_LAG
+from .utils import get_setting
+
+logger = logging.getLogger(__name__)
+
+INVALIDATION_QUEUE_THREAD = 'thread'
+INVALIDATION_QUEUE_REDIS = 'redis'
+
+EVENT_KEYS = "keys"
+EVENT_ENQUEUED = "enqueued"
+
+_REDIS_QUEUE_KEY = "invalidation__queue"
+_REDIS_PROCESSING_KEY = "invalidation__processing"
+WORKER_POLL_SECONDS = 1
+RETRY_DELAY_SECONDS = 1
+
+# LLEN and LPUSH in a single script, so concurrent producers can't overshoot the size limit
+_BOUNDED_PUSH_SCRIPT = """
+if redis.call("llen", KEYS[1]) >= tonumber(ARGV[2]) then
+    return 0
+end
+return redis.call("lpush", KEYS[1], ARGV[1])
+"""
+
+_thread_queue = None
+_thread_queue_lock = threading.Lock()
+_stats_lock = threading.Lock()
+_stats = {
+    "enqueued": 0,
+    "processed": 0,
+    "failed": 0,
+    "executed_synchronously": 0,
+    "lag": 0.0,
+}
+
+
+def enqueue_invalidations(keys_by_mode):
+    """
+    Pushes invalidation event to the queue defined by DRF_REDIS_CACHE_INVALIDATION_QUEUE setting:
+    INVALIDATION_QUEUE_THREAD (in-process queue drained by a background thread), INVALIDATION_QUEUE_REDIS
+    (redis list drained by process_cache_invalidations management command) or None (disabled, default).
+    Queue size is limited by DRF_REDIS_CACHE_INVALIDATION_QUEUE_MAX_SIZE setting (default 10000).
+    When the queue is full (for up to DRF_REDIS_CACHE_INVALIDATION_QUEUE_TIMEOUT seconds, default 1),
+    the event isn't enqueued, so the caller executes it synchronously. Failed events are retried
+    and the thread queue is drained, when the process exits (for up to
+    DRF_REDIS_CACHE_INVALIDATION_QUEUE_EXIT_TIMEOUT seconds, default 10).
+    :param keys_by_mode: dict mapping invalidation modes to iterables of keys
+    :return: True if the event has been enqueued
+    """
+    invalidation_queue = get_setting('INVALIDATION_QUEUE', None)
+    if invalidation_queue is None:
+        return False
+
+    event = {
+        EVENT_KEYS: {invalidation_mode: list(keys) for invalidation_mode, keys in keys_by_mode.items()},
+        EVENT_ENQUEUED: time.time(),
+    }
+
+    if invalidation_queue == INVALIDATION_QUEUE_THREAD:
+        enqueued = _enqueue_to_thread_queue(event)
+    elif invalidation_queue == INVALIDATION_QUEUE_REDIS:
+        enqueued = _enqueue_to_redis_queue(event)
+    else:
+        raise ImproperlyConfigured(f'Unknown invalidation queue: {invalidation_queue}')
+
+    _increment_stat("enqueued" if enqueued else "executed_synchronously")
+    return enqueued
+
+
+def process_invalidation_event(event):
+    """
+    Executes invalidations of the event and records its lag.
+    :param event: event created by enqueue_invalidations
+    :return: True if the invalidations have been executed, False if they failed (and should be retried)
+    """
+    from .invalidation import execute_invalidations
+
+    try:
+        execute_invalidations(event[EVENT_KEYS])
+    except Exception:
+        logger.exception('Cache invalidation failed')
+        _increment_stat("failed")
+        return False
+
+    lag = time.time() - event[EVENT_ENQUEUED]
+    with _stats_lock:
+        _stats["processed"] += 1
+        _stats["lag"] = lag
+    observe(METRIC_INVALIDATION_QUEUE_LAG, lag)
+    return True
+
+
+def process_redis_invalidation_queue(max_events=None):
+    """
+    Drains the redis invalidation queue. Blocks waiting for new events.
+    Events are moved (BLMOVE) to a processing list and removed from it, when they have been executed.
+    Failed events are moved back to the queue and retried. Events left in the processing list
+    by a worker, which died while processing them, are moved back to the queue, when a worker starts
+    (invalidations are idempotent, so an event executed twice does no harm).
+    :param max_events: number of events, after which the function returns. None - runs forever
+    :return: number of processed events
+    """
+    redis_connection = get_redis_connection()
+    queue_key = _get_redis_queue_key()
+    processing_key = _get_redis_processing_key()
+    processed_events = 0
+
+    while redis_connection.lmove(processing_key, queue_key, 'RIGHT', 'RIGHT') is not None:
+        pass
+
+    while max_events is None or processed_events < max_events:
+        item = redis_connection.blmove(queue_key, processing_key, WORKER_POLL_SECONDS, 'RIGHT', 'LEFT')
+        if item is None:
+            continue
+
+        if process_invalidation_event(json.loads(item)):
+            redis_connection.lrem(processing_key, 1, item)
+            processed_events += 1
+        else:
+            # moved to the consuming end of the queue, so the event is retried first
+            pipeline = redis_connection.pipeline()
+            pipeline.lrem(processing_key, 1, item)
+            pipeline.rpush(queue_key, item)
+            pipeline.execute()
+            time.sleep(RETRY_DELAY_SECONDS)
+        set_gauge(METRIC_INVALIDATION_QUEUE_DEPTH, redis_connection.llen(queue_key), queue=INVALIDATION_QUEUE_REDIS)
+
+    return processed_events
+
+
+def get_invalidation_queue_stats():
+    """
+    :return: dict with current depth of the queue, lag of the last processed event in seconds
+    and numbers of enqueued, processed, failed and synchronously executed events (counted by this process)
+    """
+    with _stats_lock:
+        stats = dict(_stats)
+
+    invalidation_queue = get_setting('INVALIDATION_QUEUE', None)
+    if invalidation_queue == INVALIDATION_QUEUE_REDIS:
+        stats["depth"] = get_redis_connection().llen(_get_redis_queue_key())
+    else:
+        stats["depth"] = _thread_queue.qsize() if _thread_queue is not None else 0
+    return stats
+
+
+def _enqueue_to_thread_queue(event):
+    """
+    :param event: invalidation event
+    :return: True if the event has been enqueued
+    """
+    invalidation_queue = _get_thread_queue()
+    try:
+        invalidation_queue.put(event, timeout=get_setting('INVALIDATION_QUEUE_TIMEOUT', 1))
+    except queue.Full:
+        return False
+    set_gauge(METRIC_INVALIDATION_QUEUE_DEPTH, invalidation_queue.qsize(), queue=INVALIDATION_QUEUE_THREAD)
+    return True
+
+
+def _enqueue_to_redis_queue(event):
+    """
+    :param event: invalidation event
+    :return: True if the event has been enqueued
+    """
+    depth = get_redis_connection().eval(_BOUNDED_PUSH_SCRIPT, 1, _get_redis_queue_key(),
+                                        json.dumps(event), get_setting('INVALIDATION_QUEUE_MAX_SIZE', 10000))
+    if not depth:
+        return False
+
+    set_gauge(METRIC_INVALIDATION_QUEUE_DEPTH, depth, queue=INVALIDATION_QUEUE_REDIS)
+    return True
+
+
+def _get_thread_queue():
+    """
+    Returns in-process invalidation queue. The first call starts a thread, which drains it,
+    and registers a function waiting for the queue to be drained, when the process exits.
+    :return: queue.Queue
+    """
+    global _thread_queue
+
+    if _thread_queue is None:
+        with _thread_queue_lock:
+            if _thread_queue is None:
+                invalidation_queue = queue.Queue(maxsize=get_setting('INVALIDATION_QUEUE_MAX_SIZE', 10000))
+                threading.Thread(target=_drain_thread_queue, args=(invalidation_queue,), daemon=True).start()
+                atexit.register(_wait_for_thread_queue, invalidation_queue)
+                _thread_queue = invalidation_queue
+
+    return _thread_queue
+
+
+def _drain_thread_queue(invalidation_queue):
+    """
+    Executes events of the queue one by one. Failed events are retried, until they succeed.
+    :param invalidation_queue: queue.Queue with invalidation events
+    """
+    while True:
+        event = invalidation_queue.get()
+        try:
+            while not process_invalidation_event(event):
+                time.sleep(RETRY_DELAY_SECONDS)
+        finally:
+            invalidation_queue.task_done()
+            set_gauge(METRIC_INVALIDATION_QUEUE_DEPTH, invalidation_queue.qsize(), queue=INVALIDATION_QUEUE_THREAD)
+
+
+def _wait_for_thread_queue(invalidation_queue):
+    """
+    Waits (up to DRF_REDIS_CACHE_INVALIDATION_QUEUE_EXIT_TIMEOUT seconds, default 10) for the drain thread
+    to execute events left in the queue, so they aren't lost, when the process exits.
+    Daemon threads keep running, while atexit functions are called.
+    :param invalidation_queue: queue.Queue with invalidation events
+    """
+    deadline = time.monotonic() + get_setting('INVALIDATION_QUEUE_EXIT_TIMEOUT', 10)
+    with invalidation_queue.all_tasks_done:
+        while invalidation_queue.unfinished_tasks:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                logger.error(f'{invalidation_queue.unfinished_tasks} cache invalidations lost at exit')
+                return
+            invalidation_queue.all_tasks_done.wait(remaining)
+
+
+def _increment_stat(name):
+    with _stats_lock:
+        _stats[name] += 1
+
+
+def _get_redis_queue_key():
+    return cache.make_key(_REDIS_QUEUE_KEY)
+
+
+def _get_redis_processing_key():
+    return cache.make_key(_REDIS_PROCESSING_KEY)
@@ -1,13 +1,35 @@
-import collections
+import collections.abc
+import hashlib
 import inspect
+import time
+from functools import lru_cache, partial
 
 from django.contrib.auth import get_user_model
-
-from .utils import get_request_lang
+from django.core.cache import cache
+from django_redis import get_redis_connection
+
+from .async_redis import get_async_redis_connection
+from .queryparams import get_normalized_queryparams
+from .utils import (get_request_lang,
+                    get_invalidation_mode,
+                    get_key_format,
+                    get_redis_timeout,
+                    get_setting,
+                    INVALIDATION_MODE_GENERATION,
+                    KEY_FORMAT_HASHED,
+                    CACHE_SCOPE_COLLECTION,
+                    CACHE_SCOPE_INSTANCE,
+                    )
 
 User = get_user_model()
 
 _CACHE_SEPARATOR = "__"
+_GENERATION_PREFIX = "generation"
+_DIGEST_SIZE = 16
+
+DEFAULT_GENERATION_TIMEOUT = 24 * 60 * 60
+
+_longest_cache_timeout = 0
 
 
 def get_cache_key_for_decorated_function(func,
@@ -16,7 +38,15 @@ def get_cache_key_for_decorated_function(func,
                                          cache_user=False,
                                          cache_queryparams=False,
                                          model_dependencies=[],
-                                         identifier=None, ):
+                                         identifier=None,
+                                         cache_scope=CACHE_SCOPE_COLLECTION,
+                                         cache_renderer=False,
+                                         allowed_queryparams=None,
+                                         ignored_queryparams=(),
+                                         queryparams_normalizers=None,
+                                         cache_audience=None,
+                                         generations=None,
+                                         audience=None, ):
     """
     Creates a cache key for given function.
     :param func: The function passed to the decorator
@@ -29,28 +59,117 @@ def get_cache_key_for_decorated_function(func,
     :param model_dependencies: defines, which models invalidate cache
     of this particular view
     :param identifier: identifier of an instance (if it is a call on instance's view)
-    :return: key for function passed to the decorator
+    :param cache_scope: CACHE_SCOPE_COLLECTION or CACHE_SCOPE_INSTANCE. With instance scope
+    the identifier identifies an instance of the first model in model_dependencies
+    :param cache_renderer: defines, whether view should be cached per negotiated renderer
+    :param allowed_queryparams: tuple of names (or fnmatch patterns) of cached query params. None - all
+    :param ignored_queryparams: tuple of names (or fnmatch patterns) of query params, which are never cached
+    :param queryparams_normalizers: dict mapping query param names to functions normalizing their values
+    :param cache_audience: function mapping request to a partition shared by several users.
+    When passed, view is cached per audience instead of per user (cache_user is ignored)
+    :param generations: dict with values of generation keys returned by get_generation_keys_for_decorated_function
+    (INVALIDATION_MODE_GENERATION only). Generations are fetched from cache, if it's not passed
+    :param audience: audience already returned by cache_audience (async views resolve it outside of the event loop,
+    because audiences may query the database). cache_audience is called, if it's not passed
+    :return: key for function passed to the decorator.
+    With KEY_FORMAT_HASHED (DRF_REDIS_CACHE_KEY_FORMAT setting) the parts, which aren't needed
+    for invalidation (method, renderer, language, queryparams and generations), are replaced
+    with a fixed-length digest
     """
-    # inspect.getclosurevars is required, because all the views are passed
-    # indirectly via @method_decorator
-    decorated_func = inspect.getclosurevars(func)[0]['func']
+    decorated_func = _get_decorated_function(func)
+    instance_model, model_dependencies = _split_instance_model(tuple(model_dependencies), identifier, cache_scope)
 
-    key = get_base_cache_key_for_function(decorated_func, identifier)
-    key = _add_request_method_to_cache_key(key, request)
+    # parts are joined once, static ones (function, dependencies) are memoized
+    key_parts = [get_base_cache_key_for_function(decorated_func, identifier)]
+    # plain keys keep all the parts in order, hashed keys digest the variable ones
+    hashed_key = get_key_format() == KEY_FORMAT_HASHED
+    variable_parts = [] if hashed_key else key_parts
+
+    variable_parts.append(_get_request_method_param_key(request))
+
+    if cache_renderer:
+        variable_parts.append(_get_renderer_param_key(request))
 
     if cache_language:
-        key = _add_language_to_cache_key(key, request)
+        variable_parts.append(_get_language_param_key(request))
 
-    if cache_user:
-        key = _add_user_to_cache_key(key, request)
+    if cache_audience is not None:
+        if audience is None:
+            audience = cache_audience(request)
+        variable_parts.append(_get_audience_param_key(audience))
+    elif cache_user:
+        key_parts.append(_get_user_param_key(request.user))
 
     if cache_queryparams:
-        key = _add_queryparams_to_cache_key(key, request)
+        variable_parts.append(_get_queryparams_param_key(request,
+                                                         allowed_queryparams=allowed_queryparams,
+                                                         ignored_queryparams=ignored_queryparams,
+                                                         normalizers=queryparams_normalizers))
 
     if model_dependencies:
-        key = _add_model_dependencies_to_cache_key(key, model_dependencies)
+        key_parts.append(_get_model_dependencies_param_key(model_dependencies))
+
+    if instance_model is not None:
+        key_parts.append(get_instance_cache_key(instance_model, identifier))
 
-    return key
+    if get_invalidation_mode() == INVALIDATION_MODE_GENERATION:
+        variable_parts.append(_get_generations_param_key(request=request,
+                                                         cache_user=cache_user and cache_audience is None,
+                                                         model_dependencies=model_dependencies,
+                                                         instance_model=instance_model,
+                                                         identifier=identifier,
+                                                         generations=generations))
+
+    if hashed_key:
+        key_parts.append(_get_digest_param_key(variable_parts))
+
+    return ''.join(key_parts)
+
+
+def get_cache_tags_for_decorated_function(func,
+                                          request,
+                                          cache_user=False,
+                                          model_dependencies=[],
+                                          identifier=None,
+                                          cache_scope=CACHE_SCOPE_COLLECTION, ):
+    """
+    Creates invalidation tags of a cache entry of given function.
+    Parameters have the same meaning as in get_cache_key_for_decorated_function.
+    :return: list of tags (view, models, collections, instance and user)
+    """
+    decorated_func = _get_decorated_function(func)
+    instance_model, collection_dependencies = _split_instance_model(model_dependencies, identifier, cache_scope)
+
+    tags = [get_view_tag(decorated_func)]
+    tags.extend(get_model_tag(model) for model in model_dependencies)
+    tags.extend(get_collection_tag(model) for model in collection_dependencies)
+
+    if instance_model is not None:
+        tags.append(get_instance_tag(instance_model, identifier))
+
+    if cache_user and not request.user.is_anonymous:
+        tags.append(get_user_tag(request.user))
+
+    return tags
+
+
+def get_generation_keys_for_decorated_function(request,
+                                               cache_user=False,
+                                               model_dependencies=[],
+                                               identifier=None,
+                                               cache_scope=CACHE_SCOPE_COLLECTION, ):
+    """
+    Returns keys of generations, which are a part of the cache key in INVALIDATION_MODE_GENERATION,
+    so they may be fetched by the caller (e.g. with an async client).
+    Parameters have the same meaning as in get_cache_key_for_decorated_function.
+    :return: list of generation keys
+    """
+    instance_model, model_dependencies = _split_instance_model(tuple(model_dependencies), identifier, cache_scope)
+    return _get_generation_keys(request,
+                                cache_user=cache_user,
+                                model_dependencies=model_dependencies,
+                                instance_model=instance_model,
+                                identifier=identifier)
 
 
 def get_base_cache_key_for_function(func, identifier=None):
@@ -60,7 +179,7 @@ def get_base_cache_key_for_function(func, identifier=None):
     :param identifier: Optional, identifier passed to the view
     :return: string with module name and func name
     """
-    cache_key = f'{func.__module__}.{func.__name__}{_CACHE_SEPARATOR}'
+    cache_key = _get_function_cache_key(func)
     if identifier is not None:
         cache_key = _add_param_key_to_cache_key(cache_key, str(identifier))
     return cache_key
@@ -85,6 +204,258 @@ def get_model_cache_key(model):
     return f'{model._meta.app_label}.{model.__name__}'
 
 
+def get_instance_cache_key(model, identifier):
+    """
+    Returns a part of cache key used to identify an instance of a model.
+    :param model: model of the instance
+    :param identifier: identifier of the instance
+    :return: Part of cache key used to identify instance
+    """
+    return _add_param_key_to_cache_key("", f'instance:{get_model_cache_key(model)}:{identifier}')
+
+
+def get_collection_cache_pattern(model):
+    """
+    Returns a pattern matching keys of collection-scoped views, which depend on the model.
+    :param model: model, on which cache depends
+    :return: pattern of collection-scoped keys
+    """
+    return f"dependent:*'{get_model_cache_key(model)}'"
+
+
+def get_model_generation_key(model):
+    """
+    Returns a cache key of the generation counter of a model.
+    :param model: model, on which cache depends
+    :return: cache key of the model's generation counter
+    """
+    return f'{_GENERATION_PREFIX}{_CACHE_SEPARATOR}{get_model_cache_key(model)}'
+
+
+def get_collection_generation_key(model):
+    """
+    Returns a cache key of the generation counter of collection-scoped views of a model.
+    :param model: model, on which cache depends
+    :return: cache key of the model's collection generation counter
+    """
+    return f'{_GENERATION_PREFIX}{_CACHE_SEPARATOR}collection:{get_model_cache_key(model)}'
+
+
+def get_instance_generation_key(model, identifier):
+    """
+    Returns a cache key of the generation counter of an instance.
+    :param model: model of the instance
+    :param identifier: identifier of the instance
+    :return: cache key of the instance's generation counter
+    """
+    return f'{_GENERATION_PREFIX}{_CACHE_SEPARATOR}{get_instance_cache_key(model, identifier)}'
+
+
+def get_user_generation_key(user):
+    """
+    Returns a cache key of the generation counter of a user.
+    :param user: User instance
+    :return: cache key of the user's generation counter
+    """
+    return f'{_GENERATION_PREFIX}{_CACHE_SEPARATOR}{get_user_cache_key(user)}'
+
+
+def get_generations(generation_keys):
+    """
+    Fetches current generations. Missing counters (never incremented, evicted or flushed) are seeded
+    with add_generation_seeds, so keys built with generations from before the loss never become reachable again.
+    :param generation_keys: cache keys of the generation counters
+    :return: dict mapping generation keys to their values
+    """
+    if not generation_keys:
+        return {}
+
+    redis_connection = get_redis_connection()
+    values = redis_connection.mget([cache.make_key(generation_key) for generation_key in generation_keys])
+    missing_keys = [generation_key for generation_key, value in zip(generation_keys, values) if value is None]
+    if missing_keys:
+        pipeline = redis_connection.pipeline(transaction=False)
+        add_generation_seeds(pipeline, missing_keys, read=True)
+        values = _merge_seeded_generations(generation_keys, values, pipeline.execute())
+    return {generation_key: int(value) for generation_key, value in zip(generation_keys, values)}
+
+
+async def aget_generations(generation_keys):
+    """
+    Async version of get_generations.
+    :param generation_keys: cache keys of the generation counters
+    :return: dict mapping generation keys to their values
+    """
+    if not generation_keys:
+        return {}
+
+    redis_connection = get_async_redis_connection()
+    values = await redis_connection.mget([cache.make_key(generation_key) for generation_key in generation_keys])
+    missing_keys = [generation_key for generation_key, value in zip(generation_keys, values) if value is None]
+    if missing_keys:
+        pipeline = redis_connection.pipeline(transaction=False)
+        add_generation_seeds(pipeline, missing_keys, read=True)
+        values = _merge_seeded_generations(generation_keys, values, await pipeline.execute())
+    return {generation_key: int(value) for generation_key, value in zip(generation_keys, values)}
+
+
+def add_generation_seeds(pipeline, generation_keys, read=False):
+    """
+    Adds SET NX of missing generation counters to the pipeline. Counters are seeded with the current time
+    in nanoseconds instead of 0, so a counter lost by eviction, flush or expiration doesn't repeat its old values.
+    Counters expire after get_generation_timeout, so counters of instances and users, which are no longer
+    requested, don't stay in redis forever.
+    :param pipeline: redis pipeline (sync or async)
+    :param generation_keys: cache keys of the generation counters
+    :param read: defines, whether GET of each counter should follow its SET NX
+    """
+    seed = time.time_ns()
+    timeout = get_generation_timeout()
+    for generation_key in generation_keys:
+        made_key = cache.make_key(generation_key)
+        pipeline.set(made_key, seed, nx=True, ex=timeout)
+        if read:
+            pipeline.get(made_key)
+
+
+def register_cache_timeout(timeout):
+    """
+    Registers timeout of entries of a decorated view, so generation counters live at least as long as the entries.
+    :param timeout: timeout in seconds
+    """
+    global _longest_cache_timeout
+    _longest_cache_timeout = max(_longest_cache_timeout, get_redis_timeout(timeout))
+
+
+def get_generation_timeout():
+    """
+    Returns time in seconds, after which an unused generation counter expires, defined by
+    DRF_REDIS_CACHE_GENERATION_TIMEOUT setting. Default = the longest timeout of decorated views,
+    but at least DEFAULT_GENERATION_TIMEOUT (a day). An expired counter is seeded again
+    with the current time, so it only makes entries built with it unreachable.
+    :return: timeout in seconds
+    """
+    timeout = get_setting('GENERATION_TIMEOUT', None)
+    if timeout is not None:
+        return get_redis_timeout(timeout)
+    return max(DEFAULT_GENERATION_TIMEOUT, _longest_cache_timeout)
+
+
+def get_invalidation_target(key):
+    """
+    Returns a label of an invalidated key, tag or pattern without identifiers of instances and users,
+    so metrics labelled with it have bounded cardinality.
+    :param key: generation key, tag or key pattern
+    :return: label such as 'model:app.Model', 'collection:app.Model', 'instance:app.Model' or 'user'
+    """
+    generation_prefix = f'{_GENERATION_PREFIX}{_CACHE_SEPARATOR}'
+    if key.startswith(generation_prefix):
+        key = key[len(generation_prefix):]
+
+    kind, separator, rest = key.partition(':')
+    if not separator:
+        return f'model:{key}'
+    if kind == 'dependent':
+        return f"collection:{rest.strip('*')}".replace("'", '')
+    if kind == 'instance':
+        return f'instance:{rest.split(":", 1)[0]}'
+    if kind == 'user':
+        return 'user'
+    return f'{kind}:{rest}'
+
+
+def get_view_name(func):
+    """
+    :param func: The function passed to the decorator
+    :return: name of the decorated view (module and function name)
+    """
+    decorated_func = _get_decorated_function(func)
+    return f'{decorated_func.__module__}.{decorated_func.__name__}'
+
+
+def get_view_tag(func):
+    """
+    :param func: Function, that has to be cached
+    :return: tag of all the entries of the function
+    """
+    return f'view:{func.__module__}.{func.__name__}'
+
+
+def get_model_tag(model):
+    """
+    :param model: model, on which cache depends
+    :return: tag of all the entries, which depend on the model
+    """
+    return f'model:{get_model_cache_key(model)}'
+
+
+def get_collection_tag(model):
+    """
+    :param model: model, on which cache depends
+    :return: tag of collection-scoped entries, which depend on the model
+    """
+    return f'collection:{get_model_cache_key(model)}'
+
+
+def get_instance_tag(model, identifier):
+    """
+    :param model: model of the instance
+    :param identifier: identifier of the instance
+    :return: tag of instance-scoped entries of the instance
+    """
+    return f'instance:{get_model_cache_key(model)}:{identifier}'
+
+
+def get_user_tag(user):
+    """
+    :param user: User instance
+    :return: tag of all the entries cached for the user
+    """
+    assert isinstance(user, User)
+    return f'user:{user.id}'
+
+
+def _get_decorated_function(func):
+    """
+    :param func: The function passed to the decorator
+    :return: view function wrapped by @method_decorator
+    """
+    # all the views are passed indirectly via @method_decorator - as a partial of bound method
+    # or (in older Django versions) as a closure over 'func'
+    if isinstance(func, partial):
+        func = func.func
+    if inspect.ismethod(func):
+        return func.__func__
+
+    code = getattr(func, '__code__', None)
+    if code is not None and 'func' in code.co_freevars:
+        return func.__closure__[code.co_freevars.index('func')].cell_contents
+
+    return inspect.unwrap(func)
+
+
+@lru_cache(maxsize=None)
+def _get_function_cache_key(func):
+    """
+    :param func: Function, that has to be cached
+    :return: string with module name and func name
+    """
+    return f'{func.__module__}.{func.__name__}{_CACHE_SEPARATOR}'
+
+
+def _split_instance_model(model_dependencies, identifier, cache_scope):
+    """
+    Separates the model of an instance-scoped view from the rest of model dependencies.
+    :param model_dependencies: model dependencies passed to the decorator
+    :param identifier: identifier of an instance
+    :param cache_scope: CACHE_SCOPE_COLLECTION or CACHE_SCOPE_INSTANCE
+    :return: tuple (instance model or None, collection dependencies)
+    """
+    if cache_scope == CACHE_SCOPE_INSTANCE and model_dependencies and identifier is not None:
+        return model_dependencies[0], model_dependencies[1:]
+    return None, model_dependencies
+
+
 def _add_param_key_to_cache_key(cache_key, param_key):
     """
     :param param_key: cache key of the parameter
@@ -101,9 +472,7 @@ def _add_request_method_to_cache_key(cache_key, request):
     :param request: request sent by client
     :return: cache key with added request method
     """
-    method = request.method
-    param_key = f'method:{method}'
-    return _add_param_key_to_cache_key(cache_key, param_key)
+    return f'{cache_key}{_get_request_method_param_key(request)}'
 
 
 def _add_language_to_cache_key(cache_key, request):
@@ -112,9 +481,7 @@ def _add_language_to_cache_key(cache_key, request):
     :param request: request sent by client
     :return: cache key with added language
     """
-    language_code = get_request_lang(request)
-    param_key = f'lang:{language_code}'
-    return _add_param_key_to_cache_key(cache_key, param_key)
+    return f'{cache_key}{_get_language_param_key(request)}'
 
 
 def _add_user_to_cache_key(cache_key, request=None, user=None):
@@ -128,27 +495,29 @@ def _add_user_to_cache_key(cache_key, request=None, user=None):
     """
     assert user or request
     user = user or request.user
-    if not user.is_anonymous:
-        param_key = f'user:{user.id}'
-        cache_key = _add_param_key_to_cache_key(cache_key, param_key)
-
-    return cache_key
+    return f'{cache_key}{_get_user_param_key(user)}'
 
 
-def _add_queryparams_to_cache_key(cache_key, request):
+def _add_queryparams_to_cache_key(cache_key,
+                                  request,
+                                  allowed_queryparams=None,
+                                  ignored_queryparams=(),
+                                  normalizers=None):
     """
     Sorts queryparams and adds them using ".{key}:{value}" pattern
+    (every value of a repeated param is added separately)
     :param cache_key: current cache key
     :param request: request sent by client
+    :param allowed_queryparams: tuple of names (or patterns) of cached query params. None - all
+    :param ignored_queryparams: tuple of names (or patterns) of query params, which are never cached
+    :param normalizers: dict mapping query param names to functions normalizing their values
     :return: cache key with added queryparams
     """
-    query_params = request.query_params
-
-    for key, value in sorted(query_params.items()):
-        param_key = f'{key}:{value}'
-        cache_key = _add_param_key_to_cache_key(cache_key, param_key)
-
-    return cache_key
+    queryparams_param_key = _get_queryparams_param_key(request,
+                                                       allowed_queryparams=allowed_queryparams,
+                                                       ignored_queryparams=ignored_queryparams,
+                                                       normalizers=normalizers)
+    return f'{cache_key}{queryparams_param_key}'
 
 
 def _add_model_dependencies_to_cache_key(cache_key, model_dependencies):
@@ -158,12 +527,172 @@ def _add_model_dependencies_to_cache_key(cache_key, model_dependencies):
     :param model_dependencies: model dependencies passed to the decorator.
     :return: cache key with added model dependencies
     """
-    assert isinstance(model_dependencies, collections.Iterable)
+    assert isinstance(model_dependencies, collections.abc.Iterable)
+
+    return f'{cache_key}{_get_model_dependencies_param_key(tuple(model_dependencies))}'
+
+
+def _add_instance_to_cache_key(cache_key, model, identifier):
+    """
+    Adds an instance of the model to cache key.
+    :param cache_key: current cache key
+    :param model: model of the instance
+    :param identifier: identifier of the instance
+    :return: cache key with added instance
+    """
+    return f'{cache_key}{get_instance_cache_key(model, identifier)}'
+
+
+def _add_generations_to_cache_key(cache_key,
+                                  request,
+                                  cache_user=False,
+                                  model_dependencies=[],
+                                  instance_model=None,
+                                  identifier=None):
+    """
+    Adds current generations of model dependencies (and of the user, if cache is user-dependent)
+    to the cache key. Parameters have the same meaning as in _get_generations_param_key.
+    :return: cache key with added generations
+    """
+    generations_param_key = _get_generations_param_key(request,
+                                                       cache_user=cache_user,
+                                                       model_dependencies=model_dependencies,
+                                                       instance_model=instance_model,
+                                                       identifier=identifier)
+    return f'{cache_key}{generations_param_key}'
+
+
+def _get_generations_param_key(request,
+                               cache_user=False,
+                               model_dependencies=[],
+                               instance_model=None,
+                               identifier=None,
+                               generations=None):
+    """
+    Returns a part of cache key with current generations of model dependencies
+    (and of the user, if cache is user-dependent). All generations are fetched with a single round trip.
+    Incrementing any of these generations makes the key unreachable.
+    :param request: request sent by client
+    :param cache_user: defines, whether user's generation should be added
+    :param model_dependencies: collection dependencies of the view.
+    :param instance_model: model of the instance of an instance-scoped view
+    :param identifier: identifier of the instance of an instance-scoped view
+    :param generations: dict with already fetched generations. None - generations are fetched from cache
+    :return: part of cache key with generations
+    """
+    generation_keys = _get_generation_keys(request,
+                                           cache_user=cache_user,
+                                           model_dependencies=model_dependencies,
+                                           instance_model=instance_model,
+                                           identifier=identifier)
+    if not generation_keys:
+        return ''
+
+    if generations is None:
+        generations = get_generations(generation_keys)
+    generations_names = [str(generations[key]) for key in generation_keys]
+    return f'gen:{".".join(generations_names)}{_CACHE_SEPARATOR}'
+
+
+def _get_generation_keys(request, cache_user=False, model_dependencies=[], instance_model=None, identifier=None):
+    """
+    Parameters have the same meaning as in _get_generations_param_key.
+    :return: list of generation keys
+    """
+    generation_keys = [get_collection_generation_key(model) for model in model_dependencies]
+
+    if instance_model is not None:
+        generation_keys.append(get_model_generation_key(instance_model))
+        generation_keys.append(get_instance_generation_key(instance_model, identifier))
+
+    if cache_user and not request.user.is_anonymous:
+        generation_keys.append(get_user_generation_key(request.user))
+
+    return generation_keys
+
+
+def _merge_seeded_generations(generation_keys, values, seed_results):
+    """
+    :param generation_keys: cache keys of the generation counters
+    :param values: values of the counters read with MGET (None for missing counters)
+    :param seed_results: results of the pipeline built by add_generation_seeds with read=True
+    :return: list of values of all the counters
+    """
+    seeded_values = iter(seed_results[1::2])
+    return [value if value is not None else next(seeded_values) for value in values]
+
+
+def _get_request_method_param_key(request):
+    """
+    :param request: request sent by client
+    :return: part of cache key with request method
+    """
+    return f'method:{request.method}{_CACHE_SEPARATOR}'
+
+
+def _get_renderer_param_key(request):
+    """
+    :param request: request sent by client
+    :return: part of cache key with media type negotiated by the view
+    """
+    return f'renderer:{request.accepted_media_type}{_CACHE_SEPARATOR}'
+
+
+def _get_language_param_key(request):
+    """
+    :param request: request sent by client
+    :return: part of cache key with language
+    """
+    return f'lang:{get_request_lang(request)}{_CACHE_SEPARATOR}'
+
+
+def _get_user_param_key(user):
+    """
+    :param user: user, which has to be added
+    :return: part of cache key with user's pk (empty for anonymous users)
+    """
+    if user.is_anonymous:
+        return ''
+    return f'user:{user.id}{_CACHE_SEPARATOR}'
+
+
+def _get_audience_param_key(audience):
+    """
+    :param audience: audience returned by cache_audience function
+    :return: part of cache key with audience
+    """
+    return f'audience:{audience}{_CACHE_SEPARATOR}'
 
+
+def _get_queryparams_param_key(request, allowed_queryparams=None, ignored_queryparams=(), normalizers=None):
+    """
+    Parameters have the same meaning as in _add_queryparams_to_cache_key.
+    :return: part of cache key with sorted queryparams
+    """
+    queryparams = get_normalized_queryparams(request.query_params,
+                                             allowed_queryparams=allowed_queryparams,
+                                             ignored_queryparams=ignored_queryparams,
+                                             normalizers=normalizers)
+    return ''.join(f'{key}:{value}{_CACHE_SEPARATOR}' for key, value in queryparams)
+
+
+@lru_cache(maxsize=None)
+def _get_model_dependencies_param_key(model_dependencies):
+    """
+    :param model_dependencies: tuple of model dependencies passed to the decorator.
+    :return: part of cache key with model dependencies (empty if there are no dependencies)
+    """
     dependencies_names = [get_model_cache_key(model) for model in model_dependencies]
 
-    if dependencies_names:
-        param_key = f'dependent:{str(dependencies_names)}'
-        cache_key = _add_param_key_to_cache_key(cache_key, param_key)
+    if not dependencies_names:
+        return ''
+    return f'dependent:{str(dependencies_names)}{_CACHE_SEPARATOR}'
 
-    return cache_key
+
+def _get_digest_param_key(param_keys):
+    """
+    :param param_keys: parts of cache key, which have to be hashed
+    :return: part of cache key with fixed-length digest of the parts
+    """
+    digest = hashlib.blake2b(''.join(param_keys).encode(), digest_size=_DIGEST_SIZE).hexdigest()
+    return f'h:{digest}{_CACHE_SEPARATOR}'
@@ -0,0 +1,135 @@
+import logging
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.cache import cache
+from django_redis import get_redis_connection
+
+from .utils import get_setting, get_invalidation_mode, INVALIDATION_MODE_GENERATION
+
+logger = logging.getLogger(__name__)
+
+_INVALIDATION_CHANNEL = "local_cache__invalidation"
+LISTENER_RECONNECT_SECONDS = 1
+
+_local_cache = None
+_local_cache_lock = threading.Lock()
+
+
+class LocalCache:
+    """
+    In-process LRU cache bounded by the size of its values in bytes.
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """
+        :param key: cache key
+        :return: value or None, if it's missing or expired
+        """
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+
+            expires, size, value = item
+            if expires <= time.monotonic():
+                self._remove(key)
+                return None
+
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, timeout, size=None):
+        """
+        Saves the value and evicts least recently used values, until cache fits in max_bytes.
+        :param key: cache key
+        :param value: value to cache
+        :param timeout: timeout in seconds
+        :param size: size of the value in bytes. Size of pickled value is used, if not passed
+        """
+        if size is None:
+            size = len(pickle.dumps(value, pickle.HIGHEST_PROTOCOL))
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = (time.monotonic() + timeout, size, value)
+            self.size += size
+            while self.size > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def _remove(self, key):
+        item = self._entries.pop(key, None)
+        if item is not None:
+            self.size -= item[1]
+
+
+def get_local_cache():
+    """
+    Returns local cache of the process, if DRF_REDIS_CACHE_LOCAL_CACHE_MAX_BYTES setting is defined.
+    The first call starts a thread, which clears local cache, whenever any process invalidates cache.
+    :return: LocalCache or None
+    """
+    global _local_cache
+
+    max_bytes = get_setting('LOCAL_CACHE_MAX_BYTES', 0)
+    if not max_bytes:
+        return None
+
+    if _local_cache is None:
+        with _local_cache_lock:
+            if _local_cache is None:
+                local_cache = LocalCache(max_bytes)
+                threading.Thread(target=_listen_for_invalidations, args=(local_cache,), daemon=True).start()
+                _local_cache = local_cache
+
+    return _local_cache
+
+
+def publish_invalidation():
+    """
+    Notifies all the processes, that cache has been invalidated, so they clear their local cache.
+    Local cache of the current process is cleared immediately, so its next request reads its own writes.
+    Keys include generations in INVALIDATION_MODE_GENERATION, so local cache stays coherent without it.
+    """
+    if get_setting('LOCAL_CACHE_MAX_BYTES', 0) and get_invalidation_mode() != INVALIDATION_MODE_GENERATION:
+        if _local_cache is not None:
+            _local_cache.clear()
+        get_redis_connection().publish(_get_invalidation_channel(), 1)
+
+
+def _listen_for_invalidations(local_cache):
+    """
+    Clears local cache on every invalidation message. Reconnects, when connection is lost.
+    :param local_cache: LocalCache to clear
+    """
+    while True:
+        try:
+            pubsub = get_redis_connection().pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(_get_invalidation_channel())
+            # messages could have been missed while disconnected
+            local_cache.clear()
+            for _ in pubsub.listen():
+                local_cache.clear()
+        except Exception:
+            logger.exception('Local cache invalidation listener failed')
+            local_cache.clear()
+            time.sleep(LISTENER_RECONNECT_SECONDS)
+
+
+def _get_invalidation_channel():
+    return cache.make_key(_INVALIDATION_CHANNEL)
@@ -0,0 +1,264 @@
+import asyncio
+import logging
+import threading
+import time
+import uuid
+import weakref
+
+from django.core.cache import cache
+from django.db import connection
+from django_redis import get_redis_connection
+
+from .async_redis import get_async_redis_connection
+
+logger = logging.getLogger(__name__)
+
+_LOCK_PREFIX = "lock__"
+LOCK_POLL_INTERVAL = 0.05
+
+_RELEASE_LOCK_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+else
+    return 0
+end
+"""
+
+_flights = dict()
+_flights_lock = threading.Lock()
+_async_flights = weakref.WeakKeyDictionary()
+_background_tasks = set()
+
+
+class _Flight:
+    """
+    Computation of a single cache key in progress in the current process.
+    """
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+
+
+def get_or_compute_single_flight(cache_key, get_cached, compute, lock_timeout, wait_timeout):
+    """
+    Makes sure only one worker recomputes the cache key.
+    Threads of a process are coalesced - only the first one computes the value, the rest wait for it.
+    Processes are coordinated with a short redis lock with a token - the process holding the lock computes
+    the value, the rest poll cache for it. If the value doesn't appear within wait_timeout or the lock is released
+    without caching the value (e.g. the response isn't cacheable), it is computed anyway.
+    :param cache_key: cache key of the value
+    :param get_cached: function returning cached value or None
+    :param compute: function computing (and caching) the value
+    :param lock_timeout: time in seconds, after which the redis lock expires
+    :param wait_timeout: time in seconds, for which other workers wait for the value
+    :return: value
+    """
+    with _flights_lock:
+        flight = _flights.get(cache_key)
+        is_leader = flight is None
+        if is_leader:
+            flight = _flights[cache_key] = _Flight()
+
+    if not is_leader:
+        if flight.done.wait(wait_timeout) and flight.value is not None:
+            return flight.value
+        return compute()
+
+    try:
+        flight.value = _get_or_compute_with_lock(cache_key, get_cached, compute, lock_timeout, wait_timeout)
+        return flight.value
+    finally:
+        with _flights_lock:
+            _flights.pop(cache_key, None)
+        flight.done.set()
+
+
+def refresh_in_background(cache_key, compute, lock_timeout):
+    """
+    Recomputes the value in a background thread, unless another worker already refreshes it.
+    :param cache_key: cache key of the value
+    :param compute: function computing (and caching) the value
+    :param lock_timeout: time in seconds, after which the redis lock expires
+    :return: True if the refresh was started
+    """
+    token = acquire_lock(cache_key, lock_timeout)
+    if token is None:
+        return False
+
+    def refresh():
+        try:
+            compute()
+        except Exception:
+            logger.exception(f'Background refresh of {cache_key} failed')
+        finally:
+            release_lock(cache_key, token)
+            connection.close()
+
+    threading.Thread(target=refresh, daemon=True).start()
+    return True
+
+
+def acquire_lock(cache_key, timeout):
+    """
+    Acquires a redis lock of the cache key.
+    :param cache_key: cache key to lock
+    :param timeout: time in seconds, after which the lock expires
+    :return: token of the lock or None, if the lock is held by someone else
+    """
+    token = uuid.uuid4().hex
+    if get_redis_connection().set(_get_lock_key(cache_key), token, nx=True, px=int(timeout * 1000)):
+        return token
+    return None
+
+
+def release_lock(cache_key, token):
+    """
+    Releases a redis lock of the cache key, if it's still held with the token.
+    :param cache_key: locked cache key
+    :param token: token returned by acquire_lock
+    :return: True if the lock was released
+    """
+    redis_connection = get_redis_connection()
+    return bool(redis_connection.eval(_RELEASE_LOCK_SCRIPT, 1, _get_lock_key(cache_key), token))
+
+
+async def aget_or_compute_single_flight(cache_key, get_cached, compute, lock_timeout, wait_timeout):
+    """
+    Async version of get_or_compute_single_flight. Coroutines of an event loop are coalesced
+    and processes are coordinated with the same redis lock.
+    :param get_cached: coroutine function returning cached value or None
+    :param compute: coroutine function computing (and caching) the value
+    Other parameters have the same meaning as in get_or_compute_single_flight.
+    :return: value
+    """
+    loop = asyncio.get_running_loop()
+    flights = _async_flights.setdefault(loop, {})
+    flight = flights.get(cache_key)
+
+    if flight is not None:
+        try:
+            value = await asyncio.wait_for(asyncio.shield(flight), wait_timeout)
+        except asyncio.TimeoutError:
+            value = None
+        return value if value is not None else await compute()
+
+    flight = flights[cache_key] = loop.create_future()
+    value = None
+    try:
+        value = await _aget_or_compute_with_lock(cache_key, get_cached, compute, lock_timeout, wait_timeout)
+        return value
+    finally:
+        flights.pop(cache_key, None)
+        flight.set_result(value)
+
+
+async def arefresh_in_background(cache_key, compute, lock_timeout):
+    """
+    Async version of refresh_in_background. The value is recomputed in a task of the running event loop.
+    :param compute: coroutine function computing (and caching) the value
+    Other parameters have the same meaning as in refresh_in_background.
+    :return: True if the refresh was started
+    """
+    token = await aacquire_lock(cache_key, lock_timeout)
+    if token is None:
+        return False
+
+    async def refresh():
+        try:
+            await compute()
+        except Exception:
+            logger.exception(f'Background refresh of {cache_key} failed')
+        finally:
+            await arelease_lock(cache_key, token)
+
+    # event loop keeps only weak references to tasks
+    task = asyncio.ensure_future(refresh())
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+    return True
+
+
+async def aacquire_lock(cache_key, timeout):
+    """
+    Async version of acquire_lock.
+    :return: token of the lock or None, if the lock is held by someone else
+    """
+    token = uuid.uuid4().hex
+    if await get_async_redis_connection().set(_get_lock_key(cache_key), token, nx=True, px=int(timeout * 1000)):
+        return token
+    return None
+
+
+async def arelease_lock(cache_key, token):
+    """
+    Async version of release_lock.
+    :return: True if the lock was released
+    """
+    redis_connection = get_async_redis_connection()
+    return bool(await redis_connection.eval(_RELEASE_LOCK_SCRIPT, 1, _get_lock_key(cache_key), token))
+
+
+def _get_or_compute_with_lock(cache_key, get_cached, compute, lock_timeout, wait_timeout):
+    """
+    Computes the value holding the redis lock or waits for the value computed by the lock holder.
+    Waiting stops, when the lock is released or taken over (its token changes) without caching the value.
+    Parameters have the same meaning as in get_or_compute_single_flight.
+    :return: value
+    """
+    token = acquire_lock(cache_key, lock_timeout)
+    if token is not None:
+        try:
+            value = get_cached()
+            return value if value is not None else compute()
+        finally:
+            release_lock(cache_key, token)
+
+    redis_connection = get_redis_connection()
+    lock_key = _get_lock_key(cache_key)
+    current_token = leader_token = redis_connection.get(lock_key)
+    deadline = time.monotonic() + wait_timeout
+    while True:
+        # the lock is read before cache - the leader caches the value before releasing the lock
+        value = get_cached()
+        if value is not None:
+            return value
+        if current_token is None or current_token != leader_token or time.monotonic() >= deadline:
+            return compute()
+        time.sleep(LOCK_POLL_INTERVAL)
+        current_token = redis_connection.get(lock_key)
+
+
+async def _aget_or_compute_with_lock(cache_key, get_cached, compute, lock_timeout, wait_timeout):
+    """
+    Async version of _get_or_compute_with_lock.
+    :return: value
+    """
+    token = await aacquire_lock(cache_key, lock_timeout)
+    if token is not None:
+        try:
+            value = await get_cached()
+            return value if value is not None else await compute()
+        finally:
+            await arelease_lock(cache_key, token)
+
+    redis_connection = get_async_redis_connection()
+    lock_key = _get_lock_key(cache_key)
+    current_token = leader_token = await redis_connection.get(lock_key)
+    deadline = time.monotonic() + wait_timeout
+    while True:
+        value = await get_cached()
+        if value is not None:
+            return value
+        if current_token is None or current_token != leader_token or time.monotonic() >= deadline:
+            return await compute()
+        await asyncio.sleep(LOCK_POLL_INTERVAL)
+        current_token = await redis_connection.get(lock_key)
+
+
+def _get_lock_key(cache_key):
+    """
+    :param cache_key: cache key to lock
+    :return: redis key of the lock
+    """
+    return cache.make_key(f'{_LOCK_PREFIX}{cache_key}')
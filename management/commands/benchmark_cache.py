@@ -0,0 +1,57 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ...benchmarks import (compare_benchmark_results,
+                           run_benchmarks,
+                           DEFAULT_DEPENDENT_RATIO,
+                           DEFAULT_INVALIDATION_REPEATS,
+                           DEFAULT_ITERATIONS,
+                           DEFAULT_KEYSPACE_SIZES,
+                           DEFAULT_PAYLOAD_SIZES,
+                           )
+
+
+def _sizes(value):
+    return tuple(int(size) for size in value.split(','))
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks the cache against the default cache (local redis or fakeredis) and prints results as JSON.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=DEFAULT_ITERATIONS,
+                            help='Number of measured calls of each benchmark.')
+        parser.add_argument('--payload-sizes', type=_sizes, default=DEFAULT_PAYLOAD_SIZES,
+                            help='Comma separated sizes of serialized responses in bytes.')
+        parser.add_argument('--keyspace-sizes', type=_sizes, default=DEFAULT_KEYSPACE_SIZES,
+                            help='Comma separated numbers of keys in redis, e.g. 1000,100000,10000000.')
+        parser.add_argument('--dependent-ratio', type=float, default=DEFAULT_DEPENDENT_RATIO,
+                            help='Part of the keyspace depending on the invalidated model.')
+        parser.add_argument('--invalidation-repeats', type=int, default=DEFAULT_INVALIDATION_REPEATS,
+                            help='Number of measured invalidations for each keyspace size.')
+        parser.add_argument('--output', default=None,
+                            help='File, which results are written to. Printed to stdout by default.')
+        parser.add_argument('--compare', default=None,
+                            help='File with results of a baseline run. The command fails, if any benchmark regressed.')
+        parser.add_argument('--threshold', type=float, default=0.2,
+                            help='Allowed relative slowdown in comparison with the baseline (0.2 - 20%%).')
+
+    def handle(self, *args, **options):
+        results = run_benchmarks(iterations=options['iterations'],
+                                 payload_sizes=options['payload_sizes'],
+                                 keyspace_sizes=options['keyspace_sizes'],
+                                 dependent_ratio=options['dependent_ratio'],
+                                 invalidation_repeats=options['invalidation_repeats'])
+
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                json.dump(results, output, indent=2)
+        else:
+            self.stdout.write(json.dumps(results, indent=2))
+
+        if options['compare']:
+            with open(options['compare']) as baseline:
+                regressions = compare_benchmark_results(json.load(baseline), results, options['threshold'])
+            if regressions:
+                raise CommandError(f'Benchmarks regressed: {json.dumps(regressions)}')
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from ...invalidation_queue import process_redis_invalidation_queue
+
+
+class Command(BaseCommand):
+    help = 'Executes cache invalidations pushed to the redis invalidation queue.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--max-events', type=int, default=None,
+                            help='Number of events, after which the worker exits. Runs forever by default.')
+
+    def handle(self, *args, **options):
+        processed_events = process_redis_invalidation_queue(max_events=options['max_events'])
+        self.stdout.write(f'Processed {processed_events} invalidation events.')
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from ...tags import sweep_stale_tag_members
+
+
+class Command(BaseCommand):
+    help = 'Removes keys, which no longer exist, from cache tag sets.'
+
+    def handle(self, *args, **options):
+        removed_members = sweep_stale_tag_members()
+        self.stdout.write(f'Removed {removed_members} stale tag members.')
@@ -0,0 +1,217 @@
+import bisect
+import threading
+from collections import defaultdict
+
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.http import HttpResponse, Http404
+from django.utils.module_loading import import_string
+
+from .utils import get_setting
+
+METRIC_HITS = "hits"
+METRIC_MISSES = "misses"
+METRIC_STALE_HITS = "stale_hits"
+METRIC_BYPASSES = "bypasses"
+METRIC_STORED_BYTES = "stored_bytes"
+METRIC_REDIS_LATENCY = "redis_latency_seconds"
+METRIC_COMPUTE_TIME = "compute_time_seconds"
+METRIC_INVALIDATIONS = "invalidations"
+METRIC_INVALIDATION_QUEUE_DEPTH = "invalidation_queue_depth"
+METRIC_INVALIDATION_QUEUE_LAG = "invalidation_queue_lag_seconds"
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+HISTOGRAM_BUCKETS = {
+    METRIC_STORED_BYTES: SIZE_BUCKETS,
+    METRIC_REDIS_LATENCY: LATENCY_BUCKETS,
+    METRIC_COMPUTE_TIME: LATENCY_BUCKETS,
+    METRIC_INVALIDATION_QUEUE_LAG: LATENCY_BUCKETS,
+}
+
+_PROMETHEUS_PREFIX = "drf_redis_cache_"
+
+_backend = None
+_backend_loaded = False
+_backend_lock = threading.Lock()
+
+
+class MetricsBackend:
+    """
+    Base class of metrics backends. Backends receive counters, histogram observations and gauges
+    with a dict of labels (e.g. view, tier, reason, operation).
+    """
+
+    def increment(self, name, labels, value=1):
+        raise NotImplementedError
+
+    def observe(self, name, labels, value):
+        raise NotImplementedError
+
+    def set_gauge(self, name, labels, value):
+        raise NotImplementedError
+
+
+class PrometheusMetrics(MetricsBackend):
+    """
+    In-process metrics backend, which renders metrics in Prometheus text format (see metrics_view).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = defaultdict(float)
+        self._gauges = dict()
+        self._histograms = dict()
+
+    def increment(self, name, labels, value=1):
+        with self._lock:
+            self._counters[(name, _freeze_labels(labels))] += value
+
+    def observe(self, name, labels, value):
+        buckets = HISTOGRAM_BUCKETS.get(name, LATENCY_BUCKETS)
+        key = (name, _freeze_labels(labels))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                # counts of buckets, +Inf bucket, sum
+                histogram = self._histograms[key] = [0] * (len(buckets) + 1) + [0.0]
+            histogram[bisect.bisect_left(buckets, value)] += 1
+            histogram[-1] += value
+
+    def set_gauge(self, name, labels, value):
+        with self._lock:
+            self._gauges[(name, _freeze_labels(labels))] = value
+
+    def render(self):
+        """
+        :return: all the metrics in Prometheus text exposition format
+        """
+        with self._lock:
+            counters = sorted(self._counters.items())
+            gauges = sorted(self._gauges.items())
+            histograms = sorted((key, list(histogram)) for key, histogram in self._histograms.items())
+
+        lines = []
+        _render_samples(lines, counters, 'counter', suffix='_total')
+        _render_samples(lines, gauges, 'gauge')
+
+        rendered_names = set()
+        for (name, labels), histogram in histograms:
+            metric_name = f'{_PROMETHEUS_PREFIX}{name}'
+            if name not in rendered_names:
+                lines.append(f'# TYPE {metric_name} histogram')
+                rendered_names.add(name)
+
+            buckets = HISTOGRAM_BUCKETS.get(name, LATENCY_BUCKETS)
+            cumulative_count = 0
+            for upper_bound, count in zip(buckets + ('+Inf', ), histogram):
+                cumulative_count += count
+                bucket_labels = labels + (('le', str(upper_bound)), )
+                lines.append(f'{metric_name}_bucket{_format_labels(bucket_labels)} {cumulative_count}')
+            lines.append(f'{metric_name}_sum{_format_labels(labels)} {histogram[-1]}')
+            lines.append(f'{metric_name}_count{_format_labels(labels)} {cumulative_count}')
+
+        return '\n'.join(lines) + '\n'
+
+
+def get_metrics_backend():
+    """
+    Returns metrics backend defined by DRF_REDIS_CACHE_METRICS_BACKEND setting (dotted path to a MetricsBackend class,
+    e.g. 'drf_redis_cache_decorator.metrics.PrometheusMetrics'). None - metrics are disabled (default).
+    :return: MetricsBackend or None
+    """
+    global _backend, _backend_loaded
+
+    if not _backend_loaded:
+        with _backend_lock:
+            if not _backend_loaded:
+                backend_path = get_setting('METRICS_BACKEND', None)
+                _backend = import_string(backend_path)() if backend_path else None
+                _backend_loaded = True
+
+    return _backend
+
+
+def increment(name, value=1, **labels):
+    """
+    Increments a counter, if metrics are enabled.
+    :param name: name of the metric
+    :param value: value to add
+    :param labels: labels of the metric
+    """
+    backend = get_metrics_backend()
+    if backend is not None:
+        backend.increment(name, labels, value)
+
+
+def observe(name, value, **labels):
+    """
+    Records an observation of a histogram, if metrics are enabled.
+    :param name: name of the metric
+    :param value: observed value
+    :param labels: labels of the metric
+    """
+    backend = get_metrics_backend()
+    if backend is not None:
+        backend.observe(name, labels, value)
+
+
+def set_gauge(name, value, **labels):
+    """
+    Sets a gauge, if metrics are enabled.
+    :param name: name of the metric
+    :param value: current value
+    :param labels: labels of the metric
+    """
+    backend = get_metrics_backend()
+    if backend is not None:
+        backend.set_gauge(name, labels, value)
+
+
+def metrics_view(request):
+    """
+    Django view exposing metrics of PrometheusMetrics backend, e.g.
+    path('metrics/', metrics_view)
+    :param request: request sent by client
+    :return: HttpResponse with metrics in Prometheus text format
+    """
+    backend = get_metrics_backend()
+    if not hasattr(backend, 'render'):
+        raise Http404('Metrics backend doesn\'t render metrics')
+    return HttpResponse(backend.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+@receiver(setting_changed)
+def _reset_metrics_backend(setting, **kwargs):
+    global _backend, _backend_loaded
+
+    if setting == 'DRF_REDIS_CACHE_METRICS_BACKEND':
+        with _backend_lock:
+            _backend = None
+            _backend_loaded = False
+
+
+def _freeze_labels(labels):
+    return tuple(sorted(labels.items()))
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    formatted_labels = ','.join(f'{name}="{_escape_label_value(value)}"' for name, value in labels)
+    return f'{{{formatted_labels}}}'
+
+
+def _escape_label_value(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _render_samples(lines, samples, metric_type, suffix=''):
+    rendered_names = set()
+    for (name, labels), value in samples:
+        metric_name = f'{_PROMETHEUS_PREFIX}{name}{suffix}'
+        if name not in rendered_names:
+            lines.append(f'# TYPE {metric_name} {metric_type}')
+            rendered_names.add(name)
+        lines.append(f'{metric_name}{_format_labels(labels)} {value}')
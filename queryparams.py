@@ -0,0 +1,79 @@
+from fnmatch import fnmatchcase
+from functools import lru_cache
+
+QUERYPARAMS_CACHE_SIZE = 1024
+
+
+def get_normalized_queryparams(query_params, allowed_queryparams=None, ignored_queryparams=(), normalizers=None):
+    """
+    Returns query params, which should be a part of cache key. Repeated params keep all their values,
+    so the order of params (and of values of multi-valued params) doesn't matter.
+    :param query_params: QueryDict with query params of the request
+    :param allowed_queryparams: tuple of names (or fnmatch patterns) of params, which are cached.
+    None - all the params are cached
+    :param ignored_queryparams: tuple of names (or fnmatch patterns) of params, which are never cached
+    :param normalizers: dict mapping param names to functions, which normalize their values.
+    Values normalized to None are skipped
+    :return: sorted list of (name, value) tuples
+    """
+    normalizers = normalizers or {}
+    normalized_queryparams = []
+
+    for name, values in query_params.lists():
+        if not _is_queryparam_cached(name, allowed_queryparams, ignored_queryparams):
+            continue
+
+        normalizer = normalizers.get(name)
+        if normalizer is not None:
+            values = [normalizer(value) for value in values]
+
+        normalized_queryparams.extend((name, value) for value in values if value is not None)
+
+    return sorted(normalized_queryparams)
+
+
+def lowercase(value):
+    """
+    Normalizer treating values case insensitively.
+    """
+    return value.lower()
+
+
+def integer(value):
+    """
+    Normalizer treating integer values with leading zeros, signs or whitespaces as equal.
+    Values, which aren't integers, are left as they are.
+    """
+    try:
+        return str(int(value))
+    except ValueError:
+        return value
+
+
+def skip_values(*skipped_values, normalizer=None):
+    """
+    Creates normalizer skipping given values (e.g. defaults of the view), so requests with and without them
+    share the cache.
+    :param skipped_values: values, which should be skipped
+    :param normalizer: optional normalizer applied before comparison with skipped values
+    :return: normalizer
+    """
+    def normalize(value):
+        if normalizer is not None:
+            value = normalizer(value)
+        return None if value in skipped_values else value
+
+    return normalize
+
+
+@lru_cache(maxsize=QUERYPARAMS_CACHE_SIZE)
+def _is_queryparam_cached(name, allowed_queryparams, ignored_queryparams):
+    """
+    :param name: name of the query param
+    :param allowed_queryparams: tuple of names (or patterns) of cached params. None - all
+    :param ignored_queryparams: tuple of names (or patterns) of params, which are never cached
+    :return: True if the param should be a part of cache key
+    """
+    if any(fnmatchcase(name, pattern) for pattern in ignored_queryparams):
+        return False
+    return allowed_queryparams is None or any(fnmatchcase(name, pattern) for pattern in allowed_queryparams)
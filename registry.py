@@ -0,0 +1,93 @@
+from collections import defaultdict
+from importlib import import_module
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.urls import get_resolver
+
+from .key_construction import get_model_cache_key
+from .utils import get_setting
+
+_instance_parameters = defaultdict(set)
+_model_dependencies = set()
+_observed_models = dict()
+_observers = []
+
+
+def register_instance_parameter(model, instance_unique_parameter):
+    """
+    Registers a parameter used by an instance-scoped view to identify an instance of the model.
+    :param model: model, which instances are identified by the parameter
+    :param instance_unique_parameter: string, representing an unique parameter of an instance
+    """
+    _instance_parameters[get_model_cache_key(model)].add(instance_unique_parameter)
+
+
+def get_instance_parameters(model):
+    """
+    Returns all the parameters used by instance-scoped views to identify instances of the model.
+    :param model: Model class
+    :return: set of parameters
+    """
+    return _instance_parameters.get(get_model_cache_key(model), set())
+
+
+def register_model_dependencies(model_dependencies, cache_user=False):
+    """
+    Registers models, on which a decorated view depends.
+    User model is observed as well, when the view is cached per user.
+    :param model_dependencies: model dependencies passed to the decorator
+    :param cache_user: defines, whether view is cached per user
+    """
+    for model in model_dependencies:
+        _model_dependencies.add(get_model_cache_key(model))
+        _observe_model(model)
+
+    if cache_user:
+        _observe_model(get_user_model())
+
+
+def is_model_dependency(model):
+    """
+    :param model: Model class
+    :return: True if any decorated view depends on the model
+    """
+    return get_model_cache_key(model) in _model_dependencies
+
+
+def subscribe_to_observed_models(callback):
+    """
+    Calls the callback with every observed model - those already registered
+    and those, which are going to be registered later (views are usually imported after apps are ready).
+    :param callback: function taking a model class
+    """
+    _observers.append(callback)
+    for model in list(_observed_models.values()):
+        callback(model)
+
+
+def load_model_dependencies():
+    """
+    Imports decorated views by loading the URLconf (unless DRF_REDIS_CACHE_LOAD_URLCONF setting is False)
+    and modules listed in DRF_REDIS_CACHE_VIEW_MODULES setting, so model dependencies are registered
+    in every process - also in those, which never handle requests (Celery workers, shell, migrations).
+    """
+    for module_name in get_setting('VIEW_MODULES', ()):
+        import_module(module_name)
+
+    if get_setting('LOAD_URLCONF', True) and getattr(settings, 'ROOT_URLCONF', None):
+        get_resolver().url_patterns
+
+
+def _observe_model(model):
+    """
+    Adds the model to observed models and notifies subscribers about it.
+    :param model: Model class
+    """
+    model_name = get_model_cache_key(model)
+    if model_name in _observed_models:
+        return
+
+    _observed_models[model_name] = model
+    for callback in _observers:
+        callback(model)
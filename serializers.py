@@ -0,0 +1,194 @@
+import json
+import pickle
+import struct
+import uuid
+from inspect import signature
+
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework.response import Response
+
+from .entries import ENTRY_RESPONSE as _ENTRY_RESPONSE
+from .utils import get_setting
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+SERIALIZER_PICKLE = 'pickle'
+SERIALIZER_JSON = 'json'
+SERIALIZER_MSGPACK = 'msgpack'
+
+RENDERED_CONTENT = "rendered_content"
+
+_FORMAT_PICKLE = b'p'
+_FORMAT_JSON = b'j'
+_FORMAT_MSGPACK = b'm'
+_FORMAT_RENDERED_JSON = b'r'
+
+_RENDERED_LENGTH = struct.Struct('>I')
+# types orjson would serialize differently from stdlib json are passed to _orjson_default
+_ORJSON_OPTIONS = ((orjson.OPT_PASSTHROUGH_DATETIME
+                    | orjson.OPT_PASSTHROUGH_DATACLASS
+                    | orjson.OPT_PASSTHROUGH_SUBCLASS)
+                   if orjson is not None else 0)
+_RESPONSE_DEFAULTS = {name: parameter.default for name, parameter in signature(Response).parameters.items()}
+
+
+def dumps_entry(entry):
+    """
+    Serializes cache entry with the serializer defined by DRF_REDIS_CACHE_SERIALIZER setting
+    (SERIALIZER_PICKLE, SERIALIZER_JSON or SERIALIZER_MSGPACK). Default = SERIALIZER_PICKLE.
+    The first byte of the payload marks its format. Entries, which can't be represented
+    by the chosen format, are pickled.
+    :param entry: cache entry
+    :return: payload (bytes)
+    """
+    entry = {**entry, _ENTRY_RESPONSE: pack_response_dict(entry[_ENTRY_RESPONSE])}
+    serializer = get_setting('SERIALIZER', SERIALIZER_PICKLE)
+
+    try:
+        if serializer == SERIALIZER_JSON:
+            return _dumps_json_entry(entry)
+        if serializer == SERIALIZER_MSGPACK:
+            if msgpack is None:
+                raise ImproperlyConfigured('msgpack serializer requires msgpack package')
+            _check_values(entry)
+            return _FORMAT_MSGPACK + msgpack.packb(entry, use_bin_type=True)
+    except (TypeError, ValueError, OverflowError):
+        pass
+
+    return _FORMAT_PICKLE + pickle.dumps(entry, pickle.HIGHEST_PROTOCOL)
+
+
+def loads_entry(payload):
+    """
+    Deserializes cache entry saved with any of the serializers.
+    :param payload: payload returned by dumps_entry
+    :return: cache entry or None, if the payload has unknown format
+    """
+    payload_format, body = payload[:1], memoryview(payload)[1:]
+
+    if payload_format == _FORMAT_PICKLE:
+        return pickle.loads(body)
+    if payload_format == _FORMAT_JSON:
+        return _loads_json(body)
+    if payload_format == _FORMAT_RENDERED_JSON:
+        meta_length = _RENDERED_LENGTH.unpack_from(body)[0]
+        meta_end = _RENDERED_LENGTH.size + meta_length
+        entry = _loads_json(body[_RENDERED_LENGTH.size:meta_end])
+        entry[_ENTRY_RESPONSE][RENDERED_CONTENT] = bytes(body[meta_end:])
+        return entry
+    if payload_format == _FORMAT_MSGPACK and msgpack is not None:
+        return msgpack.unpackb(body, raw=False, strict_map_key=False)
+
+    return None
+
+
+def pack_response_dict(response_dict):
+    """
+    Leaves only the fields of response dict needed to rebuild the response
+    (fields with default values of Response are skipped) and flattens headers to name: value pairs.
+    :param response_dict: dict returned by _get_response_dict or _get_rendered_response_dict
+    :return: packed response dict
+    """
+    if RENDERED_CONTENT in response_dict:
+        return response_dict
+
+    packed_response_dict = {name: value for name, value in response_dict.items()
+                            if name not in _RESPONSE_DEFAULTS or value != _RESPONSE_DEFAULTS[name]}
+    if packed_response_dict.get("headers"):
+        packed_response_dict["headers"] = _pack_headers(packed_response_dict["headers"])
+    return packed_response_dict
+
+
+def _pack_headers(headers):
+    """
+    :param headers: headers dict (older Django versions map lowercase names to (name, value) tuples)
+    :return: dict of header names and values
+    """
+    return dict(value if isinstance(value, tuple) else (name, value) for name, value in headers.items())
+
+
+def _dumps_json_entry(entry):
+    """
+    Serializes cache entry to JSON (with orjson, if it's installed).
+    Rendered content is appended as raw bytes after JSON with the rest of the entry.
+    :param entry: cache entry with packed response dict
+    :return: payload (bytes)
+    """
+    response_dict = entry[_ENTRY_RESPONSE]
+    if RENDERED_CONTENT not in response_dict:
+        return _FORMAT_JSON + _dumps_json(entry)
+
+    meta = {**entry, _ENTRY_RESPONSE: {name: value for name, value in response_dict.items()
+                                       if name != RENDERED_CONTENT}}
+    meta_payload = _dumps_json(meta)
+    return b''.join((_FORMAT_RENDERED_JSON,
+                     _RENDERED_LENGTH.pack(len(meta_payload)),
+                     meta_payload,
+                     response_dict[RENDERED_CONTENT]))
+
+
+def _dumps_json(value):
+    """
+    Serializes value to JSON. Only types, which stdlib json module represents natively, are accepted,
+    so values (such as datetime or UUID), which would be restored in a different form, are pickled
+    regardless of whether orjson is installed.
+    :param value: value to serialize
+    :return: JSON (bytes)
+    :raises TypeError: if the value contains an unsupported type
+    """
+    _check_values(value, reject_uuid=orjson is not None)
+    if orjson is not None:
+        return orjson.dumps(value, default=_orjson_default, option=_ORJSON_OPTIONS)
+    return json.dumps(value, separators=(',', ':'), allow_nan=False).encode()
+
+
+def _orjson_default(value):
+    """
+    Converts subclasses of builtin types (passed through by OPT_PASSTHROUGH_SUBCLASS),
+    the same way stdlib json module encodes them.
+    """
+    if isinstance(value, dict):
+        return dict(value)
+    if isinstance(value, list):
+        return list(value)
+    if isinstance(value, str):
+        return str.__str__(value)
+    if isinstance(value, int) and not isinstance(value, bool):
+        return int.__int__(value)
+    raise TypeError(f'{type(value).__name__} is not JSON serializable')
+
+
+def _check_values(value, reject_uuid=False):
+    """
+    Detects values, which JSON and msgpack would restore in a different form: dicts with keys other than strings
+    (stdlib json converts them to strings, msgpack can't load them by default) and UUID, which orjson serializes
+    natively (with no passthrough option).
+    :param value: value to serialize
+    :param reject_uuid: defines, whether UUID should be rejected
+    :raises TypeError: if the value contains such a dict or UUID
+    """
+    values = [value]
+    while values:
+        value = values.pop()
+        if isinstance(value, dict):
+            if not all(isinstance(key, str) for key in value):
+                raise TypeError('keys other than strings are not supported')
+            values.extend(value.values())
+        elif isinstance(value, (list, tuple)):
+            values.extend(value)
+        elif reject_uuid and isinstance(value, uuid.UUID):
+            raise TypeError('UUID is not JSON serializable')
+
+
+def _loads_json(body):
+    if orjson is not None:
+        return orjson.loads(body)
+    return json.loads(bytes(body))
@@ -21,7 +21,7 @@ setup(
     classifiers=[
         'Environment :: Web Environment',
         'Framework :: Django',
-        'Framework :: Django :: 2.0',
+        'Framework :: Django :: 3.2',
         'Intended Audience :: Developers',
         'License :: MIT',
         'Operating System :: OS Independent',
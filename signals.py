@@ -1,22 +1,37 @@
 from django.contrib.auth import get_user_model
 from django.db.models.signals import post_save, post_delete
-from django.dispatch import receiver
 
-from .invalidation import invalidate_model_cache, invalidate_user_related_cache
+from .invalidation import invalidate_instance_cache, invalidate_user_related_cache, invalidate_on_commit
+from .key_construction import get_model_cache_key
+from .registry import is_model_dependency
 
 user_model = get_user_model()
 
 
-@receiver((post_save, post_delete))
+def connect_model_cache_signals(model):
+    """
+    Connects invalidate_model_cache_signal to post_save and post_delete signals of the model only,
+    so saving models, which no decorated view depends on, costs nothing.
+    :param model: Model class
+    """
+    dispatch_uid = f'drf_redis_cache_decorator.{get_model_cache_key(model)}'
+    post_save.connect(invalidate_model_cache_signal, sender=model, dispatch_uid=dispatch_uid)
+    post_delete.connect(invalidate_model_cache_signal, sender=model, dispatch_uid=dispatch_uid)
+
+
 def invalidate_model_cache_signal(sender, *args, **kwargs):
     """
-    Receiver responsible for invalidating all the cache related to the specific model.
+    Receiver responsible for invalidating the cache related to the specific instance
+    and the cache of collection-scoped views, which depend on the instance's model.
     If User Model sends the signal, function additionaly invalidates all the cache related to that specific user.
+    Within a transaction invalidations are collected and executed once, when it's committed.
     :param sender: Model, which sends the signal
     :param args: all the arguments
     :param kwargs: all the key word arguments
     """
-    invalidate_model_cache(sender)
-    if issubclass(sender, user_model):
-        user = kwargs.get('instance')
-        invalidate_user_related_cache(user)
+    with invalidate_on_commit(using=kwargs.get('using')):
+        if is_model_dependency(sender):
+            invalidate_instance_cache(kwargs.get('instance'))
+        if issubclass(sender, user_model):
+            user = kwargs.get('instance')
+            invalidate_user_related_cache(user)
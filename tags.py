@@ -0,0 +1,212 @@
+import random
+
+from django.core.cache import cache
+from django_redis import get_redis_connection
+
+from .async_redis import get_async_redis_connection
+from .utils import get_redis_timeout, get_setting
+
+_TAG_PREFIX = "tag__"
+_TAGS_INDEX_KEY = "tags__index"
+
+UNLINK_BATCH_SIZE = 1000
+SWEEP_BATCH_SIZE = 1000
+
+
+def set_cache_with_tags(cache_key, payload, timeout, tags, related_payloads=None):
+    """
+    Saves the serialized value in cache and registers its key in sets of all the tags.
+    Everything is sent in a single pipeline.
+    Occasionally (DRF_REDIS_CACHE_TAG_SWEEP_PROBABILITY, default 0.01) sweeps a sample of a random tag set.
+    :param cache_key: cache key of the value
+    :param payload: serialized value to cache (bytes)
+    :param timeout: timeout in seconds
+    :param tags: iterable of tags of the entry
+    :param related_payloads: dict mapping cache keys to payloads saved along with the value
+    (with the same timeout and tags, e.g. metadata of the value). None - no related payloads.
+    Timeouts shorter than a second aren't accepted by redis, so the keys are deleted instead (like cache.set does).
+    """
+    redis_connection = get_redis_connection()
+    timeout = get_redis_timeout(timeout)
+    made_keys = {cache.make_key(cache_key): payload}
+    for related_key, related_payload in (related_payloads or {}).items():
+        made_keys[cache.make_key(related_key)] = related_payload
+    if timeout <= 0:
+        redis_connection.unlink(*made_keys)
+        return
+    tag_keys = [_get_tag_set_key(tag) for tag in tags]
+
+    pipeline = redis_connection.pipeline(transaction=False)
+    for made_key, made_key_payload in made_keys.items():
+        pipeline.set(made_key, made_key_payload, ex=timeout)
+    for tag_key in tag_keys:
+        pipeline.sadd(tag_key, *made_keys)
+    if tag_keys:
+        pipeline.sadd(_get_tags_index_key(), *tag_keys)
+    pipeline.execute()
+
+    if random.random() < get_setting('TAG_SWEEP_PROBABILITY', 0.01):
+        sweep_random_tag_set()
+
+
+async def aset_cache_with_tags(cache_key, payload, timeout, tags, related_payloads=None):
+    """
+    Async version of set_cache_with_tags. Parameters have the same meaning as in set_cache_with_tags.
+    """
+    timeout = get_redis_timeout(timeout)
+    made_keys = {cache.make_key(cache_key): payload}
+    for related_key, related_payload in (related_payloads or {}).items():
+        made_keys[cache.make_key(related_key)] = related_payload
+    if timeout <= 0:
+        await get_async_redis_connection().unlink(*made_keys)
+        return
+    tag_keys = [_get_tag_set_key(tag) for tag in tags]
+
+    pipeline = get_async_redis_connection().pipeline(transaction=False)
+    for made_key, made_key_payload in made_keys.items():
+        pipeline.set(made_key, made_key_payload, ex=timeout)
+    for tag_key in tag_keys:
+        pipeline.sadd(tag_key, *made_keys)
+    if tag_keys:
+        pipeline.sadd(_get_tags_index_key(), *tag_keys)
+    await pipeline.execute()
+
+    if random.random() < get_setting('TAG_SWEEP_PROBABILITY', 0.01):
+        await asweep_random_tag_set()
+
+
+def invalidate_tags(tags):
+    """
+    Invalidates all the entries registered in sets of given tags.
+    Members of the sets are fetched with SMEMBERS and removed with batched UNLINK and SREM.
+    Only the fetched members are removed from the sets, so entries registered concurrently
+    (between SMEMBERS and SREM) stay in the sets and are reached by the next invalidation.
+    Emptied sets are removed by redis. The sets are removed from the index of tag sets as well
+    (the next write of a tagged entry adds its set to the index again).
+    :param tags: iterable of tags to invalidate
+    """
+    redis_connection = get_redis_connection()
+    tag_keys = [_get_tag_set_key(tag) for tag in tags]
+    if not tag_keys:
+        return
+
+    pipeline = redis_connection.pipeline(transaction=False)
+    for tag_key in tag_keys:
+        pipeline.smembers(tag_key)
+    members_by_tag_key = dict(zip(tag_keys, pipeline.execute()))
+
+    keys_to_unlink = list(set().union(*members_by_tag_key.values()))
+    for start in range(0, len(keys_to_unlink), UNLINK_BATCH_SIZE):
+        pipeline.unlink(*keys_to_unlink[start:start + UNLINK_BATCH_SIZE])
+    for tag_key, members in members_by_tag_key.items():
+        members = list(members)
+        for start in range(0, len(members), UNLINK_BATCH_SIZE):
+            pipeline.srem(tag_key, *members[start:start + UNLINK_BATCH_SIZE])
+    pipeline.srem(_get_tags_index_key(), *tag_keys)
+    pipeline.execute()
+
+
+def sweep_stale_tag_members():
+    """
+    Removes keys, which no longer exist (expired or evicted), from all the tag sets.
+    Empty tag sets are removed.
+    :return: number of removed members
+    """
+    redis_connection = get_redis_connection()
+    removed_members = 0
+    for tag_key in redis_connection.sscan_iter(_get_tags_index_key(), count=SWEEP_BATCH_SIZE):
+        removed_members += _sweep_tag_set(redis_connection, tag_key)
+    return removed_members
+
+
+def sweep_random_tag_set():
+    """
+    Removes stale members of one random tag set. Only a random sample (SRANDMEMBER of SWEEP_BATCH_SIZE members)
+    of the set is checked, so sweeps on writes have bounded latency - full sweeps are left to sweep_stale_tag_members.
+    :return: number of removed members
+    """
+    redis_connection = get_redis_connection()
+    tag_key = redis_connection.srandmember(_get_tags_index_key())
+    if tag_key is None:
+        return 0
+
+    members = redis_connection.srandmember(tag_key, SWEEP_BATCH_SIZE)
+    removed_members = 0
+    if members:
+        pipeline = redis_connection.pipeline(transaction=False)
+        for member in members:
+            pipeline.exists(member)
+        stale_members = [member for member, exists in zip(members, pipeline.execute()) if not exists]
+        if stale_members:
+            removed_members = redis_connection.srem(tag_key, *stale_members)
+
+    if not redis_connection.exists(tag_key):
+        redis_connection.srem(_get_tags_index_key(), tag_key)
+
+    return removed_members
+
+
+async def asweep_random_tag_set():
+    """
+    Async version of sweep_random_tag_set.
+    :return: number of removed members
+    """
+    redis_connection = get_async_redis_connection()
+    tag_key = await redis_connection.srandmember(_get_tags_index_key())
+    if tag_key is None:
+        return 0
+
+    members = await redis_connection.srandmember(tag_key, SWEEP_BATCH_SIZE)
+    removed_members = 0
+    if members:
+        pipeline = redis_connection.pipeline(transaction=False)
+        for member in members:
+            pipeline.exists(member)
+        stale_members = [member for member, exists in zip(members, await pipeline.execute()) if not exists]
+        if stale_members:
+            removed_members = await redis_connection.srem(tag_key, *stale_members)
+
+    if not await redis_connection.exists(tag_key):
+        await redis_connection.srem(_get_tags_index_key(), tag_key)
+
+    return removed_members
+
+
+def _sweep_tag_set(redis_connection, tag_key):
+    """
+    Removes keys, which no longer exist, from the tag set.
+    :param redis_connection: redis connection
+    :param tag_key: key of the tag set
+    :return: number of removed members
+    """
+    removed_members = 0
+    members = list(redis_connection.sscan_iter(tag_key, count=SWEEP_BATCH_SIZE))
+
+    for start in range(0, len(members), SWEEP_BATCH_SIZE):
+        batch = members[start:start + SWEEP_BATCH_SIZE]
+        pipeline = redis_connection.pipeline(transaction=False)
+        for member in batch:
+            pipeline.exists(member)
+        stale_members = [member for member, exists in zip(batch, pipeline.execute()) if not exists]
+        if stale_members:
+            removed_members += redis_connection.srem(tag_key, *stale_members)
+
+    if not redis_connection.exists(tag_key):
+        redis_connection.srem(_get_tags_index_key(), tag_key)
+
+    return removed_members
+
+
+def _get_tag_set_key(tag):
+    """
+    :param tag: tag of cache entries
+    :return: redis key of the tag's set
+    """
+    return cache.make_key(f'{_TAG_PREFIX}{tag}')
+
+
+def _get_tags_index_key():
+    """
+    :return: redis key of the set of all the tag sets
+    """
+    return cache.make_key(_TAGS_INDEX_KEY)
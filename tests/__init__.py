@@ -1,3 +1,17 @@
 from .key_construction import *
 from .utils import *
 from .invalidation import *
+from .registry import *
+from .tags import *
+from .decorators import *
+from .locks import *
+from .entries import *
+from .local_cache import *
+from .serializers import *
+from .compression import *
+from .queryparams import *
+from .audiences import *
+from .invalidation_queue import *
+from .metrics import *
+from .admission import *
+from .benchmarks import *
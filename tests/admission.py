@@ -0,0 +1,28 @@
+from django.core.cache import cache
+from django.test import override_settings
+from rest_framework.test import APITestCase
+
+from ..admission import admit_cache_key, ADMISSION_SKETCH_LOCAL
+
+
+class TestAdmission(APITestCase):
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_admit_cache_key_admits_key_after_admission_requests(self):
+        admissions = [admit_cache_key('admitted_key', 3) for _ in range(4)]
+
+        self.assertEqual(admissions, [False, False, True, True])
+
+    def test_admit_cache_key_counts_keys_separately(self):
+        admit_cache_key('first_key', 2)
+
+        self.assertFalse(admit_cache_key('second_key', 2))
+
+    @override_settings(DRF_REDIS_CACHE_ADMISSION_SKETCH=ADMISSION_SKETCH_LOCAL)
+    def test_admit_cache_key_with_local_sketch_admits_key_after_admission_requests(self):
+        admissions = [admit_cache_key('local_admitted_key', 2) for _ in range(3)]
+
+        self.assertEqual(admissions, [False, True, True])
+        self.assertEqual(cache.keys('*'), [])
@@ -0,0 +1,50 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from model_mommy import mommy
+from rest_framework.test import APITestCase, APIClient
+from rest_framework.views import APIView
+
+from ..audiences import group_audience, permissions_audience, ANONYMOUS_AUDIENCE, SUPERUSER_AUDIENCE
+
+User = get_user_model()
+
+
+class TestAudiences(APITestCase):
+
+    def get_request(self, user=None):
+        client = APIClient()
+        if user is not None:
+            client.force_authenticate(user=user)
+
+        return APIView().initialize_request(client.get("/").wsgi_request)
+
+    def test_group_audience_is_the_same_for_users_of_the_same_groups(self):
+        groups = mommy.make(Group, _quantity=2)
+        user_one = mommy.make(User)
+        user_two = mommy.make(User)
+        user_one.groups.set(groups)
+        user_two.groups.set(reversed(groups))
+
+        self.assertEqual(group_audience(self.get_request(user_one)), group_audience(self.get_request(user_two)))
+
+    def test_group_audience_differs_for_users_of_different_groups(self):
+        user_one = mommy.make(User)
+        user_two = mommy.make(User)
+        user_one.groups.add(mommy.make(Group))
+
+        self.assertNotEqual(group_audience(self.get_request(user_one)), group_audience(self.get_request(user_two)))
+
+    def test_audiences_of_anonymous_users_and_superusers(self):
+        superuser = mommy.make(User, is_superuser=True)
+
+        self.assertEqual(group_audience(self.get_request()), ANONYMOUS_AUDIENCE)
+        self.assertEqual(permissions_audience(self.get_request()), ANONYMOUS_AUDIENCE)
+        self.assertEqual(group_audience(self.get_request(superuser)), SUPERUSER_AUDIENCE)
+        self.assertEqual(permissions_audience(self.get_request(superuser)), SUPERUSER_AUDIENCE)
+
+    def test_permissions_audience_is_the_same_for_users_without_permissions(self):
+        user_one = mommy.make(User)
+        user_two = mommy.make(User)
+
+        self.assertEqual(permissions_audience(self.get_request(user_one)),
+                         permissions_audience(self.get_request(user_two)))
@@ -0,0 +1,45 @@
+from django.core.cache import cache
+from django.test import override_settings
+from rest_framework.test import APITestCase
+
+from ..benchmarks import run_benchmarks, compare_benchmark_results
+
+
+@override_settings(DRF_REDIS_CACHE_INVALIDATE_ON_COMMIT=False)
+class TestBenchmarks(APITestCase):
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_run_benchmarks_returns_results_of_all_benchmarks(self):
+        results = run_benchmarks(iterations=5, payload_sizes=(1024, ), keyspace_sizes=(100, 200), dependent_ratio=0.1,
+                                 invalidation_repeats=3)
+
+        benchmarks = [result["benchmark"] for result in results["results"]]
+        self.assertEqual(benchmarks, ['view_without_cache', 'cache_it_hit', 'cache_it_miss', 'key_construction',
+                                      'serialization_dumps', 'serialization_loads',
+                                      'invalidate_model_cache', 'invalidate_model_cache'])
+        self.assertEqual(results["results"][-1]["params"], {'keyspace_size': 200, 'dependent_keys': 20})
+        self.assertEqual(results["results"][-1]["iterations"], 3)
+        self.assertIn('invalidation_mode', results["environment"])
+        self.assertIn('invalidation_queue', results["environment"])
+
+    def test_run_benchmarks_removes_its_keys(self):
+        run_benchmarks(iterations=5, payload_sizes=(1024, ), keyspace_sizes=(100, ))
+
+        self.assertEqual(cache.keys('*'), [])
+
+    def test_compare_benchmark_results_returns_regressions(self):
+        baseline = {"results": [
+            {"benchmark": "cache_it_hit", "params": {"overhead_us": 10}, "median_us": 100},
+            {"benchmark": "key_construction", "params": {}, "median_us": 10},
+        ]}
+        current = {"results": [
+            {"benchmark": "cache_it_hit", "params": {"overhead_us": 50}, "median_us": 150},
+            {"benchmark": "key_construction", "params": {}, "median_us": 11},
+        ]}
+
+        regressions = compare_benchmark_results(baseline, current, threshold=0.2)
+
+        self.assertEqual([regression["benchmark"] for regression in regressions], ['cache_it_hit'])
+        self.assertEqual(regressions[0]["change"], 0.5)
@@ -0,0 +1,79 @@
+from unittest import skipIf
+
+from django.test import override_settings, RequestFactory
+from rest_framework.test import APITestCase
+
+from ..compression import (accepts_content_encoding,
+                           brotli,
+                           compress_payload,
+                           decode_content,
+                           decompress_payload,
+                           encode_content,
+                           lz4,
+                           zstandard,
+                           COMPRESSOR_LZ4,
+                           COMPRESSOR_ZSTD,
+                           CONTENT_ENCODING_BROTLI,
+                           CONTENT_ENCODING_GZIP,
+                           )
+
+
+class TestCompression(APITestCase):
+
+    def setUp(self):
+        self.small_payload = b'p' + b'small'
+        self.big_payload = b'p' + b'big payload ' * 100
+
+    def test_compress_payload_doesnt_compress_without_threshold(self):
+        self.assertEqual(compress_payload(self.big_payload), self.big_payload)
+
+    @override_settings(DRF_REDIS_CACHE_COMPRESSION_THRESHOLD=100)
+    def test_compress_payload_doesnt_compress_payload_below_threshold(self):
+        self.assertEqual(compress_payload(self.small_payload), self.small_payload)
+
+    @override_settings(DRF_REDIS_CACHE_COMPRESSION_THRESHOLD=100)
+    def test_compress_payload_compresses_payload_above_threshold(self):
+        compressed_payload = compress_payload(self.big_payload)
+
+        self.assertEqual(compressed_payload[:1], b'z')
+        self.assertLess(len(compressed_payload), len(self.big_payload))
+        self.assertEqual(decompress_payload(compressed_payload), self.big_payload)
+
+    @skipIf(lz4 is None, 'lz4 is not installed')
+    @override_settings(DRF_REDIS_CACHE_COMPRESSION_THRESHOLD=100, DRF_REDIS_CACHE_COMPRESSOR=COMPRESSOR_LZ4)
+    def test_compress_payload_compresses_payload_with_lz4(self):
+        compressed_payload = compress_payload(self.big_payload)
+
+        self.assertEqual(compressed_payload[:1], b'4')
+        self.assertEqual(decompress_payload(compressed_payload), self.big_payload)
+
+    @skipIf(zstandard is None, 'zstandard is not installed')
+    @override_settings(DRF_REDIS_CACHE_COMPRESSION_THRESHOLD=100, DRF_REDIS_CACHE_COMPRESSOR=COMPRESSOR_ZSTD)
+    def test_compress_payload_compresses_payload_with_zstd(self):
+        compressed_payload = compress_payload(self.big_payload)
+
+        self.assertEqual(compressed_payload[:1], b's')
+        self.assertEqual(decompress_payload(compressed_payload), self.big_payload)
+
+    def test_decompress_payload_returns_uncompressed_payload_as_it_is(self):
+        self.assertEqual(decompress_payload(self.small_payload), self.small_payload)
+
+    def test_encode_content_encodes_content_with_gzip(self):
+        encoded_content = encode_content(self.big_payload, CONTENT_ENCODING_GZIP)
+
+        self.assertEqual(encoded_content[:2], b'\x1f\x8b')
+        self.assertEqual(decode_content(encoded_content, CONTENT_ENCODING_GZIP), self.big_payload)
+
+    @skipIf(brotli is None, 'brotli is not installed')
+    def test_encode_content_encodes_content_with_brotli(self):
+        encoded_content = encode_content(self.big_payload, CONTENT_ENCODING_BROTLI)
+
+        self.assertEqual(decode_content(encoded_content, CONTENT_ENCODING_BROTLI), self.big_payload)
+
+    def test_accepts_content_encoding_respects_quality(self):
+        request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING='gzip;q=0, br, *;q=0.1')
+
+        self.assertFalse(accepts_content_encoding(request, CONTENT_ENCODING_GZIP))
+        self.assertTrue(accepts_content_encoding(request, CONTENT_ENCODING_BROTLI))
+        self.assertTrue(accepts_content_encoding(request, 'deflate'))
+        self.assertFalse(accepts_content_encoding(RequestFactory().get('/'), CONTENT_ENCODING_GZIP))
@@ -1,15 +1,50 @@
+import gzip
+import uuid
+import threading
+import time
+from unittest import mock
+from datetime import datetime, timezone
+from functools import partial
 from inspect import signature
 
+from asgiref.sync import async_to_sync
+
 from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.http import HttpResponse
+from model_mommy import mommy
+from redis.exceptions import RedisError
+from rest_framework.exceptions import NotFound
+from rest_framework.renderers import JSONRenderer
+from django.test import override_settings
 from rest_framework.response import Response
 from rest_framework.test import APITestCase, APIClient
 from rest_framework.views import APIView
 
-from ..decorators import _get_response_dict, RESPONSE_KEY_TRANSLATION
+from .. import decorators
+from ..audiences import group_audience
+from ..decorators import _get_response_dict, RESPONSE_KEY_TRANSLATION, cache_it
+from ..entries import ENTRY_SOFT_EXPIRES
+from ..invalidation import invalidate_model_cache
+from ..local_cache import get_local_cache
+from ..utils import INVALIDATION_MODE_GENERATION, INVALIDATION_MODE_TAGS
 
 User = get_user_model()
 
 
+def bind_view(func):
+    """
+    Imitates the way @method_decorator passes a view to the decorator.
+    """
+
+    def bound_func(*args, **kwargs):
+        return func(*args, **kwargs)
+
+    return bound_func
+
+
 class TestDecorators(APITestCase):
 
     def get_request(self, url="/", method="get", user=None, *args, **kwargs):
@@ -30,6 +65,9 @@ class TestDecorators(APITestCase):
 
         return APIView().initialize_request(base_request)
 
+    def tearDown(self):
+        cache.clear()
+
     def test_get_response_dict_properly_translates_keys(self):
         response_signature = signature(Response)
         response_proper_parameters = response_signature.parameters.keys()
@@ -57,3 +95,697 @@ class TestDecorators(APITestCase):
                                       for key in translated_response.keys()]
 
         self.assertEqual(response_values, translated_response_values)
+
+    def test_cache_it_returns_cached_response_without_executing_view(self):
+        calls = []
+
+        def cached_view(request, *args, **kwargs):
+            calls.append(request)
+            return Response({'calls': len(calls)})
+
+        wrapped_view = cache_it()(bind_view(cached_view))
+
+        first_response = wrapped_view(self.get_request())
+        second_response = wrapped_view(self.get_request())
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(first_response.data, second_response.data)
+
+    def test_cache_it_doesnt_cache_invalid_request_methods(self):
+        calls = []
+
+        def posted_view(request, *args, **kwargs):
+            calls.append(request)
+            return Response({'calls': len(calls)})
+
+        wrapped_view = cache_it()(bind_view(posted_view))
+
+        wrapped_view(self.get_request(method='post'))
+        wrapped_view(self.get_request(method='post'))
+
+        self.assertEqual(len(calls), 2)
+
+    def test_cache_it_with_stampede_protection_executes_view_once_for_concurrent_requests(self):
+        calls = []
+
+        def slow_view(request, *args, **kwargs):
+            calls.append(request)
+            time.sleep(0.2)
+            return Response({'calls': len(calls)})
+
+        wrapped_view = cache_it(stampede_protection=True)(bind_view(slow_view))
+        requests = [self.get_request() for _ in range(5)]
+        responses = []
+
+        threads = [threading.Thread(target=lambda r=request: responses.append(wrapped_view(r)))
+                   for request in requests]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual([response.data for response in responses], [{'calls': 1}] * 5)
+
+    def test_cache_it_with_stampede_protection_adds_validators_to_responses_of_concurrent_requests(self):
+        def slow_view(request, *args, **kwargs):
+            time.sleep(0.2)
+            return Response({'slow': True})
+
+        wrapped_view = cache_it(stampede_protection=True, conditional_requests=True,
+                                cache_control='max-age=60')(bind_view(slow_view))
+        requests = [self.get_request() for _ in range(5)]
+        responses = []
+
+        threads = [threading.Thread(target=lambda r=request: responses.append(wrapped_view(r)))
+                   for request in requests]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len({response['ETag'] for response in responses}), 1)
+        self.assertEqual([response['Cache-Control'] for response in responses], ['max-age=60'] * 5)
+
+    def test_cache_it_with_soft_expiration_returns_stale_response_and_refreshes_it(self):
+        calls = []
+
+        def refreshed_view(request, *args, **kwargs):
+            calls.append(request)
+            return Response({'calls': len(calls)})
+
+        wrapped_view = cache_it(cache_soft_expiration_minutes=0)(bind_view(refreshed_view))
+
+        first_response = wrapped_view(self.get_request())
+        stale_response = wrapped_view(self.get_request())
+
+        self.assertEqual(stale_response.data, first_response.data)
+
+        deadline = time.monotonic() + 2
+        while len(calls) < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        self.assertEqual(len(calls), 2)
+
+    @override_settings(DRF_REDIS_CACHE_DEBUG_HEADERS=True)
+    def test_cache_it_with_soft_expiration_refreshes_response_without_changing_stale_response(self):
+        def refreshed_view(request, *args, **kwargs):
+            return Response({'refreshed': True})
+
+        wrapped_view = cache_it(cache_soft_expiration_minutes=0)(bind_view(refreshed_view))
+        wrapped_view(self.get_request())
+
+        # the refresh is executed before the stale response is built
+        with mock.patch.object(decorators, 'refresh_in_background',
+                               side_effect=lambda cache_key, compute, lock_timeout: compute()):
+            stale_response = wrapped_view(self.get_request())
+
+        self.assertEqual(stale_response['X-Cache'], 'STALE')
+        self.assertNotIn('view;dur=', stale_response['Server-Timing'])
+
+    def test_cache_it_with_cache_rendered_returns_rendered_content(self):
+        calls = []
+
+        def rendered_view(request, *args, **kwargs):
+            calls.append(request)
+            return Response({'calls': len(calls)})
+
+        wrapped_view = cache_it(cache_rendered=True)(bind_view(rendered_view))
+
+        responses = []
+        for _ in range(2):
+            request = self.get_request()
+            request.accepted_renderer = JSONRenderer()
+            request.accepted_media_type = 'application/json'
+            responses.append(wrapped_view(request))
+
+        self.assertEqual(len(calls), 1)
+        for response in responses:
+            self.assertIsInstance(response, HttpResponse)
+            self.assertNotIsInstance(response, Response)
+            self.assertEqual(response.content, b'{"calls":1}')
+            self.assertEqual(response['Content-Type'], 'application/json')
+
+    @override_settings(DRF_REDIS_CACHE_LOCAL_CACHE_MAX_BYTES=100000)
+    def test_cache_it_with_local_cache_returns_response_from_memory(self):
+        calls = []
+
+        def local_view(request, *args, **kwargs):
+            calls.append(request)
+            return Response({'calls': len(calls)})
+
+        wrapped_view = cache_it(local_cache_seconds=60)(bind_view(local_view))
+
+        wrapped_view(self.get_request())
+        cache.clear()
+        response = wrapped_view(self.get_request())
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(response.data, {'calls': 1})
+
+    @override_settings(DRF_REDIS_CACHE_LOCAL_CACHE_MAX_BYTES=100000)
+    def test_cache_it_with_local_cache_doesnt_refresh_stale_local_entry_refreshed_in_redis(self):
+        calls = []
+
+        def local_view(request, *args, **kwargs):
+            calls.append(request)
+            return Response({'calls': len(calls)})
+
+        wrapped_view = cache_it(cache_soft_expiration_minutes=1, local_cache_seconds=60)(bind_view(local_view))
+        wrapped_view(self.get_request())
+
+        # local copy of another process went stale, while the entry in redis is fresh
+        cache_name, (expires, size, entry) = next(iter(get_local_cache()._entries.items()))
+        get_local_cache().set(cache_name, {**entry, ENTRY_SOFT_EXPIRES: time.time() - 1}, 60, size=size)
+        with mock.patch.object(decorators, 'refresh_in_background') as refresh_in_background:
+            response = wrapped_view(self.get_request())
+
+        get_local_cache().clear()
+        refresh_in_background.assert_not_called()
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(response.data, {'calls': 1})
+
+    @override_settings(DRF_REDIS_CACHE_LOCAL_CACHE_MAX_BYTES=100000)
+    def test_cache_it_with_local_cache_keeps_entry_from_redis_no_longer_than_its_timeout(self):
+        def local_view(request, *args, **kwargs):
+            return Response({'data': 'dummy'})
+
+        wrapped_view = cache_it(cache_expiration_minutes=1, local_cache_seconds=600)(bind_view(local_view))
+
+        wrapped_view(self.get_request())
+        get_local_cache().clear()
+        wrapped_view(self.get_request())
+
+        expirations = [expires for expires, size, value in get_local_cache()._entries.values()]
+        get_local_cache().clear()
+        self.assertEqual(len(expirations), 1)
+        self.assertLessEqual(expirations[0] - time.monotonic(), 60)
+
+    @override_settings(DRF_REDIS_CACHE_SERIALIZER='json')
+    def test_cache_it_with_json_serializer_returns_cached_response(self):
+        calls = []
+
+        def json_view(request, *args, **kwargs):
+            calls.append(request)
+            return Response({'calls': len(calls), 'items': [1, 2]})
+
+        wrapped_view = cache_it()(bind_view(json_view))
+
+        wrapped_view(self.get_request())
+        response = wrapped_view(self.get_request())
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(response.data, {'calls': 1, 'items': [1, 2]})
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(DRF_REDIS_CACHE_COMPRESSION_THRESHOLD=100)
+    def test_cache_it_returns_compressed_cached_response(self):
+        calls = []
+
+        def big_view(request, *args, **kwargs):
+            calls.append(request)
+            return Response({'calls': len(calls), 'items': ['item'] * 100})
+
+        wrapped_view = cache_it()(bind_view(big_view))
+
+        wrapped_view(self.get_request())
+        response = wrapped_view(self.get_request())
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(response.data, {'calls': 1, 'items': ['item'] * 100})
+
+    def test_cache_it_doesnt_cache_responses_bigger_than_max_payload_bytes(self):
+        calls = []
+
+        def big_view(request, *args, **kwargs):
+            calls.append(request)
+            return Response({'calls': len(calls), 'items': ['item'] * 100})
+
+        wrapped_view = cache_it(max_payload_bytes=100)(bind_view(big_view))
+
+        wrapped_view(self.get_request())
+        wrapped_view(self.get_request())
+
+        self.assertEqual(len(calls), 2)
+
+    def test_cache_it_with_cache_audience_shares_cache_between_users_of_the_same_audience(self):
+        calls = []
+
+        def role_view(request, *args, **kwargs):
+            calls.append(request)
+            return Response({'calls': len(calls)})
+
+        wrapped_view = cache_it(cache_audience=lambda request: 'role')(bind_view(role_view))
+
+        wrapped_view(self.get_request(user=mommy.make(User)))
+        wrapped_view(self.get_request(user=mommy.make(User)))
+
+        self.assertEqual(len(calls), 1)
+
+    def test_cache_it_returns_cached_response_of_async_view_without_executing_it(self):
+        calls = []
+
+        async def async_view(request, *args, **kwargs):
+            calls.append(request)
+            return Response({'calls': len(calls)})
+
+        wrapped_view = cache_it()(partial(async_view))
+
+        first_response = async_to_sync(wrapped_view)(self.get_request())
+        second_response = async_to_sync(wrapped_view)(self.get_request())
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(first_response.data, second_response.data)
+
+    def test_cache_it_with_async_view_resolves_database_audience(self):
+        calls = []
+        group = mommy.make(Group)
+        user_one, user_two = mommy.make(User), mommy.make(User)
+        group.user_set.add(user_one, user_two)
+
+        async def async_audience_view(request, *args, **kwargs):
+            calls.append(request)
+            return Response({'calls': len(calls)})
+
+        wrapped_view = cache_it(cache_audience=group_audience)(partial(async_audience_view))
+
+        async_to_sync(wrapped_view)(self.get_request(user=user_one))
+        response = async_to_sync(wrapped_view)(self.get_request(user=user_two))
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(response.data, {'calls': 1})
+
+    @override_settings(DRF_REDIS_CACHE_INVALIDATION_MODE=INVALIDATION_MODE_GENERATION)
+    def test_cache_it_with_async_view_uses_generations(self):
+        calls = []
+
+        async def async_generation_view(request, *args, **kwargs):
+            calls.append(request)
+            return Response({'calls': len(calls)})
+
+        wrapped_view = cache_it(model_dependencies=[User],
+                                stampede_protection=True)(partial(async_generation_view))
+
+        async_to_sync(wrapped_view)(self.get_request())
+        async_to_sync(wrapped_view)(self.get_request())
+        invalidate_model_cache(User)
+        async_to_sync(wrapped_view)(self.get_request())
+
+        self.assertEqual(len(calls), 2)
+
+    @override_settings(DRF_REDIS_CACHE_DEBUG_HEADERS=True)
+    def test_cache_it_with_debug_headers_adds_cache_status_and_timings(self):
+        def debug_view(request, *args, **kwargs):
+            return Response({'debug': True})
+
+        wrapped_view = cache_it()(bind_view(debug_view))
+
+        first_response = wrapped_view(self.get_request())
+        second_response = wrapped_view(self.get_request())
+        post_response = wrapped_view(self.get_request(method="post"))
+
+        self.assertEqual(first_response['X-Cache'], 'MISS')
+        self.assertIn('view;dur=', first_response['Server-Timing'])
+        self.assertEqual(second_response['X-Cache'], 'HIT')
+        self.assertEqual(second_response['X-Cache-Key'], first_response['X-Cache-Key'])
+        self.assertEqual(second_response['X-Cache-Age'], '0')
+        self.assertIn('cache;dur=', second_response['Server-Timing'])
+        self.assertNotIn('view;dur=', second_response['Server-Timing'])
+        self.assertEqual(post_response['X-Cache'], 'BYPASS')
+
+    def test_cache_it_doesnt_add_debug_headers_by_default(self):
+        def debug_view(request, *args, **kwargs):
+            return Response({'debug': True})
+
+        response = cache_it()(bind_view(debug_view))(self.get_request())
+
+        self.assertFalse(response.has_header('X-Cache'))
+
+    def test_cache_it_doesnt_cache_responses_computed_faster_than_admission_min_compute_seconds(self):
+        calls = []
+
+        def cheap_view(request, *args, **kwargs):
+            calls.append(request)
+            return Response({'calls': len(calls)})
+
+        wrapped_view = cache_it(admission_min_compute_seconds=60)(bind_view(cheap_view))
+
+        wrapped_view(self.get_request())
+        wrapped_view(self.get_request())
+
+        self.assertEqual(len(calls), 2)
+
+    def test_cache_it_caches_response_after_admission_requests(self):
+        calls = []
+
+        def repeated_view(request, *args, **kwargs):
+            calls.append(request)
+            return Response({'calls': len(calls)})
+
+        wrapped_view = cache_it(admission_requests=2)(bind_view(repeated_view))
+
+        responses = [wrapped_view(self.get_request()) for _ in range(3)]
+
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(responses[2].data, {'calls': 2})
+
+    def test_cache_it_with_negative_cache_seconds_caches_raised_not_found(self):
+        calls = []
+
+        def missing_view(request, *args, **kwargs):
+            calls.append(request)
+            raise NotFound()
+
+        wrapped_view = cache_it(negative_cache_seconds=30)(bind_view(missing_view))
+
+        wrapped_view(self.get_request())
+        response = wrapped_view(self.get_request())
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(response.status_code, 404)
+        self.assertTrue(0 < cache.ttl(cache.keys('*')[0]) <= 30)
+
+    def test_cache_it_with_negative_cache_seconds_caches_empty_responses(self):
+        calls = []
+
+        def empty_view(request, *args, **kwargs):
+            calls.append(request)
+            return Response([])
+
+        wrapped_view = cache_it(negative_cache_seconds=30)(bind_view(empty_view))
+
+        wrapped_view(self.get_request())
+        response = wrapped_view(self.get_request())
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(response.data, [])
+
+    def test_cache_it_without_negative_cache_seconds_doesnt_cache_not_found(self):
+        calls = []
+
+        def missing_view(request, *args, **kwargs):
+            calls.append(request)
+            return Response(status=404)
+
+        wrapped_view = cache_it()(bind_view(missing_view))
+
+        wrapped_view(self.get_request())
+        wrapped_view(self.get_request())
+
+        self.assertEqual(len(calls), 2)
+
+    def test_cache_it_without_negative_cache_seconds_propagates_not_found(self):
+        def missing_view(request, *args, **kwargs):
+            raise NotFound()
+
+        wrapped_view = cache_it()(bind_view(missing_view))
+
+        self.assertRaises(NotFound, wrapped_view, self.get_request())
+
+    def test_cache_it_with_negative_cache_seconds_propagates_not_found_unhandled_by_exception_handler(self):
+        def missing_view(request, *args, **kwargs):
+            raise NotFound()
+
+        wrapped_view = cache_it(negative_cache_seconds=30)(bind_view(missing_view))
+
+        with mock.patch.object(decorators.api_settings, 'EXCEPTION_HANDLER', lambda exc, context: None):
+            self.assertRaises(NotFound, wrapped_view, self.get_request())
+        self.assertEqual(cache.keys('*'), [])
+
+    def test_cache_it_with_conditional_requests_adds_etag_and_caching_headers(self):
+        def conditional_view(request, *args, **kwargs):
+            return Response({'conditional': True})
+
+        wrapped_view = cache_it(conditional_requests=True, cache_user=False)(bind_view(conditional_view))
+
+        first_response = wrapped_view(self.get_request())
+        second_response = wrapped_view(self.get_request())
+
+        self.assertTrue(first_response['ETag'].startswith('"'))
+        self.assertEqual(second_response['ETag'], first_response['ETag'])
+        self.assertEqual(second_response['Last-Modified'], first_response['Last-Modified'])
+        self.assertEqual(second_response['Cache-Control'], 'no-cache')
+        self.assertEqual(second_response['Vary'], 'Accept-Language')
+
+    def test_cache_it_with_conditional_requests_returns_not_modified_without_loading_response(self):
+        calls = []
+
+        def conditional_view(request, *args, **kwargs):
+            calls.append(request)
+            return Response({'conditional': True})
+
+        wrapped_view = cache_it(conditional_requests=True)(bind_view(conditional_view))
+        etag = wrapped_view(self.get_request())['ETag']
+
+        with mock.patch.object(decorators, '_get_cache_entry_with_size') as get_cache_entry:
+            response = wrapped_view(self.get_request(HTTP_IF_NONE_MATCH=f'W/{etag}'))
+
+        get_cache_entry.assert_not_called()
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+        self.assertEqual(len(calls), 1)
+
+    def test_cache_it_with_conditional_requests_refreshes_stale_response_answered_from_metadata(self):
+        calls = []
+
+        def conditional_view(request, *args, **kwargs):
+            calls.append(request)
+            return Response({'calls': len(calls)})
+
+        wrapped_view = cache_it(conditional_requests=True,
+                                cache_soft_expiration_minutes=0)(bind_view(conditional_view))
+        etag = wrapped_view(self.get_request())['ETag']
+
+        response = wrapped_view(self.get_request(HTTP_IF_NONE_MATCH=etag))
+
+        self.assertEqual(response.status_code, 304)
+        deadline = time.monotonic() + 2
+        while len(calls) < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        self.assertEqual(len(calls), 2)
+
+    @override_settings(DRF_REDIS_CACHE_DEBUG_HEADERS=True)
+    def test_cache_it_with_debug_headers_doesnt_report_timings_of_background_refresh(self):
+        def conditional_view(request, *args, **kwargs):
+            return Response({'conditional': True})
+
+        wrapped_view = cache_it(conditional_requests=True,
+                                cache_soft_expiration_minutes=0)(bind_view(conditional_view))
+        etag = wrapped_view(self.get_request())['ETag']
+
+        # the refresh is executed before the response is built
+        with mock.patch.object(decorators, 'refresh_in_background',
+                               side_effect=lambda cache_key, compute, lock_timeout: compute()):
+            response = wrapped_view(self.get_request(HTTP_IF_NONE_MATCH=etag))
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['X-Cache'], 'STALE')
+        self.assertIn('cache;dur=', response['Server-Timing'])
+        self.assertNotIn('view;dur=', response['Server-Timing'])
+
+    def test_cache_it_with_async_view_caches_not_found_without_validators(self):
+        calls = []
+
+        async def async_conditional_view(request, *args, **kwargs):
+            calls.append(request)
+            raise NotFound()
+
+        wrapped_view = cache_it(conditional_requests=True,
+                                negative_cache_seconds=30)(partial(async_conditional_view))
+        first_response = async_to_sync(wrapped_view)(self.get_request())
+        response = async_to_sync(wrapped_view)(self.get_request(HTTP_IF_NONE_MATCH='*'))
+
+        self.assertNotIn('ETag', first_response)
+        self.assertEqual(response.status_code, 404)
+        self.assertNotIn('ETag', response)
+        self.assertEqual(len(calls), 1)
+
+    def test_cache_it_with_conditional_requests_returns_full_response_for_outdated_etag(self):
+        def conditional_view(request, *args, **kwargs):
+            return Response({'conditional': True})
+
+        wrapped_view = cache_it(conditional_requests=True)(bind_view(conditional_view))
+        wrapped_view(self.get_request())
+
+        response = wrapped_view(self.get_request(HTTP_IF_NONE_MATCH='"outdated"'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, {'conditional': True})
+
+    def test_cache_it_with_conditional_requests_recomputes_etag_after_invalidation(self):
+        calls = []
+
+        def conditional_view(request, *args, **kwargs):
+            calls.append(request)
+            return Response({'calls': len(calls)})
+
+        wrapped_view = cache_it(conditional_requests=True, model_dependencies=[User])(bind_view(conditional_view))
+        etag = wrapped_view(self.get_request())['ETag']
+
+        with override_settings(DRF_REDIS_CACHE_INVALIDATE_ON_COMMIT=False):
+            invalidate_model_cache(User)
+        response = wrapped_view(self.get_request(HTTP_IF_NONE_MATCH=etag))
+
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_cache_it_with_content_encoding_returns_encoded_content_to_accepting_clients(self):
+        def encoded_view(request, *args, **kwargs):
+            return Response({'items': ['item'] * 100})
+
+        wrapped_view = cache_it(cache_rendered=True, content_encoding='gzip')(bind_view(encoded_view))
+
+        responses = []
+        for accept_encoding in ('gzip, deflate', 'gzip, deflate', 'identity'):
+            request = self.get_request(HTTP_ACCEPT_ENCODING=accept_encoding)
+            request.accepted_renderer = JSONRenderer()
+            request.accepted_media_type = 'application/json'
+            responses.append(wrapped_view(request))
+
+        content = JSONRenderer().render({'items': ['item'] * 100})
+        for response in responses[:2]:
+            self.assertEqual(response['Content-Encoding'], 'gzip')
+            self.assertEqual(response['Vary'], 'Accept-Encoding')
+            self.assertEqual(gzip.decompress(response.content), content)
+        self.assertFalse(responses[2].has_header('Content-Encoding'))
+        self.assertEqual(responses[2]['Vary'], 'Accept-Encoding')
+        self.assertEqual(responses[2].content, content)
+
+    def test_cache_it_with_content_encoding_gives_each_encoding_its_own_etag(self):
+        def encoded_view(request, *args, **kwargs):
+            return Response({'items': ['item'] * 100})
+
+        wrapped_view = cache_it(cache_rendered=True,
+                                content_encoding='gzip',
+                                conditional_requests=True,
+                                cache_language=False,
+                                cache_user=False)(bind_view(encoded_view))
+
+        def get_response(accept_encoding, **headers):
+            request = self.get_request(HTTP_ACCEPT_ENCODING=accept_encoding, **headers)
+            request.accepted_renderer = JSONRenderer()
+            request.accepted_media_type = 'application/json'
+            return wrapped_view(request)
+
+        gzip_etag = get_response('gzip')['ETag']
+        identity_etag = get_response('identity')['ETag']
+        not_modified_response = get_response('gzip', HTTP_IF_NONE_MATCH=gzip_etag)
+        identity_response = get_response('identity', HTTP_IF_NONE_MATCH=gzip_etag)
+
+        self.assertNotEqual(gzip_etag, identity_etag)
+        self.assertTrue(gzip_etag.endswith('-gzip"'))
+        self.assertEqual(not_modified_response.status_code, 304)
+        self.assertEqual(not_modified_response['ETag'], gzip_etag)
+        self.assertEqual(not_modified_response['Vary'], 'Accept, Accept-Encoding')
+        self.assertEqual(identity_response.status_code, 200)
+        self.assertEqual(identity_response['ETag'], identity_etag)
+
+    def test_cache_it_with_content_encoding_requires_cache_rendered(self):
+        with self.assertRaises(ImproperlyConfigured):
+            cache_it(content_encoding='gzip')
+
+    def test_cache_it_with_fractional_expiration_minutes_caches_response(self):
+        calls = []
+
+        def fractional_view(request, *args, **kwargs):
+            calls.append(request)
+            return Response({'calls': len(calls)})
+
+        wrapped_view = cache_it(cache_expiration_minutes=0.51)(bind_view(fractional_view))
+
+        wrapped_view(self.get_request())
+        wrapped_view(self.get_request())
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(cache.ttl(cache.keys('*')[0]), 31)
+
+    @override_settings(DRF_REDIS_CACHE_INVALIDATION_MODE=INVALIDATION_MODE_TAGS)
+    def test_cache_it_with_fractional_expiration_minutes_caches_response_with_tags(self):
+        calls = []
+
+        def fractional_view(request, *args, **kwargs):
+            calls.append(request)
+            return Response({'calls': len(calls)})
+
+        wrapped_view = cache_it(cache_expiration_minutes=0.51, model_dependencies=[User])(bind_view(fractional_view))
+
+        wrapped_view(self.get_request())
+        wrapped_view(self.get_request())
+
+        self.assertEqual(len(calls), 1)
+
+    @override_settings(DJANGO_REDIS_IGNORE_EXCEPTIONS=True)
+    def test_cache_it_with_ignored_redis_exceptions_executes_view_when_redis_fails(self):
+        calls = []
+
+        def failing_redis_view(request, *args, **kwargs):
+            calls.append(request)
+            return Response({'calls': len(calls)})
+
+        wrapped_view = cache_it()(bind_view(failing_redis_view))
+
+        with mock.patch.object(decorators, '_get_cache_entry_with_size', side_effect=RedisError):
+            read_response = wrapped_view(self.get_request())
+        with mock.patch.object(decorators, '_set_cache_payload', side_effect=RedisError):
+            write_response = wrapped_view(self.get_request())
+
+        self.assertEqual(read_response.data, {'calls': 1})
+        self.assertEqual(write_response.data, {'calls': 2})
+
+    @override_settings(DJANGO_REDIS_IGNORE_EXCEPTIONS=True)
+    def test_cache_it_with_ignored_redis_exceptions_doesnt_execute_view_twice(self):
+        calls = []
+
+        def failing_view(request, *args, **kwargs):
+            calls.append(request)
+            raise RedisError()
+
+        with self.assertRaises(RedisError):
+            cache_it()(bind_view(failing_view))(self.get_request())
+
+        self.assertEqual(len(calls), 1)
+
+    def test_cache_it_raises_redis_errors_by_default(self):
+        def failing_redis_view(request, *args, **kwargs):
+            return Response({'data': 'dummy'})
+
+        with mock.patch.object(decorators, '_get_cache_entry_with_size', side_effect=RedisError):
+            with self.assertRaises(RedisError):
+                cache_it()(bind_view(failing_redis_view))(self.get_request())
+
+    def test_cache_it_with_zero_expiration_minutes_doesnt_cache_response(self):
+        calls = []
+
+        def uncached_view(request, *args, **kwargs):
+            calls.append(request)
+            return Response({'calls': len(calls)})
+
+        async def async_uncached_view(request, *args, **kwargs):
+            return uncached_view(request, *args, **kwargs)
+
+        for invalidation_mode in (INVALIDATION_MODE_GENERATION, INVALIDATION_MODE_TAGS):
+            with override_settings(DRF_REDIS_CACHE_INVALIDATION_MODE=invalidation_mode):
+                wrapped_view = cache_it(cache_expiration_minutes=0, model_dependencies=[User])(bind_view(uncached_view))
+                async_wrapped_view = cache_it(cache_expiration_minutes=0,
+                                              conditional_requests=True)(partial(async_uncached_view))
+
+                responses = [wrapped_view(self.get_request()) for _ in range(2)]
+                responses += [async_to_sync(async_wrapped_view)(self.get_request()) for _ in range(2)]
+
+            self.assertEqual([response.status_code for response in responses], [200] * 4)
+        self.assertEqual(len(calls), 8)
+
+    @override_settings(DRF_REDIS_CACHE_SERIALIZER='json')
+    def test_cache_it_with_json_serializer_renders_hit_identical_to_miss(self):
+        def datetime_view(request, *args, **kwargs):
+            return Response({'when': datetime(2020, 1, 2, 3, 4, 5, 123456, tzinfo=timezone.utc),
+                             'id': uuid.UUID(int=1)})
+
+        wrapped_view = cache_it()(bind_view(datetime_view))
+
+        miss_response = wrapped_view(self.get_request())
+        hit_response = wrapped_view(self.get_request())
+
+        self.assertEqual(JSONRenderer().render(hit_response.data), JSONRenderer().render(miss_response.data))
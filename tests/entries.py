@@ -0,0 +1,50 @@
+import time
+
+from rest_framework.test import APITestCase
+
+from ..entries import (make_cache_entry,
+                       is_cache_entry,
+                       is_cache_entry_stale,
+                       should_recompute_early,
+                       ENTRY_RESPONSE,
+                       ENTRY_HARD_EXPIRES,
+                       )
+
+
+class TestEntries(APITestCase):
+
+    def setUp(self):
+        self.response_dict = {'data': 'dummy', 'status': 200}
+
+    def test_make_cache_entry_wraps_response_dict(self):
+        entry = make_cache_entry(self.response_dict, compute_time=0.1, timeout=60)
+
+        self.assertEqual(entry[ENTRY_RESPONSE], self.response_dict)
+        self.assertTrue(is_cache_entry(entry))
+
+    def test_is_cache_entry_returns_false_for_plain_response_dict(self):
+        self.assertFalse(is_cache_entry(self.response_dict))
+        self.assertFalse(is_cache_entry(None))
+
+    def test_is_cache_entry_stale_returns_false_without_soft_timeout(self):
+        entry = make_cache_entry(self.response_dict, compute_time=0.1, timeout=60)
+
+        self.assertFalse(is_cache_entry_stale(entry))
+
+    def test_is_cache_entry_stale_returns_true_after_soft_timeout(self):
+        fresh_entry = make_cache_entry(self.response_dict, compute_time=0.1, timeout=60, soft_timeout=30)
+        stale_entry = make_cache_entry(self.response_dict, compute_time=0.1, timeout=60, soft_timeout=0)
+
+        self.assertFalse(is_cache_entry_stale(fresh_entry))
+        self.assertTrue(is_cache_entry_stale(stale_entry))
+
+    def test_should_recompute_early_returns_false_for_fresh_fast_entry(self):
+        entry = make_cache_entry(self.response_dict, compute_time=0.001, timeout=3600)
+
+        self.assertFalse(should_recompute_early(entry, beta=1.0))
+
+    def test_should_recompute_early_returns_true_for_expired_entry(self):
+        entry = make_cache_entry(self.response_dict, compute_time=0.001, timeout=3600)
+        entry[ENTRY_HARD_EXPIRES] = time.time()
+
+        self.assertTrue(should_recompute_early(entry, beta=1.0))
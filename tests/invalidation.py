@@ -1,14 +1,41 @@
+import time
+
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import Permission
 from django.core.cache import cache
+from django.db import transaction
+from django.test import override_settings
 from model_mommy import mommy
 from rest_framework.test import APITestCase, APIClient
 from rest_framework.views import APIView
 
-from ..invalidation import invalidate_user_related_cache, invalidate_cache_key_pattern, invalidate_model_cache
-from ..key_construction import (get_model_cache_key,
+from ..invalidation import (invalidate_user_related_cache,
+                            invalidate_cache_key_pattern,
+                            invalidate_model_cache,
+                            invalidate_model_collection_cache,
+                            invalidate_instance_cache,
+                            increment_generation,
+                            increment_generations,
+                            defer_invalidation,
+                            invalidate_on_commit,
+                            )
+from ..key_construction import (_add_model_dependencies_to_cache_key,
+                                get_model_cache_key,
                                 get_user_cache_key,
+                                get_instance_cache_key,
+                                get_model_generation_key,
+                                get_collection_generation_key,
+                                get_instance_generation_key,
+                                get_model_tag,
+                                get_collection_tag,
+                                get_instance_tag,
+                                get_user_tag,
+                                get_user_generation_key,
+                                get_generations,
                                 )
+from ..registry import register_instance_parameter
+from ..tags import set_cache_with_tags
+from ..utils import INVALIDATION_MODE_GENERATION, INVALIDATION_MODE_TAGS
 
 User = get_user_model()
 
@@ -136,3 +163,286 @@ class TestInvalidation(APITestCase):
 
         for cache_key in cache_keys.items():
             cache.delete(cache_key)
+
+    def test_increment_generation_seeds_missing_generation(self):
+        generation_key = 'generation__missing_generation'
+        cache.delete(generation_key)
+        start = time.time_ns()
+
+        new_generation = increment_generation(generation_key)
+
+        self.assertGreater(new_generation, start)
+        self.assertEqual(cache.get(generation_key), new_generation)
+
+        cache.delete(generation_key)
+
+    def test_evicted_generation_doesnt_repeat_its_old_values(self):
+        generation_key = 'generation__evicted_generation'
+        cache.delete(generation_key)
+        old_generations = {get_generations([generation_key])[generation_key], increment_generation(generation_key)}
+
+        cache.delete(generation_key)
+
+        self.assertNotIn(get_generations([generation_key])[generation_key], old_generations)
+        self.assertNotIn(increment_generation(generation_key), old_generations)
+
+        cache.delete(generation_key)
+
+    @override_settings(DRF_REDIS_CACHE_GENERATION_TIMEOUT=600)
+    def test_generations_expire_after_generation_timeout(self):
+        generation_key = 'generation__expiring_generation'
+        cache.delete(generation_key)
+
+        get_generations([generation_key])
+        self.assertTrue(0 < cache.ttl(generation_key) <= 600)
+
+        cache.persist(generation_key)
+        increment_generation(generation_key)
+        self.assertTrue(0 < cache.ttl(generation_key) <= 600)
+
+        cache.delete(generation_key)
+
+    @override_settings(DRF_REDIS_CACHE_INVALIDATION_MODE=INVALIDATION_MODE_GENERATION)
+    def test_invalidate_model_cache_increments_model_generation_in_generation_mode(self):
+        generation_key = get_model_generation_key(User)
+        collection_generation_key = get_collection_generation_key(User)
+        other_generation_key = get_model_generation_key(Permission)
+        cache_key_with_model = get_model_cache_key(User)
+        dummy_val = 'dummy'
+
+        generation = get_generations([generation_key])[generation_key]
+        collection_generation = get_generations([collection_generation_key])[collection_generation_key]
+        other_generation = get_generations([other_generation_key])[other_generation_key]
+        cache.set(cache_key_with_model, dummy_val)
+
+        invalidate_model_cache(User)
+
+        self.assertEqual(cache.get(generation_key), generation + 1)
+        self.assertEqual(cache.get(collection_generation_key), collection_generation + 1)
+        self.assertEqual(cache.get(other_generation_key, 0), other_generation)
+        self.assertEqual(cache.get(cache_key_with_model), dummy_val)
+
+        cache.delete(cache_key_with_model)
+
+    @override_settings(DRF_REDIS_CACHE_INVALIDATION_MODE=INVALIDATION_MODE_GENERATION)
+    def test_invalidate_user_related_cache_increments_user_generation_in_generation_mode(self):
+        user_to_invalidate = mommy.make(User)
+        user_still_valid = mommy.make(User)
+
+        generation_key = get_user_generation_key(user_to_invalidate)
+        other_generation_key = get_user_generation_key(user_still_valid)
+
+        generation = get_generations([generation_key])[generation_key]
+        other_generation = get_generations([other_generation_key])[other_generation_key]
+
+        invalidate_user_related_cache(user_to_invalidate)
+
+        self.assertEqual(cache.get(generation_key), generation + 1)
+        self.assertEqual(cache.get(other_generation_key, 0), other_generation)
+
+        cache.delete_many([generation_key, other_generation_key])
+
+    def test_increment_generations_increments_all_generations(self):
+        generation_keys = ['generation__first', 'generation__second']
+        cache.delete_many(generation_keys)
+
+        generations = get_generations(generation_keys)
+
+        new_generations = increment_generations(generation_keys)
+
+        self.assertEqual(new_generations, [generations[generation_key] + 1 for generation_key in generation_keys])
+
+        cache.delete_many(generation_keys)
+
+    def test_invalidate_model_collection_cache_invalidates_collection_cache_only(self):
+        dummy_val = 'dummy'
+        collection_key = _add_model_dependencies_to_cache_key('collection__', [Permission, User])
+        other_collection_key = _add_model_dependencies_to_cache_key('other_collection__', [Permission])
+        instance_key = 'instance__' + get_instance_cache_key(User, 1)
+
+        cache_keys = [collection_key, other_collection_key, instance_key]
+        for cache_key in cache_keys:
+            cache.set(cache_key, dummy_val)
+
+        invalidate_model_collection_cache(User)
+
+        self.assertIs(cache.get(collection_key), None)
+        self.assertEqual(cache.get(other_collection_key), dummy_val)
+        self.assertEqual(cache.get(instance_key), dummy_val)
+
+        cache.delete_many(cache_keys)
+
+    def test_invalidate_instance_cache_invalidates_instance_and_collection_cache_only(self):
+        register_instance_parameter(Permission, 'pk')
+        permission = mommy.make(Permission)
+        other_permission = mommy.make(Permission)
+        dummy_val = 'dummy'
+
+        collection_key = _add_model_dependencies_to_cache_key('collection__', [Permission])
+        instance_key = 'instance__' + get_instance_cache_key(Permission, permission.pk)
+        other_instance_key = 'instance__' + get_instance_cache_key(Permission, other_permission.pk)
+
+        cache_keys = [collection_key, instance_key, other_instance_key]
+        for cache_key in cache_keys:
+            cache.set(cache_key, dummy_val)
+
+        invalidate_instance_cache(permission)
+
+        self.assertIs(cache.get(collection_key), None)
+        self.assertIs(cache.get(instance_key), None)
+        self.assertEqual(cache.get(other_instance_key), dummy_val)
+
+        cache.delete_many(cache_keys)
+
+    @override_settings(DRF_REDIS_CACHE_INVALIDATION_MODE=INVALIDATION_MODE_GENERATION)
+    def test_invalidate_instance_cache_increments_instance_generations_in_generation_mode(self):
+        register_instance_parameter(Permission, 'pk')
+        permission = mommy.make(Permission)
+        other_permission = mommy.make(Permission)
+
+        instance_generation_key = get_instance_generation_key(Permission, permission.pk)
+        other_instance_generation_key = get_instance_generation_key(Permission, other_permission.pk)
+        collection_generation_key = get_collection_generation_key(Permission)
+        model_generation_key = get_model_generation_key(Permission)
+
+        generations = get_generations([instance_generation_key, other_instance_generation_key,
+                                      collection_generation_key, model_generation_key])
+
+        invalidate_instance_cache(permission)
+
+        self.assertEqual(cache.get(instance_generation_key),
+                         generations.get(instance_generation_key, 0) + 1)
+        self.assertEqual(cache.get(collection_generation_key),
+                         generations.get(collection_generation_key, 0) + 1)
+        self.assertEqual(cache.get(other_instance_generation_key, 0),
+                         generations.get(other_instance_generation_key, 0))
+        self.assertEqual(cache.get(model_generation_key, 0),
+                         generations.get(model_generation_key, 0))
+
+    @override_settings(DRF_REDIS_CACHE_INVALIDATION_MODE=INVALIDATION_MODE_TAGS,
+                       DRF_REDIS_CACHE_TAG_SWEEP_PROBABILITY=0)
+    def test_invalidate_model_cache_invalidates_tagged_keys_in_tags_mode(self):
+        dummy_val = b'dummy'
+        set_cache_with_tags('model_key', dummy_val, 60, [get_model_tag(User)])
+        set_cache_with_tags('other_model_key', dummy_val, 60, [get_model_tag(Permission)])
+
+        invalidate_model_cache(User)
+
+        self.assertFalse(cache.has_key('model_key'))
+        self.assertTrue(cache.has_key('other_model_key'))
+
+        invalidate_model_cache(Permission)
+
+    @override_settings(DRF_REDIS_CACHE_INVALIDATION_MODE=INVALIDATION_MODE_TAGS,
+                       DRF_REDIS_CACHE_TAG_SWEEP_PROBABILITY=0)
+    def test_invalidate_instance_cache_invalidates_tagged_keys_in_tags_mode(self):
+        register_instance_parameter(Permission, 'pk')
+        permission = mommy.make(Permission)
+        other_permission = mommy.make(Permission)
+        dummy_val = b'dummy'
+
+        set_cache_with_tags('collection_key', dummy_val, 60,
+                            [get_model_tag(Permission), get_collection_tag(Permission)])
+        set_cache_with_tags('instance_key', dummy_val, 60,
+                            [get_model_tag(Permission), get_instance_tag(Permission, permission.pk)])
+        set_cache_with_tags('other_instance_key', dummy_val, 60,
+                            [get_model_tag(Permission), get_instance_tag(Permission, other_permission.pk)])
+
+        invalidate_instance_cache(permission)
+
+        self.assertFalse(cache.has_key('collection_key'))
+        self.assertFalse(cache.has_key('instance_key'))
+        self.assertTrue(cache.has_key('other_instance_key'))
+
+        invalidate_model_cache(Permission)
+
+    @override_settings(DRF_REDIS_CACHE_INVALIDATION_MODE=INVALIDATION_MODE_TAGS,
+                       DRF_REDIS_CACHE_TAG_SWEEP_PROBABILITY=0)
+    def test_invalidate_user_related_cache_invalidates_tagged_keys_in_tags_mode(self):
+        user_to_invalidate = mommy.make(User)
+        user_still_valid = mommy.make(User)
+        dummy_val = b'dummy'
+
+        set_cache_with_tags('user_key', dummy_val, 60, [get_user_tag(user_to_invalidate)])
+        set_cache_with_tags('other_user_key', dummy_val, 60, [get_user_tag(user_still_valid)])
+
+        invalidate_user_related_cache(user_to_invalidate)
+
+        self.assertFalse(cache.has_key('user_key'))
+        self.assertTrue(cache.has_key('other_user_key'))
+
+        invalidate_user_related_cache(user_still_valid)
+
+    def test_defer_invalidation_invalidates_cache_when_block_exits(self):
+        model_cache_key = get_model_cache_key(User)
+        cache.set(model_cache_key, 'dummy')
+
+        with defer_invalidation():
+            invalidate_model_cache(User)
+            invalidate_model_cache(User)
+
+            self.assertEqual(cache.get(model_cache_key), 'dummy')
+
+        self.assertIs(cache.get(model_cache_key), None)
+
+    @override_settings(DRF_REDIS_CACHE_INVALIDATION_MODE=INVALIDATION_MODE_GENERATION)
+    def test_defer_invalidation_coalesces_invalidations(self):
+        collection_generation_key = get_collection_generation_key(Permission)
+        generation = get_generations([collection_generation_key])[collection_generation_key]
+
+        with defer_invalidation():
+            for _ in range(3):
+                invalidate_model_collection_cache(Permission)
+
+        self.assertEqual(cache.get(collection_generation_key), generation + 1)
+
+    @override_settings(DRF_REDIS_CACHE_INVALIDATION_MODE=INVALIDATION_MODE_GENERATION)
+    def test_invalidate_on_commit_invalidates_cache_once_after_commit(self):
+        collection_generation_key = get_collection_generation_key(Permission)
+        generation = get_generations([collection_generation_key])[collection_generation_key]
+
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            for _ in range(3):
+                with invalidate_on_commit():
+                    invalidate_model_collection_cache(Permission)
+
+            self.assertEqual(cache.get(collection_generation_key, 0), generation)
+
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(cache.get(collection_generation_key), generation + 1)
+
+    @override_settings(DRF_REDIS_CACHE_INVALIDATION_MODE=INVALIDATION_MODE_GENERATION)
+    def test_invalidate_on_commit_invalidates_cache_after_every_flushed_batch(self):
+        collection_generation_key = get_collection_generation_key(Permission)
+        generation = get_generations([collection_generation_key])[collection_generation_key]
+
+        for _ in range(2):
+            with self.captureOnCommitCallbacks(execute=True) as callbacks:
+                with invalidate_on_commit():
+                    invalidate_model_collection_cache(Permission)
+
+            self.assertEqual(len(callbacks), 1)
+
+        self.assertEqual(cache.get(collection_generation_key), generation + 2)
+
+    @override_settings(DRF_REDIS_CACHE_INVALIDATION_MODE=INVALIDATION_MODE_GENERATION)
+    def test_invalidate_on_commit_discards_invalidations_of_rolled_back_transaction(self):
+        collection_generation_key = get_collection_generation_key(Permission)
+        generation = get_generations([collection_generation_key])[collection_generation_key]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    with invalidate_on_commit():
+                        invalidate_model_collection_cache(Permission)
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+
+        self.assertEqual(cache.get(collection_generation_key, 0), generation)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            with invalidate_on_commit():
+                invalidate_model_collection_cache(Permission)
+
+        self.assertEqual(cache.get(collection_generation_key), generation + 1)
@@ -0,0 +1,90 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import override_settings
+from django_redis import get_redis_connection
+from redis.exceptions import RedisError
+from rest_framework.test import APITestCase
+
+from .. import invalidation, invalidation_queue
+from ..invalidation import invalidate_model_cache
+from ..invalidation_queue import (process_redis_invalidation_queue,
+                                  get_invalidation_queue_stats,
+                                  _get_thread_queue,
+                                  INVALIDATION_QUEUE_THREAD,
+                                  INVALIDATION_QUEUE_REDIS,
+                                  _get_redis_queue_key,
+                                  _get_redis_processing_key,
+                                  )
+from ..key_construction import get_model_cache_key
+
+User = get_user_model()
+
+
+class TestInvalidationQueue(APITestCase):
+
+    def setUp(self):
+        self.model_cache_key = get_model_cache_key(User)
+        cache.set(self.model_cache_key, 'dummy')
+
+    def tearDown(self):
+        cache.clear()
+
+    @override_settings(DRF_REDIS_CACHE_INVALIDATION_QUEUE=INVALIDATION_QUEUE_THREAD)
+    def test_thread_queue_invalidates_cache_in_background(self):
+        processed_events = get_invalidation_queue_stats()["processed"]
+
+        invalidate_model_cache(User)
+        _get_thread_queue().join()
+
+        self.assertIs(cache.get(self.model_cache_key), None)
+        self.assertEqual(get_invalidation_queue_stats()["processed"], processed_events + 1)
+
+    @override_settings(DRF_REDIS_CACHE_INVALIDATION_QUEUE=INVALIDATION_QUEUE_REDIS)
+    def test_redis_queue_invalidates_cache_when_worker_processes_it(self):
+        invalidate_model_cache(User)
+
+        self.assertEqual(cache.get(self.model_cache_key), 'dummy')
+        self.assertEqual(get_invalidation_queue_stats()["depth"], 1)
+
+        process_redis_invalidation_queue(max_events=1)
+
+        self.assertIs(cache.get(self.model_cache_key), None)
+        self.assertEqual(get_invalidation_queue_stats()["depth"], 0)
+
+    @override_settings(DRF_REDIS_CACHE_INVALIDATION_QUEUE=INVALIDATION_QUEUE_REDIS)
+    def test_redis_queue_retries_failed_event(self):
+        failed_events = get_invalidation_queue_stats()["failed"]
+        invalidate_model_cache(User)
+
+        with mock.patch.object(invalidation, 'execute_invalidations',
+                               side_effect=[RedisError(), None]) as execute_invalidations, \
+                mock.patch.object(invalidation_queue, 'RETRY_DELAY_SECONDS', 0):
+            process_redis_invalidation_queue(max_events=1)
+
+        self.assertEqual(execute_invalidations.call_count, 2)
+        self.assertEqual(get_invalidation_queue_stats()["failed"], failed_events + 1)
+        self.assertEqual(get_invalidation_queue_stats()["depth"], 0)
+        self.assertEqual(get_redis_connection().llen(_get_redis_processing_key()), 0)
+
+    @override_settings(DRF_REDIS_CACHE_INVALIDATION_QUEUE=INVALIDATION_QUEUE_REDIS)
+    def test_redis_queue_worker_recovers_events_of_killed_worker(self):
+        invalidate_model_cache(User)
+        redis_connection = get_redis_connection()
+        redis_connection.lmove(_get_redis_queue_key(), _get_redis_processing_key(), 'RIGHT', 'LEFT')
+
+        process_redis_invalidation_queue(max_events=1)
+
+        self.assertIs(cache.get(self.model_cache_key), None)
+        self.assertEqual(redis_connection.llen(_get_redis_processing_key()), 0)
+
+    @override_settings(DRF_REDIS_CACHE_INVALIDATION_QUEUE=INVALIDATION_QUEUE_REDIS,
+                       DRF_REDIS_CACHE_INVALIDATION_QUEUE_MAX_SIZE=0)
+    def test_full_queue_executes_invalidation_synchronously(self):
+        executed_synchronously = get_invalidation_queue_stats()["executed_synchronously"]
+
+        invalidate_model_cache(User)
+
+        self.assertIs(cache.get(self.model_cache_key), None)
+        self.assertEqual(get_invalidation_queue_stats()["executed_synchronously"], executed_synchronously + 1)
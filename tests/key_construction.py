@@ -1,5 +1,7 @@
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import Group, Permission
+from django.core.cache import cache
+from django.test import override_settings
 from django.utils.decorators import method_decorator
 from model_mommy import mommy
 from rest_framework.test import APITestCase, APIClient
@@ -12,12 +14,23 @@ from ..key_construction import (_CACHE_SEPARATOR as DEFAULT_CACHE_SEPARATOR,
                                 _add_user_to_cache_key,
                                 _add_queryparams_to_cache_key,
                                 _add_model_dependencies_to_cache_key,
+                                _add_generations_to_cache_key,
+                                _add_instance_to_cache_key,
                                 get_model_cache_key,
+                                get_instance_cache_key,
+                                get_model_generation_key,
+                                get_collection_generation_key,
+                                get_instance_generation_key,
+                                get_user_generation_key,
+                                get_collection_cache_pattern,
+                                get_invalidation_target,
+                                get_instance_tag,
+                                get_user_tag,
                                 get_user_cache_key,
                                 get_base_cache_key_for_function,
                                 get_cache_key_for_decorated_function,
                                 )
-from ..utils import get_request_lang
+from ..utils import get_request_lang, CACHE_SCOPE_INSTANCE, KEY_FORMAT_HASHED
 
 User = get_user_model()
 
@@ -212,6 +225,24 @@ class TestKeyConstruction(APITestCase):
                         x_pos_in_five == x_pos_in_six)
         self.assertNotEqual(x_pos_in_one, -1)
 
+    def test_add_queryparams_to_cache_key_adds_all_values_of_repeated_params(self):
+        request = self.get_request(url="/?k=val&k=other_val")
+
+        key_with_param = _add_queryparams_to_cache_key(self.cache_key, request)
+
+        self.assertIn("k:val", key_with_param)
+        self.assertIn("k:other_val", key_with_param)
+        self.assertEqual(key_with_param,
+                         _add_queryparams_to_cache_key(self.cache_key, self.get_request(url="/?k=other_val&k=val")))
+
+    def test_add_queryparams_to_cache_key_skips_ignored_params(self):
+        request = self.get_request(url="/?k=val&utm_source=mail")
+
+        key_with_param = _add_queryparams_to_cache_key(self.cache_key, request, ignored_queryparams=("utm_*", ))
+
+        self.assertIn("k:val", key_with_param)
+        self.assertNotIn("utm_source", key_with_param)
+
     def test_add_model_dependencies_to_cache_key_doesnt_add_anything_if_no_models_are_passed(self):
         key_without_models = _add_model_dependencies_to_cache_key(self.cache_key, [])
 
@@ -463,3 +494,175 @@ class TestKeyConstruction(APITestCase):
         proper_key = _add_model_dependencies_to_cache_key(proper_key_with_queryparams, model_dependencies)
 
         self.assertEqual(func_key, proper_key)
+
+    def test_get_model_generation_key_contains_model_cache_key(self):
+        generation_key = get_model_generation_key(User)
+
+        self.assertIn(get_model_cache_key(User), generation_key)
+        self.assertNotEqual(generation_key, get_model_cache_key(User))
+
+    def test_get_invalidation_target_drops_identifiers(self):
+        user = User(id=3)
+        targets = {
+            get_model_cache_key(Group): 'model:auth.Group',
+            get_collection_cache_pattern(Group): 'collection:auth.Group',
+            get_instance_cache_key(Group, 5): 'instance:auth.Group',
+            get_user_cache_key(user): 'user',
+            get_model_generation_key(Group): 'model:auth.Group',
+            get_collection_generation_key(Group): 'collection:auth.Group',
+            get_instance_generation_key(Group, 5): 'instance:auth.Group',
+            get_user_generation_key(user): 'user',
+            get_instance_tag(Group, 5): 'instance:auth.Group',
+            get_user_tag(user): 'user',
+        }
+
+        for key, target in targets.items():
+            self.assertEqual(get_invalidation_target(key), target)
+
+    def test_add_generations_to_cache_key_doesnt_add_anything_without_dependencies(self):
+        request = self.get_request()
+
+        key_without_generations = _add_generations_to_cache_key(self.cache_key, request, cache_user=True)
+
+        self.assertEqual(self.cache_key, key_without_generations)
+
+    def test_add_generations_to_cache_key_adds_current_generations(self):
+        user = mommy.make(User)
+        request = self.get_request(user=user)
+        model_generation_key = get_collection_generation_key(Group)
+        other_model_generation_key = get_collection_generation_key(Permission)
+        user_generation_key = get_user_generation_key(user)
+
+        cache.set(model_generation_key, 3, None)
+        cache.delete(other_model_generation_key)
+        cache.set(user_generation_key, 7, None)
+
+        key_with_generations = _add_generations_to_cache_key(self.cache_key, request,
+                                                             cache_user=True,
+                                                             model_dependencies=[Group, Permission])
+
+        other_model_generation = cache.get(other_model_generation_key)
+        self.assertIsNotNone(other_model_generation)
+        self.assertIn(f"gen:3.{other_model_generation}.7", key_with_generations)
+
+        cache.delete_many([model_generation_key, other_model_generation_key, user_generation_key])
+
+    def test_add_generations_to_cache_key_changes_key_after_generation_changes(self):
+        request = self.get_request()
+        model_generation_key = get_collection_generation_key(Group)
+
+        key_before = _add_generations_to_cache_key(self.cache_key, request, model_dependencies=[Group])
+        cache.set(model_generation_key, cache.get(model_generation_key, 0) + 1, None)
+        key_after = _add_generations_to_cache_key(self.cache_key, request, model_dependencies=[Group])
+
+        self.assertNotEqual(key_before, key_after)
+
+        cache.delete(model_generation_key)
+
+    def test_add_instance_to_cache_key_adds_instance_to_cache_key(self):
+        key_with_instance = _add_instance_to_cache_key(self.cache_key, User, 5)
+
+        self.assertEqual(key_with_instance, self.cache_key + get_instance_cache_key(User, 5))
+
+    def test_get_instance_cache_key_doesnt_match_other_identifiers_with_the_same_prefix(self):
+        instance_key = get_instance_cache_key(User, 1)
+        other_instance_key = get_instance_cache_key(User, 12)
+
+        self.assertNotIn(instance_key, other_instance_key)
+
+    def test_add_generations_to_cache_key_adds_instance_generations(self):
+        request = self.get_request()
+        model_generation_key = get_model_generation_key(Group)
+        instance_generation_key = get_instance_generation_key(Group, 5)
+
+        cache.set(model_generation_key, 2, None)
+        cache.set(instance_generation_key, 4, None)
+
+        key_with_generations = _add_generations_to_cache_key(self.cache_key, request,
+                                                             instance_model=Group,
+                                                             identifier=5)
+
+        self.assertIn("gen:2.4", key_with_generations)
+
+        cache.delete_many([model_generation_key, instance_generation_key])
+
+    def test_get_cache_key_for_decorated_function_with_instance_scope(self):
+        request = self.get_request()
+        model_dependencies = [User, Permission]
+        identifier = "some_identifier"
+
+        def decorator(func):
+            def wrapped(request, *args, **kwargs):
+                return func(request, *args, **kwargs)
+
+            return wrapped
+
+        @method_decorator(decorator)
+        def some_func(request, *args, **kwargs):
+            return "testing"
+
+        func_key = get_cache_key_for_decorated_function(some_func,
+                                                        request,
+                                                        model_dependencies=model_dependencies,
+                                                        identifier=identifier,
+                                                        cache_scope=CACHE_SCOPE_INSTANCE)
+
+        proper_key_of_function = get_base_cache_key_for_function(some_func, identifier)
+        proper_key_with_request = _add_request_method_to_cache_key(proper_key_of_function, request)
+        proper_key_with_models = _add_model_dependencies_to_cache_key(proper_key_with_request, [Permission])
+        proper_key = _add_instance_to_cache_key(proper_key_with_models, User, identifier)
+
+        self.assertEqual(func_key, proper_key)
+
+    @override_settings(DRF_REDIS_CACHE_KEY_FORMAT=KEY_FORMAT_HASHED)
+    def test_get_cache_key_for_decorated_function_with_hashed_format_has_fixed_length(self):
+        user = mommy.make(User)
+        short_request = self.get_request(url="/?k=val", user=user)
+        long_request = self.get_request(url=f"/?k={'v' * 500}&other=val", user=user)
+
+        def decorator(func):
+            def wrapped(request, *args, **kwargs):
+                return func(request, *args, **kwargs)
+
+            return wrapped
+
+        @method_decorator(decorator)
+        def some_func(request, *args, **kwargs):
+            return "testing"
+
+        short_key = get_cache_key_for_decorated_function(some_func, short_request, cache_queryparams=True)
+        long_key = get_cache_key_for_decorated_function(some_func, long_request, cache_queryparams=True)
+
+        self.assertNotEqual(short_key, long_key)
+        self.assertEqual(len(short_key), len(long_key))
+
+    @override_settings(DRF_REDIS_CACHE_KEY_FORMAT=KEY_FORMAT_HASHED)
+    def test_get_cache_key_for_decorated_function_with_hashed_format_keeps_readable_prefix(self):
+        user = mommy.make(User)
+        request = self.get_request(url="/?k=val", user=user)
+        identifier = "some_identifier"
+
+        def decorator(func):
+            def wrapped(request, *args, **kwargs):
+                return func(request, *args, **kwargs)
+
+            return wrapped
+
+        @method_decorator(decorator)
+        def some_func(request, *args, **kwargs):
+            return "testing"
+
+        func_key = get_cache_key_for_decorated_function(some_func,
+                                                        request,
+                                                        cache_language=True,
+                                                        cache_user=True,
+                                                        cache_queryparams=True,
+                                                        model_dependencies=[User, Permission],
+                                                        identifier=identifier,
+                                                        cache_scope=CACHE_SCOPE_INSTANCE)
+
+        self.assertTrue(func_key.startswith(get_base_cache_key_for_function(some_func, identifier)))
+        self.assertIn(get_user_cache_key(user), func_key)
+        self.assertIn(_add_model_dependencies_to_cache_key("", [Permission]), func_key)
+        self.assertIn(get_instance_cache_key(User, identifier), func_key)
+        self.assertNotIn("k:val", func_key)
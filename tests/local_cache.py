@@ -0,0 +1,82 @@
+import time
+from unittest import mock
+
+from django.test import override_settings
+from rest_framework.test import APITestCase
+
+from .. import local_cache as local_cache_module
+from ..local_cache import LocalCache, get_local_cache, publish_invalidation
+
+
+class TestLocalCache(APITestCase):
+
+    def test_local_cache_returns_saved_value(self):
+        local_cache = LocalCache(max_bytes=100)
+
+        local_cache.set('key', 'value', timeout=60, size=10)
+
+        self.assertEqual(local_cache.get('key'), 'value')
+        self.assertEqual(local_cache.size, 10)
+
+    def test_local_cache_doesnt_return_expired_value(self):
+        local_cache = LocalCache(max_bytes=100)
+
+        local_cache.set('key', 'value', timeout=0, size=10)
+
+        self.assertIs(local_cache.get('key'), None)
+        self.assertEqual(local_cache.size, 0)
+
+    def test_local_cache_evicts_least_recently_used_values(self):
+        local_cache = LocalCache(max_bytes=30)
+
+        local_cache.set('first', 1, timeout=60, size=10)
+        local_cache.set('second', 2, timeout=60, size=10)
+        local_cache.set('third', 3, timeout=60, size=10)
+        local_cache.get('first')
+        local_cache.set('fourth', 4, timeout=60, size=10)
+
+        self.assertEqual(local_cache.get('first'), 1)
+        self.assertIs(local_cache.get('second'), None)
+        self.assertEqual(local_cache.get('third'), 3)
+        self.assertEqual(local_cache.get('fourth'), 4)
+        self.assertEqual(local_cache.size, 30)
+
+    def test_local_cache_doesnt_save_values_bigger_than_max_bytes(self):
+        local_cache = LocalCache(max_bytes=30)
+
+        local_cache.set('key', 'value', timeout=60, size=31)
+
+        self.assertIs(local_cache.get('key'), None)
+
+    def test_local_cache_measures_size_of_pickled_value(self):
+        local_cache = LocalCache(max_bytes=1000)
+
+        local_cache.set('key', 'value', timeout=60)
+
+        self.assertGreater(local_cache.size, 0)
+
+    def test_get_local_cache_returns_none_when_disabled(self):
+        self.assertIs(get_local_cache(), None)
+
+    @override_settings(DRF_REDIS_CACHE_LOCAL_CACHE_MAX_BYTES=1000)
+    def test_publish_invalidation_clears_local_cache(self):
+        local_cache = get_local_cache()
+        local_cache.set('key', 'value', timeout=60)
+
+        publish_invalidation()
+
+        deadline = time.monotonic() + 2
+        while local_cache.get('key') is not None and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        self.assertIs(local_cache.get('key'), None)
+
+    @override_settings(DRF_REDIS_CACHE_LOCAL_CACHE_MAX_BYTES=1000)
+    def test_publish_invalidation_clears_local_cache_of_current_process_immediately(self):
+        local_cache = get_local_cache()
+        local_cache.set('key', 'value', timeout=60)
+
+        with mock.patch.object(local_cache_module, 'get_redis_connection'):
+            publish_invalidation()
+
+        self.assertIs(local_cache.get('key'), None)
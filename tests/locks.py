@@ -0,0 +1,79 @@
+import threading
+import time
+
+from django.core.cache import cache
+from rest_framework.test import APITestCase
+
+from ..locks import acquire_lock, release_lock, get_or_compute_single_flight
+
+
+class TestLocks(APITestCase):
+
+    def test_acquire_lock_returns_none_if_lock_is_held(self):
+        token = acquire_lock('locked_key', 10)
+
+        self.assertIsNotNone(token)
+        self.assertIs(acquire_lock('locked_key', 10), None)
+
+        release_lock('locked_key', token)
+
+    def test_release_lock_doesnt_release_lock_held_with_other_token(self):
+        token = acquire_lock('locked_key', 10)
+
+        self.assertFalse(release_lock('locked_key', 'other_token'))
+        self.assertIs(acquire_lock('locked_key', 10), None)
+        self.assertTrue(release_lock('locked_key', token))
+        self.assertIsNotNone(acquire_lock('locked_key', 10))
+
+        cache.delete('lock__locked_key')
+
+    def test_get_or_compute_single_flight_computes_value_when_lock_is_free(self):
+        value = get_or_compute_single_flight('free_key',
+                                             get_cached=lambda: None,
+                                             compute=lambda: 'computed',
+                                             lock_timeout=10,
+                                             wait_timeout=1)
+
+        self.assertEqual(value, 'computed')
+
+    def test_get_or_compute_single_flight_waits_for_value_when_lock_is_held(self):
+        token = acquire_lock('held_key', 10)
+        cache.set('held_key', 'cached')
+
+        value = get_or_compute_single_flight('held_key',
+                                             get_cached=lambda: cache.get('held_key'),
+                                             compute=lambda: 'computed',
+                                             lock_timeout=10,
+                                             wait_timeout=1)
+
+        self.assertEqual(value, 'cached')
+
+        release_lock('held_key', token)
+        cache.delete('held_key')
+
+    def test_get_or_compute_single_flight_computes_value_when_waiting_times_out(self):
+        token = acquire_lock('timed_out_key', 10)
+
+        value = get_or_compute_single_flight('timed_out_key',
+                                             get_cached=lambda: None,
+                                             compute=lambda: 'computed',
+                                             lock_timeout=10,
+                                             wait_timeout=0.1)
+
+        self.assertEqual(value, 'computed')
+
+        release_lock('timed_out_key', token)
+
+    def test_get_or_compute_single_flight_stops_waiting_when_lock_is_released_without_value(self):
+        token = acquire_lock('uncached_key', 10)
+        threading.Timer(0.1, release_lock, args=('uncached_key', token)).start()
+        start = time.monotonic()
+
+        value = get_or_compute_single_flight('uncached_key',
+                                             get_cached=lambda: None,
+                                             compute=lambda: 'computed',
+                                             lock_timeout=10,
+                                             wait_timeout=5)
+
+        self.assertEqual(value, 'computed')
+        self.assertLess(time.monotonic() - start, 1)
@@ -0,0 +1,93 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.http import Http404
+from django.test import override_settings
+from rest_framework.response import Response
+from rest_framework.test import APITestCase, APIClient
+from rest_framework.views import APIView
+
+from ..decorators import cache_it
+from ..invalidation import invalidate_instance_cache
+from ..metrics import (PrometheusMetrics,
+                       get_metrics_backend,
+                       metrics_view,
+                       METRIC_HITS,
+                       METRIC_MISSES,
+                       METRIC_STORED_BYTES,
+                       )
+from ..registry import register_instance_parameter
+from .decorators import bind_view
+
+PROMETHEUS_BACKEND = 'drf_redis_cache_decorator.metrics.PrometheusMetrics'
+
+
+class TestMetrics(APITestCase):
+
+    def get_request(self, method="get"):
+        client = APIClient()
+        base_request = getattr(client, method)("/").wsgi_request
+        return APIView().initialize_request(base_request)
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_get_metrics_backend_returns_none_when_metrics_are_disabled(self):
+        self.assertIs(get_metrics_backend(), None)
+
+    def test_prometheus_metrics_renders_counters_and_histograms(self):
+        metrics = PrometheusMetrics()
+        metrics.increment(METRIC_HITS, {'view': 'views.some_view', 'tier': 'redis'})
+        metrics.increment(METRIC_HITS, {'view': 'views.some_view', 'tier': 'redis'})
+        metrics.observe(METRIC_STORED_BYTES, {'view': 'views.some_view'}, 300)
+
+        rendered = metrics.render()
+
+        self.assertIn('# TYPE drf_redis_cache_hits_total counter', rendered)
+        self.assertIn('drf_redis_cache_hits_total{tier="redis",view="views.some_view"} 2', rendered)
+        self.assertIn('drf_redis_cache_stored_bytes_bucket{view="views.some_view",le="256"} 0', rendered)
+        self.assertIn('drf_redis_cache_stored_bytes_bucket{view="views.some_view",le="1024"} 1', rendered)
+        self.assertIn('drf_redis_cache_stored_bytes_count{view="views.some_view"} 1', rendered)
+
+    @override_settings(DRF_REDIS_CACHE_METRICS_BACKEND=PROMETHEUS_BACKEND)
+    def test_cache_it_records_hits_misses_and_bypasses(self):
+        def measured_view(request, *args, **kwargs):
+            return Response({'data': 'dummy'})
+
+        wrapped_view = cache_it()(bind_view(measured_view))
+
+        wrapped_view(self.get_request())
+        wrapped_view(self.get_request())
+        wrapped_view(self.get_request(method="post"))
+
+        rendered = get_metrics_backend().render()
+
+        self.assertRegex(rendered, r'drf_redis_cache_misses_total\{view="[\w.]+measured_view"\} 1')
+        self.assertRegex(rendered, r'drf_redis_cache_hits_total\{tier="redis",view="[\w.]+measured_view"\} 1')
+        self.assertRegex(rendered, r'drf_redis_cache_bypasses_total\{reason="method",view="[\w.]+measured_view"\} 1')
+        self.assertIn('drf_redis_cache_redis_latency_seconds_count', rendered)
+
+    @override_settings(DRF_REDIS_CACHE_METRICS_BACKEND=PROMETHEUS_BACKEND, DRF_REDIS_CACHE_INVALIDATE_ON_COMMIT=False)
+    def test_invalidation_metrics_are_labelled_without_identifiers(self):
+        user_model = get_user_model()
+        register_instance_parameter(user_model, 'pk')
+
+        invalidate_instance_cache(user_model(id=1))
+        invalidate_instance_cache(user_model(id=2))
+
+        rendered = get_metrics_backend().render()
+
+        self.assertIn('drf_redis_cache_invalidations_total{mode="pattern",target="instance:auth.User"} 2.0', rendered)
+        self.assertNotIn('instance:auth.User:1', rendered)
+
+    @override_settings(DRF_REDIS_CACHE_METRICS_BACKEND=PROMETHEUS_BACKEND)
+    def test_metrics_view_returns_metrics_in_prometheus_format(self):
+        get_metrics_backend().increment(METRIC_MISSES, {'view': 'views.some_view'})
+
+        response = metrics_view(self.get_request())
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'drf_redis_cache_misses_total', response.content)
+
+    def test_metrics_view_raises_404_when_metrics_are_disabled(self):
+        with self.assertRaises(Http404):
+            metrics_view(self.get_request())
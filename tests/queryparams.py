@@ -0,0 +1,46 @@
+from django.http import QueryDict
+from rest_framework.test import APITestCase
+
+from ..queryparams import get_normalized_queryparams, lowercase, integer, skip_values
+
+
+class TestQueryParams(APITestCase):
+
+    def test_get_normalized_queryparams_keeps_all_values_of_repeated_params(self):
+        queryparams = get_normalized_queryparams(QueryDict("k=b&k=a&w=val"))
+
+        self.assertEqual(queryparams, [("k", "a"), ("k", "b"), ("w", "val")])
+
+    def test_get_normalized_queryparams_doesnt_care_about_order_of_repeated_params(self):
+        self.assertEqual(get_normalized_queryparams(QueryDict("k=a&w=val&k=b")),
+                         get_normalized_queryparams(QueryDict("k=b&k=a&w=val")))
+
+    def test_get_normalized_queryparams_skips_ignored_params(self):
+        queryparams = get_normalized_queryparams(QueryDict("k=val&utm_source=mail&_=123"),
+                                                 ignored_queryparams=("utm_*", "_"))
+
+        self.assertEqual(queryparams, [("k", "val")])
+
+    def test_get_normalized_queryparams_skips_params_which_are_not_allowed(self):
+        queryparams = get_normalized_queryparams(QueryDict("page=2&page_size=10&other=val"),
+                                                 allowed_queryparams=("page*", ))
+
+        self.assertEqual(queryparams, [("page", "2"), ("page_size", "10")])
+
+    def test_get_normalized_queryparams_applies_normalizers(self):
+        queryparams = get_normalized_queryparams(QueryDict("search=Val&page=02&ordering=name"),
+                                                 normalizers={"search": lowercase,
+                                                              "page": integer,
+                                                              "ordering": skip_values("name")})
+
+        self.assertEqual(queryparams, [("page", "2"), ("search", "val")])
+
+    def test_integer_leaves_non_integer_values(self):
+        self.assertEqual(integer(" 007"), "7")
+        self.assertEqual(integer("seven"), "seven")
+
+    def test_skip_values_applies_normalizer_before_comparison(self):
+        normalize = skip_values("1", normalizer=integer)
+
+        self.assertIsNone(normalize("01"))
+        self.assertEqual(normalize("02"), "2")
@@ -0,0 +1,73 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group, Permission
+from django.test import override_settings
+from rest_framework.test import APITestCase
+
+from .. import registry
+from ..registry import (register_instance_parameter,
+                        get_instance_parameters,
+                        register_model_dependencies,
+                        is_model_dependency,
+                        subscribe_to_observed_models,
+                        load_model_dependencies,
+                        )
+
+User = get_user_model()
+
+
+class TestRegistry(APITestCase):
+
+    def test_register_instance_parameter_adds_parameter_of_model(self):
+        register_instance_parameter(Group, 'name')
+
+        self.assertIn('name', get_instance_parameters(Group))
+
+    def test_get_instance_parameters_returns_empty_set_for_unregistered_model(self):
+        class UnregisteredModel:
+            class _meta:
+                app_label = 'unregistered'
+
+        self.assertEqual(get_instance_parameters(UnregisteredModel), set())
+
+    def test_register_model_dependencies_registers_dependencies(self):
+        register_model_dependencies([Group])
+
+        self.assertTrue(is_model_dependency(Group))
+
+    def test_register_model_dependencies_with_cache_user_observes_user_model(self):
+        observed_models = []
+        subscribe_to_observed_models(observed_models.append)
+
+        register_model_dependencies([Permission], cache_user=True)
+
+        self.assertIn(User, observed_models)
+        self.assertIn(Permission, observed_models)
+        self.assertTrue(is_model_dependency(Permission))
+
+    def test_subscribe_to_observed_models_notifies_about_registered_and_future_models(self):
+        register_model_dependencies([Group])
+
+        observed_models = []
+        subscribe_to_observed_models(observed_models.append)
+
+        self.assertIn(Group, observed_models)
+
+        register_model_dependencies([Permission])
+
+        self.assertIn(Permission, observed_models)
+
+    @override_settings(DRF_REDIS_CACHE_VIEW_MODULES=['first.views', 'second.views'],
+                       DRF_REDIS_CACHE_LOAD_URLCONF=False)
+    def test_load_model_dependencies_imports_view_modules(self):
+        with mock.patch.object(registry, 'import_module') as import_module:
+            load_model_dependencies()
+
+        self.assertEqual([call.args[0] for call in import_module.call_args_list], ['first.views', 'second.views'])
+
+    def test_load_model_dependencies_loads_urlconf(self):
+        with mock.patch.object(registry, 'get_resolver') as get_resolver:
+            load_model_dependencies()
+
+        get_resolver.assert_called_once_with()
@@ -0,0 +1,126 @@
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timezone
+from decimal import Decimal
+from unittest import skipIf
+
+from django.test import override_settings
+from rest_framework.response import Response
+from rest_framework.test import APITestCase
+
+from ..decorators import _get_response_dict
+from ..entries import make_cache_entry, ENTRY_RESPONSE
+from ..serializers import (dumps_entry,
+                           loads_entry,
+                           pack_response_dict,
+                           msgpack,
+                           RENDERED_CONTENT,
+                           SERIALIZER_JSON,
+                           SERIALIZER_MSGPACK,
+                           )
+
+
+class TestSerializers(APITestCase):
+
+    def setUp(self):
+        response = Response({'results': [{'id': 1, 'name': 'first'}, {'id': 2, 'name': None}]})
+        self.entry = make_cache_entry(_get_response_dict(response), compute_time=0.1, timeout=60)
+
+    def test_pack_response_dict_skips_default_values(self):
+        packed_response_dict = pack_response_dict(self.entry[ENTRY_RESPONSE])
+
+        self.assertEqual(packed_response_dict['data'], self.entry[ENTRY_RESPONSE]['data'])
+        self.assertEqual(packed_response_dict['status'], 200)
+        self.assertNotIn('template_name', packed_response_dict)
+        self.assertNotIn('exception', packed_response_dict)
+
+    def test_dumps_entry_pickles_entry_by_default(self):
+        payload = dumps_entry(self.entry)
+
+        self.assertEqual(payload[:1], b'p')
+        self.assertEqual(loads_entry(payload)[ENTRY_RESPONSE]['data'], self.entry[ENTRY_RESPONSE]['data'])
+
+    @override_settings(DRF_REDIS_CACHE_SERIALIZER=SERIALIZER_JSON)
+    def test_dumps_entry_serializes_entry_to_json(self):
+        payload = dumps_entry(self.entry)
+        entry = loads_entry(payload)
+
+        self.assertEqual(payload[:1], b'j')
+        self.assertEqual(entry[ENTRY_RESPONSE]['data'], self.entry[ENTRY_RESPONSE]['data'])
+        self.assertEqual(entry[ENTRY_RESPONSE]['status'], 200)
+
+    @override_settings(DRF_REDIS_CACHE_SERIALIZER=SERIALIZER_JSON)
+    def test_dumps_entry_pickles_entry_which_json_cant_represent(self):
+        entry = make_cache_entry({'data': {'price': Decimal('1.10')}, 'status': 200},
+                                 compute_time=0.1,
+                                 timeout=60)
+
+        payload = dumps_entry(entry)
+
+        self.assertEqual(payload[:1], b'p')
+        self.assertEqual(loads_entry(payload)[ENTRY_RESPONSE]['data'], {'price': Decimal('1.10')})
+
+    @override_settings(DRF_REDIS_CACHE_SERIALIZER=SERIALIZER_JSON)
+    def test_dumps_entry_pickles_datetime_and_uuid_with_json_serializer(self):
+        values = [datetime(2020, 1, 2, 3, 4, 5, 123456, tzinfo=timezone.utc), uuid.UUID(int=1)]
+
+        for value in values:
+            entry = make_cache_entry({'data': {'value': value}, 'status': 200}, compute_time=0.1, timeout=60)
+
+            payload = dumps_entry(entry)
+
+            self.assertEqual(payload[:1], b'p')
+            self.assertEqual(loads_entry(payload)[ENTRY_RESPONSE]['data'], {'value': value})
+
+    @skipIf(msgpack is None, 'msgpack is not installed')
+    def test_dumps_entry_pickles_dicts_with_keys_other_than_strings(self):
+        entry = make_cache_entry({'data': {'results': {1: 'a', (2, 3): 'b'}}, 'status': 200},
+                                 compute_time=0.1,
+                                 timeout=60)
+
+        for serializer in (SERIALIZER_JSON, SERIALIZER_MSGPACK):
+            with override_settings(DRF_REDIS_CACHE_SERIALIZER=serializer):
+                payload = dumps_entry(entry)
+
+            self.assertEqual(payload[:1], b'p')
+            self.assertEqual(loads_entry(payload)[ENTRY_RESPONSE]['data'], {'results': {1: 'a', (2, 3): 'b'}})
+
+    @override_settings(DRF_REDIS_CACHE_SERIALIZER=SERIALIZER_JSON)
+    def test_dumps_entry_serializes_subclasses_of_builtin_types_to_json(self):
+        entry = make_cache_entry({'data': OrderedDict(results=[{'id': 1}]), 'status': 200},
+                                 compute_time=0.1,
+                                 timeout=60)
+
+        payload = dumps_entry(entry)
+
+        self.assertEqual(payload[:1], b'j')
+        self.assertEqual(loads_entry(payload)[ENTRY_RESPONSE]['data'], {'results': [{'id': 1}]})
+
+    @override_settings(DRF_REDIS_CACHE_SERIALIZER=SERIALIZER_JSON)
+    def test_dumps_entry_keeps_rendered_content_as_raw_bytes_in_json(self):
+        response_dict = {
+            RENDERED_CONTENT: b'{"id":1}',
+            'status': 200,
+            'content_type': 'application/json',
+            'headers': [('Allow', 'GET')],
+        }
+        entry = make_cache_entry(response_dict, compute_time=0.1, timeout=60)
+
+        payload = dumps_entry(entry)
+        loaded_response_dict = loads_entry(payload)[ENTRY_RESPONSE]
+
+        self.assertEqual(payload[:1], b'r')
+        self.assertTrue(payload.endswith(b'{"id":1}'))
+        self.assertEqual(loaded_response_dict[RENDERED_CONTENT], b'{"id":1}')
+        self.assertEqual(loaded_response_dict['content_type'], 'application/json')
+
+    @skipIf(msgpack is None, 'msgpack is not installed')
+    @override_settings(DRF_REDIS_CACHE_SERIALIZER=SERIALIZER_MSGPACK)
+    def test_dumps_entry_serializes_entry_to_msgpack(self):
+        payload = dumps_entry(self.entry)
+
+        self.assertEqual(payload[:1], b'm')
+        self.assertEqual(loads_entry(payload)[ENTRY_RESPONSE]['data'], self.entry[ENTRY_RESPONSE]['data'])
+
+    def test_loads_entry_returns_none_for_unknown_format(self):
+        self.assertIs(loads_entry(b'\x80unknown'), None)
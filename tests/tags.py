@@ -0,0 +1,136 @@
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from django.test import override_settings
+from django_redis import get_redis_connection
+from rest_framework.test import APITestCase
+
+from .. import tags
+from ..tags import (set_cache_with_tags,
+                    aset_cache_with_tags,
+                    asweep_random_tag_set,
+                    invalidate_tags,
+                    sweep_stale_tag_members,
+                    sweep_random_tag_set,
+                    )
+
+
+@override_settings(DRF_REDIS_CACHE_TAG_SWEEP_PROBABILITY=0)
+class TestTags(APITestCase):
+
+    def setUp(self):
+        self.dummy_val = b'dummy'
+
+    def test_set_cache_with_tags_saves_value(self):
+        set_cache_with_tags('tagged_key', self.dummy_val, 60, ['tag:one'])
+
+        self.assertTrue(cache.has_key('tagged_key'))
+
+        invalidate_tags(['tag:one'])
+
+    def test_invalidate_tags_invalidates_tagged_keys_only(self):
+        set_cache_with_tags('first_key', self.dummy_val, 60, ['tag:one', 'tag:two'])
+        set_cache_with_tags('second_key', self.dummy_val, 60, ['tag:two'])
+        set_cache_with_tags('third_key', self.dummy_val, 60, ['tag:three'])
+
+        invalidate_tags(['tag:one'])
+
+        self.assertFalse(cache.has_key('first_key'))
+        self.assertTrue(cache.has_key('second_key'))
+        self.assertTrue(cache.has_key('third_key'))
+
+        invalidate_tags(['tag:two', 'tag:three'])
+
+        self.assertFalse(cache.has_key('second_key'))
+        self.assertFalse(cache.has_key('third_key'))
+
+    def test_invalidate_tags_doesnt_invalidate_tags_with_the_same_prefix(self):
+        set_cache_with_tags('model_key', self.dummy_val, 60, ['model:app.Model'])
+        set_cache_with_tags('other_model_key', self.dummy_val, 60, ['model:app.ModelOther'])
+
+        invalidate_tags(['model:app.Model'])
+
+        self.assertFalse(cache.has_key('model_key'))
+        self.assertTrue(cache.has_key('other_model_key'))
+
+        invalidate_tags(['model:app.ModelOther'])
+
+    def test_invalidate_tags_keeps_entries_registered_during_invalidation(self):
+        set_cache_with_tags('invalidated_key', self.dummy_val, 60, ['tag:race'])
+        redis_connection = get_redis_connection()
+        concurrent_key = cache.make_key('concurrent_key')
+        pipeline = redis_connection.pipeline(transaction=False)
+        execute = pipeline.execute
+
+        def execute_with_concurrent_write():
+            results = execute()
+            if not redis_connection.exists(concurrent_key):
+                redis_connection.set(concurrent_key, self.dummy_val, ex=60)
+                redis_connection.sadd(tags._get_tag_set_key('tag:race'), concurrent_key)
+            return results
+
+        pipeline.execute = execute_with_concurrent_write
+        with mock.patch.object(redis_connection, 'pipeline', return_value=pipeline):
+            invalidate_tags(['tag:race'])
+
+        self.assertFalse(cache.has_key('invalidated_key'))
+        self.assertTrue(cache.has_key('concurrent_key'))
+
+        invalidate_tags(['tag:race'])
+
+        self.assertFalse(cache.has_key('concurrent_key'))
+
+    def test_sweep_stale_tag_members_removes_members_of_missing_keys(self):
+        set_cache_with_tags('stale_key', self.dummy_val, 60, ['tag:sweep'])
+        set_cache_with_tags('fresh_key', self.dummy_val, 60, ['tag:sweep'])
+        cache.delete('stale_key')
+
+        removed_members = sweep_stale_tag_members()
+
+        self.assertGreaterEqual(removed_members, 1)
+        self.assertEqual(sweep_stale_tag_members(), 0)
+        self.assertTrue(cache.has_key('fresh_key'))
+
+        invalidate_tags(['tag:sweep'])
+
+    def test_sweep_random_tag_set_removes_members_of_missing_keys(self):
+        set_cache_with_tags('stale_key', self.dummy_val, 60, ['tag:random_sweep'])
+        cache.delete('stale_key')
+        sweep_stale_tag_members()
+
+        self.assertEqual(sweep_random_tag_set(), 0)
+
+    def test_sweep_random_tag_set_checks_sample_of_tag_set(self):
+        cache.clear()
+        set_cache_with_tags('fresh_key', self.dummy_val, 60, ['tag:big'])
+        tag_key = tags._get_tag_set_key('tag:big')
+        get_redis_connection().sadd(tag_key, *[f'missing_key_{index}' for index in range(300)])
+
+        with mock.patch.object(tags, 'SWEEP_BATCH_SIZE', 10):
+            removed_members = sweep_random_tag_set()
+            async_removed_members = async_to_sync(asweep_random_tag_set)()
+
+        self.assertGreater(removed_members, 0)
+        self.assertLess(removed_members, 300)
+        self.assertGreater(async_removed_members, 0)
+        self.assertLess(removed_members + async_removed_members, 300)
+
+        invalidate_tags(['tag:big'])
+
+    def test_aset_cache_with_tags_saves_value_invalidated_by_its_tags(self):
+        async_to_sync(aset_cache_with_tags)('async_tagged_key', self.dummy_val, 60, ['tag:async'])
+
+        self.assertTrue(cache.has_key('async_tagged_key'))
+
+        invalidate_tags(['tag:async'])
+
+        self.assertFalse(cache.has_key('async_tagged_key'))
+
+    def test_asweep_random_tag_set_removes_stale_members(self):
+        set_cache_with_tags('stale_key', self.dummy_val, 60, ['tag:stale'])
+        cache.delete('stale_key')
+
+        removed_members = async_to_sync(asweep_random_tag_set)()
+
+        self.assertEqual(removed_members, 1)
@@ -1,5 +1,7 @@
 from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.test import override_settings
+from django.utils.translation import get_supported_language_variant
 from rest_framework.test import APITestCase, APIClient
 from rest_framework.views import APIView
 
@@ -29,16 +31,32 @@ class TestUtils(APITestCase):
         return APIView().initialize_request(base_request)
 
     def test_get_request_lang_returns_language_from_request_if_passed(self):
-        request_lang = "some_lang"
+        request_lang = "de"
         request = self.get_request(HTTP_ACCEPT_LANGUAGE=request_lang)
 
         lang_from_func = get_request_lang(request)
 
         self.assertEqual(request_lang, lang_from_func)
 
+    @override_settings(LANGUAGES=[("en", "English"), ("de", "German")], LANGUAGE_CODE="en")
+    def test_get_request_lang_resolves_header_variants_to_supported_language(self):
+        request_one = self.get_request(HTTP_ACCEPT_LANGUAGE="de-DE,de;q=0.9,en;q=0.8")
+        request_two = self.get_request(HTTP_ACCEPT_LANGUAGE="de-AT")
+        request_three = self.get_request(HTTP_ACCEPT_LANGUAGE="fr-FR,fr;q=0.9,de;q=0.5")
+
+        self.assertEqual(get_request_lang(request_one), "de")
+        self.assertEqual(get_request_lang(request_two), "de")
+        self.assertEqual(get_request_lang(request_three), "de")
+
+    @override_settings(LANGUAGES=[("en", "English"), ("de", "German")], LANGUAGE_CODE="en")
+    def test_get_request_lang_returns_language_from_settings_if_not_supported(self):
+        request = self.get_request(HTTP_ACCEPT_LANGUAGE="fr-FR,fr;q=0.9")
+
+        self.assertEqual(get_request_lang(request), "en")
+
     def test_get_request_lang_returns_language_from_settings_if_not_passed(self):
         request = self.get_request()
-        settings_lang = getattr(settings, "LANGUAGE_CODE", "")
+        settings_lang = get_supported_language_variant(getattr(settings, "LANGUAGE_CODE", ""))
 
         lang_from_func = get_request_lang(request)
 
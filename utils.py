@@ -1,5 +1,110 @@
+import math
+from functools import lru_cache
+
 from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.translation import get_supported_language_variant
+from django.utils.translation.trans_real import parse_accept_lang_header, language_code_re
+
+INVALIDATION_MODE_PATTERN = 'pattern'
+INVALIDATION_MODE_GENERATION = 'generation'
+INVALIDATION_MODE_TAGS = 'tags'
+
+CACHE_SCOPE_COLLECTION = 'collection'
+CACHE_SCOPE_INSTANCE = 'instance'
+
+KEY_FORMAT_PLAIN = 'plain'
+KEY_FORMAT_HASHED = 'hashed'
+
+_SETTINGS_PREFIX = 'DRF_REDIS_CACHE_'
+
+LANGUAGES_CACHE_SIZE = 1024
 
 
 def get_request_lang(request):
-    return request.META.get("HTTP_ACCEPT_LANGUAGE", getattr(settings, "LANGUAGE_CODE", ""))
+    """
+    Returns the language of the request resolved against settings.LANGUAGES
+    (like django.utils.translation.get_language_from_request does with Accept-Language header),
+    so all the variants of the header share the cache of a supported language.
+    :param request: request sent by client
+    :return: language code
+    """
+    return _get_supported_language(request.META.get("HTTP_ACCEPT_LANGUAGE", ""))
+
+
+@lru_cache(maxsize=LANGUAGES_CACHE_SIZE)
+def _get_supported_language(accept_language):
+    """
+    :param accept_language: value of Accept-Language header
+    :return: the most preferred supported language code or settings.LANGUAGE_CODE
+    """
+    for language_code, unused in parse_accept_lang_header(accept_language):
+        if language_code == '*':
+            break
+        if not language_code_re.search(language_code):
+            continue
+        try:
+            return get_supported_language_variant(language_code)
+        except LookupError:
+            continue
+
+    language_code = getattr(settings, "LANGUAGE_CODE", "")
+    try:
+        return get_supported_language_variant(language_code)
+    except LookupError:
+        return language_code
+
+
+@receiver(setting_changed)
+def _clear_supported_languages(setting, **kwargs):
+    if setting in ('LANGUAGES', 'LANGUAGE_CODE'):
+        _get_supported_language.cache_clear()
+
+
+def get_setting(name, default=None):
+    """
+    Returns a library setting defined in django settings with DRF_REDIS_CACHE_ prefix.
+    :param name: name of the setting without the prefix
+    :param default: value returned, when setting is not defined
+    :return: value of the setting
+    """
+    return getattr(settings, f'{_SETTINGS_PREFIX}{name}', default)
+
+
+def get_invalidation_mode():
+    """
+    Returns invalidation mode defined by DRF_REDIS_CACHE_INVALIDATION_MODE setting.
+    Default = INVALIDATION_MODE_PATTERN
+    :return: invalidation mode
+    """
+    return get_setting('INVALIDATION_MODE', INVALIDATION_MODE_PATTERN)
+
+
+def get_key_format():
+    """
+    Returns cache key format defined by DRF_REDIS_CACHE_KEY_FORMAT setting.
+    Default = KEY_FORMAT_PLAIN
+    :return: cache key format
+    """
+    return get_setting('KEY_FORMAT', KEY_FORMAT_PLAIN)
+
+
+def get_redis_timeout(timeout):
+    """
+    Redis expirations of SET are whole seconds, so fractional timeouts
+    (e.g. cache_expiration_minutes=0.5 with an odd number of seconds) are rounded up.
+    :param timeout: timeout in seconds (int or float)
+    :return: timeout in whole seconds
+    """
+    return int(math.ceil(timeout))
+
+
+def ignores_redis_exceptions():
+    """
+    Checks IGNORE_EXCEPTIONS option of the default cache (or DJANGO_REDIS_IGNORE_EXCEPTIONS setting) of django-redis.
+    Cached views read and write redis directly, so they honor the option themselves.
+    :return: True if redis errors should be ignored
+    """
+    options = settings.CACHES['default'].get('OPTIONS', {})
+    return options.get('IGNORE_EXCEPTIONS', getattr(settings, 'DJANGO_REDIS_IGNORE_EXCEPTIONS', False))